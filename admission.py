@@ -0,0 +1,267 @@
+# admission.py
+import os
+import time
+import heapq
+import itertools
+import threading
+
+import metrics
+
+# Admission control for /analyze. Every process keeps its own buckets and queue, so
+# with several gunicorn workers the effective limits are per worker
+ENABLED = os.environ.get('ADMISSION_ENABLED', '1') == '1'
+# Sustained requests per second, and burst size, allowed to each client
+RATE = float(os.environ.get('RATE_LIMIT_RATE', 2.0))
+BURST = float(os.environ.get('RATE_LIMIT_BURST', 10))
+# Analyses run at once; more wait in the fair queue. Defaults to the worker's threads
+SLOTS = int(os.environ.get('ANALYSIS_CONCURRENCY', os.environ.get('GUNICORN_THREADS', 2)))
+MAX_QUEUE = int(os.environ.get('ADMISSION_MAX_QUEUE', 64))
+QUEUE_TIMEOUT = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', 30))
+# 'apikey-or-origin=weight,...': a heavier client gets a larger share of a busy server
+CLIENT_WEIGHTS = os.environ.get('ADMISSION_CLIENT_WEIGHTS', '')
+# Comma-separated API keys of bulk integrations; any other X-API-Key is ignored
+API_KEYS = frozenset(key.strip() for key in os.environ.get('ADMISSION_API_KEYS', '').split(',') if key.strip())
+# Reverse proxies in front of the app whose X-Forwarded-For entries are trusted (0: none)
+TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', 0))
+# Idle clients are forgotten once this many are tracked
+MAX_CLIENTS = 10000
+
+# Lanes in strict priority order: single uploads from people ahead of bulk API traffic
+LANES = ('interactive', 'batch')
+
+
+class Overloaded(Exception):
+    """Request refused; retry_after is a hint in seconds for the Retry-After header"""
+
+    def __init__(self, message, code, retry_after):
+        super().__init__(message)
+        self.code = code
+        self.retry_after = max(1, int(retry_after + 0.999))
+
+
+def parse_weights(spec):
+    """'alpha=4,https://college.example=0.5' -> {'alpha': 4.0, 'https://college.example': 0.5}"""
+    weights = {}
+    for item in spec.split(','):
+        name, _, weight = item.strip().rpartition('=')
+        if name:
+            weights[name] = float(weight)
+    return weights
+
+
+def identify(headers, remote_addr, api_keys=None):
+    """(client, lane) for a request: its API key, else its Origin and address.
+
+    Students using the web frontend share one Origin, so browsers are told apart by
+    address as well. remote_addr is the peer address, or the one set by ProxyFix for
+    TRUSTED_PROXIES hops, never the client-supplied X-Forwarded-For. Only keys listed
+    in API_KEYS identify a client; those are bulk integrations and go in the batch lane.
+    X-Request-Priority can move a request to a lower lane, never to a higher one.
+    """
+    api_keys = API_KEYS if api_keys is None else api_keys
+    api_key = headers.get('X-API-Key')
+    if api_key and api_key in api_keys:
+        client, lane = api_key, 'batch'
+    else:
+        client = f"{headers.get('Origin', '')}|{remote_addr or 'unknown'}"
+        lane = 'interactive'
+    requested = headers.get('X-Request-Priority', '').lower()
+    if requested in LANES and LANES.index(requested) > LANES.index(lane):
+        lane = requested
+    return client, lane
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, cost=1.0):
+        """Spend tokens if there are enough; otherwise return the seconds until there will be"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class _Waiter:
+    __slots__ = ('client', 'lane', 'start', 'granted', 'cancelled', 'event')
+
+    def __init__(self, client, lane, start):
+        self.client = client
+        self.lane = lane
+        self.start = start
+        self.granted = False
+        self.cancelled = False
+        self.event = threading.Event()
+
+
+class Ticket:
+    """A granted analysis slot; release it exactly once (further calls are ignored)"""
+
+    def __init__(self, controller):
+        self._controller = controller
+        self._released = False
+        self.started = time.monotonic()
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._controller._release(time.monotonic() - self.started)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+
+class AdmissionController:
+    """Per-client token buckets in front of a weighted fair queue for analysis slots.
+
+    Waiting requests are ordered by start-time fair queuing: each client's requests
+    get virtual finish tags spaced by 1/weight, so a client with a thousand queued
+    uploads interleaves with everyone else instead of going first. The interactive
+    lane is always served before the batch lane.
+    """
+
+    def __init__(self, slots=SLOTS, rate=RATE, burst=BURST, max_queue=MAX_QUEUE, timeout=QUEUE_TIMEOUT,
+                 weights=None):
+        self.slots = slots
+        self.rate = rate
+        self.burst = burst
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.weights = parse_weights(CLIENT_WEIGHTS) if weights is None else weights
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._finish = {}
+        self._virtual_time = 0.0
+        self._queues = {lane: [] for lane in LANES}
+        self._queued = {lane: 0 for lane in LANES}
+        self._sequence = itertools.count()
+        self._active = 0
+        # Smoothed analysis duration, for Retry-After estimates
+        self._service_time = 1.0
+
+    def check_rate(self, client, cost=1.0):
+        """Spend from the client's token bucket, raising Overloaded when it is empty"""
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                if len(self._buckets) >= MAX_CLIENTS:
+                    self._forget_idle()
+                bucket = self._buckets[client] = TokenBucket(self.rate * self.weight(client),
+                                                             self.burst * self.weight(client))
+            wait = bucket.take(cost)
+        if wait:
+            metrics.increment('admission_rejected_total', labels={'reason': 'rate_limited'})
+            raise Overloaded("Too many requests from this client", 'rate_limited', wait)
+
+    def weight(self, client):
+        """Configured share for an API key, or for every browser on an origin"""
+        return self.weights.get(client.partition('|')[0], 1.0)
+
+    def acquire(self, client, lane='interactive', cost=1.0):
+        """Wait for an analysis slot in fair order; raises Overloaded when the queue is full or too slow"""
+        started = time.monotonic()
+        with self._lock:
+            if self._active < self.slots and not any(self._queued.values()):
+                self._active += 1
+                self._observe(lane, 0.0)
+                return Ticket(self)
+            if sum(self._queued.values()) >= self.max_queue:
+                retry_after = self._drain_estimate()
+                metrics.increment('admission_rejected_total', labels={'reason': 'queue_full'})
+                raise Overloaded("The server is busy, please retry shortly", 'overloaded', retry_after)
+            key = (client, lane)
+            start = max(self._virtual_time, self._finish.get(key, 0.0))
+            finish = start + cost / self.weight(client)
+            self._finish[key] = finish
+            waiter = _Waiter(client, lane, start)
+            heapq.heappush(self._queues[lane], (finish, next(self._sequence), waiter))
+            self._queued[lane] += 1
+            self._publish_depth()
+
+        waiter.event.wait(self.timeout)
+        with self._lock:
+            if not waiter.granted:
+                waiter.cancelled = True
+                self._queued[lane] -= 1
+                self._publish_depth()
+                retry_after = self._drain_estimate()
+                metrics.increment('admission_rejected_total', labels={'reason': 'queue_timeout'})
+                raise Overloaded("The server is busy, please retry shortly", 'overloaded', retry_after)
+            self._observe(lane, time.monotonic() - started)
+        return Ticket(self)
+
+    def queue_depth(self):
+        """Requests waiting for an analysis slot, across lanes"""
+        with self._lock:
+            return sum(self._queued.values())
+
+    def _release(self, held):
+        with self._lock:
+            self._service_time = 0.8 * self._service_time + 0.2 * held
+            self._active -= 1
+            self._dispatch()
+            metrics.set_gauge('admission_active_analyses', self._active)
+
+    def _dispatch(self):
+        while self._active < self.slots:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            waiter.granted = True
+            self._virtual_time = max(self._virtual_time, waiter.start)
+            self._active += 1
+            waiter.event.set()
+
+    def _next_waiter(self):
+        for lane in LANES:
+            queue = self._queues[lane]
+            while queue:
+                _, _, waiter = heapq.heappop(queue)
+                if waiter.cancelled:
+                    continue
+                self._queued[lane] -= 1
+                self._publish_depth()
+                return waiter
+        return None
+
+    def _drain_estimate(self):
+        return (sum(self._queued.values()) + 1) * self._service_time / max(1, self.slots)
+
+    def _forget_idle(self):
+        # Full buckets and finish tags already behind virtual time carry no state worth keeping
+        now = time.monotonic()
+        self._buckets = {c: b for c, b in self._buckets.items()
+                         if b.tokens + (now - b.updated) * b.rate < b.burst}
+        self._finish = {c: f for c, f in self._finish.items() if f > self._virtual_time}
+
+    def _publish_depth(self):
+        for lane in LANES:
+            metrics.set_gauge('admission_queue_depth', self._queued[lane], labels={'lane': lane})
+
+    def _observe(self, lane, waited):
+        metrics.observe('admission_wait_seconds', waited, labels={'lane': lane})
+        metrics.set_gauge('admission_active_analyses', self._active)
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_controller():
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = AdmissionController()
+    return _controller
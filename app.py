@@ -1,10 +1,31 @@
 # app.py
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, Response, url_for
 import os
+import json
+import time
 import tempfile
+import threading
 from werkzeug.utils import secure_filename
-from resume_analyzer import ResumeAnalyzer
+from werkzeug.middleware.proxy_fix import ProxyFix
 from ats_analyzer import ATSScoreAnalyzer
+from results import FactorUpdate
+from pdf_preflight import PDFPreflight, ERROR_STATUS
+import document_formats
+from memory_profile import MemoryProfiler
+import memory_profile
+import metrics
+import near_duplicates
+import semantic
+import feature_store
+import cohort_analytics
+import request_profile
+import admission
+import result_cache
+import single_flight
+import quality
+import http_cache
+import serializers
+from synthetic_corpus import generate_resume_lines, write_pdf, write_docx
 from flask_cors import CORS
 
 # Allow only the specific frontend origin
@@ -13,77 +34,412 @@ app = Flask(__name__)
 CORS(app, origins=["https://cdc.soet-krmu.com"], supports_credentials=True)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max upload size
 
+# Behind a reverse proxy, take the client address from the entries it appended to
+# X-Forwarded-For; anything further left was written by the client
+if admission.TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=admission.TRUSTED_PROXIES)
+
 
 # Ensure upload directory exists
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
-ALLOWED_EXTENSIONS = {'pdf'}
+ALLOWED_EXTENSIONS = set(document_formats.EXTRACTORS)
+
+# HTTP status for each pre-flight rejection code, PDF and otherwise
+PREFLIGHT_STATUS = dict(ERROR_STATUS, **document_formats.ERROR_STATUS)
+
+# Typo-tolerant keyword matching, overridable per request with the 'fuzzy' form field
+FUZZY_DEFAULT = os.environ.get('FUZZY_MATCHING', '0')
+
+# Embedding similarity to the job description, overridable with the 'semantic' form field
+SEMANTIC_DEFAULT = os.environ.get('SEMANTIC_SIMILARITY', '0')
+
+# Upper bound on job descriptions ranked in a single request
+MAX_JOB_DESCRIPTIONS = int(os.environ.get('MAX_JOB_DESCRIPTIONS', 1000))
+
+# Recent responses and parsed documents by file hash, shared by every worker on the node,
+# so repeat submissions skip upload and analysis and new options for a known file skip parsing
+result_store = result_cache.ResultCache()
+
+# Identical uploads arriving together wait for the first one's analysis
+flights = single_flight.SingleFlight()
+
+# Per-client rate limits and a fair queue in front of the analysis slots
+admission_controller = admission.get_controller()
+
+# Sheds optional analysis stages while the queue or recent latency is over its limit
+quality_governor = quality.get_governor()
+
+# Cheap structural checks run before any text extraction
+preflight = PDFPreflight()
+
+# Analyzers are stateless between calls, so one instance serves every request and
+# thread; under gunicorn's preload_app it is built once in the master and shared
+ats_analyzer = ATSScoreAnalyzer()
+
+# Trace allocations for the whole process life so per-request deltas are comparable
+if memory_profile.ENABLED:
+    MemoryProfiler().start()
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def run_preflight(filepath):
+    """PDF structure checks, or the cheap size checks for DOCX and plain-text uploads"""
+    if document_formats.file_type(filepath) == 'pdf':
+        return preflight.check(filepath)[0]
+    return document_formats.preflight(filepath)
+
+# Set once this process (or the gunicorn master it was forked from) has been warmed up;
+# /ready stays 503 until then so load balancers keep traffic off cold workers
+ready = threading.Event()
+_warm_up_lock = threading.Lock()
+
+def warm_up():
+    """Run a synthetic resume through every extractor and the full scoring path before serving.
+
+    The first analysis in a process pays for lazy spaCy component setup, NLTK corpus
+    loading, regex compilation and index builds; this pays it up front, once.
+    """
+    with _warm_up_lock:
+        if ready.is_set():
+            return
+        start = time.perf_counter()
+        lines = generate_resume_lines(seed=0)
+        with tempfile.TemporaryDirectory() as directory:
+            pdf_path = write_pdf(lines, os.path.join(directory, 'warmup.pdf'))
+            docx_path = write_docx(lines, os.path.join(directory, 'warmup.docx'))
+            txt_path = os.path.join(directory, 'warmup.txt')
+            with open(txt_path, 'w') as f:
+                f.write('\n'.join(lines))
+            for path in (pdf_path, docx_path, txt_path):
+                run_preflight(path)
+            industry = next(iter(ats_analyzer.common_ats_keywords), None)
+            ats_analyzer.calculate_ats_score(pdf_path, job_description='python sql communication', fuzzy=True,
+                                             job_descriptions=['java docker kubernetes'], semantic_match=True)
+            ats_analyzer.calculate_ats_score(docx_path, target_industry=industry)
+            ats_analyzer.calculate_ats_score(txt_path)
+        semantic.get_encoder()
+        metrics.set_gauge('warmup_duration_seconds', time.perf_counter() - start)
+        ready.set()
+
+def warm_up_in_background():
+    """Warm up without blocking startup, for servers that accept connections straight away"""
+    thread = threading.Thread(target=warm_up, name='warm-up', daemon=True)
+    thread.start()
+    return thread
+
+def parse_job_descriptions(form):
+    """Read repeated 'job_descriptions' fields, or a single field holding a JSON array"""
+    values = form.getlist('job_descriptions')
+    if len(values) == 1 and values[0].lstrip().startswith('['):
+        values = json.loads(values[0])
+        if not all(isinstance(v, str) for v in values):
+            raise ValueError("job_descriptions must all be strings")
+    return [v for v in values if v]
+
+@app.context_processor
+def static_helpers():
+    def static_url(filename):
+        """URL of a static asset fingerprinted with its content hash, safe to cache for a year"""
+        return url_for('static', filename=filename, v=http_cache.static_version(app.static_folder, filename))
+    return {'static_url': static_url}
+
+@app.after_request
+def finalize_response(response):
+    # Compression for JSON, HTML and assets; long-lived cache headers for static/
+    return http_cache.finalize(response, request, static=request.endpoint == 'static')
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def stream_response(chunks, mimetype):
+    # Proxies must pass each event through as soon as it is written
+    return Response(chunks, mimetype=mimetype, headers={
+        'Vary': 'Accept', 'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'
+    })
+
+def overloaded_response(error):
+    """429 for a client over its rate, 503 when the server is saturated; both say when to retry"""
+    response = jsonify({'error': str(error), 'code': error.code, 'retryAfter': error.retry_after})
+    response.status_code = 429 if error.code == 'rate_limited' else 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+def record_cohorts(file_hash, options, tags):
+    """Count a result served without running its analysis (cache hit, shared flight) in cohort analytics"""
+    if cohort_analytics.ENABLED:
+        summary = result_store.get_counts(file_hash, options)
+        if summary is not None:
+            cohort_analytics.get_analytics().record_counts(summary['ats_score'], summary['counts'], tags,
+                                                           file_hash)
+
+def api_response(payload, mimetype, stream_mimetype=None):
+    """Serialize an analysis payload in the negotiated format"""
+    if isinstance(payload, (bytes, bytearray)):
+        # Stored JSON from the shared result cache goes out as it is
+        if mimetype == serializers.JSON_MIMETYPE and not stream_mimetype:
+            return Response(payload, mimetype=mimetype, headers={'Vary': 'Accept'})
+        payload = json.loads(payload)
+    if stream_mimetype:
+        # A finished result streams as a single 'result' event
+        return stream_response([serializers.stream_event('result', payload, stream_mimetype)], stream_mimetype)
+    return Response(serializers.dumps(payload, mimetype), mimetype=mimetype, headers={'Vary': 'Accept'})
+
 @app.route('/analyze', methods=['POST'])
 def analyze_resume():
+    target_industry = request.form.get('industry', None)
+    job_description = request.form.get('job_description', None)
+    fuzzy = request.form.get('fuzzy', FUZZY_DEFAULT) in ('1', 'true', 'on')
+    semantic_match = request.form.get('semantic', SEMANTIC_DEFAULT) in ('1', 'true', 'on')
+    
+    # Optional list of postings to rank the resume against
+    try:
+        job_descriptions = parse_job_descriptions(request.form)
+    except ValueError:
+        return jsonify({'error': 'job_descriptions must be a JSON array of strings',
+                        'code': 'invalid_job_descriptions'}), 400
+    if len(job_descriptions) > MAX_JOB_DESCRIPTIONS:
+        return jsonify({
+            'error': f'At most {MAX_JOB_DESCRIPTIONS} job descriptions can be ranked per request',
+            'code': 'too_many_job_descriptions'
+        }), 400
+    
+    # Upload tags name the cohorts this resume counts towards in /analytics
+    try:
+        tags = cohort_analytics.parse_tags(request.form.get('tag'))
+    except ValueError as e:
+        return jsonify({'error': str(e), 'code': 'invalid_tag'}), 400
+    
+    options = result_cache.options_key(job_description, target_industry, fuzzy, job_descriptions, semantic_match)
+    mimetype = serializers.negotiate(request.headers.get('Accept'))
+    # Accept: application/x-ndjson or text/event-stream streams each factor as it is scored
+    stream_mimetype = serializers.negotiate_stream(request.headers.get('Accept'))
+    
     if 'resume' not in request.files:
-        return jsonify({'error': 'No file part'}), 400
+        # Clients send the file's SHA-256 first and only upload it on a cache miss
+        resume_sha256 = request.form.get('resume_sha256', '').lower()
+        if not resume_sha256:
+            return jsonify({'error': 'No file part'}), 400
+        cached = result_store.get(resume_sha256, options)
+        if cached is None:
+            return jsonify({'error': 'No cached result for this file, please upload it', 'code': 'cache_miss'}), 404
+        record_cohorts(resume_sha256, options, tags)
+        return api_response(cached, mimetype, stream_mimetype)
+        
+    # Hash lookups above are cheap; uploads are rate limited per client
+    if admission.ENABLED:
+        client, lane = admission.identify(request.headers, request.remote_addr)
+        try:
+            admission_controller.check_rate(client)
+        except admission.Overloaded as e:
+            return overloaded_response(e)
         
     file = request.files['resume']
     if file.filename == '':
         return jsonify({'error': 'No selected file'}), 400
         
     if not allowed_file(file.filename):
-        return jsonify({'error': 'File type not allowed, please upload a PDF'}), 400
+        return jsonify({'error': 'File type not allowed, please upload a PDF, DOCX or TXT file'}), 400
     
-    target_industry = request.form.get('industry', None)
-    job_description = request.form.get('job_description', None)
+    # Opt-in profiling: an authenticated debug run, or a sampled share of ordinary traffic
+    try:
+        request_profiler = request_profile.for_request(request.args, request.headers)
+    except PermissionError as e:
+        return jsonify({'error': str(e), 'code': 'profile_forbidden'}), 403
+    except ValueError as e:
+        return jsonify({'error': str(e), 'code': 'invalid_profile_format'}), 400
     
     # Save file to temporary location
     temp_dir = tempfile.mkdtemp()
     filename = secure_filename(file.filename)
+    extension = file.filename.rsplit('.', 1)[1].lower()
+    if not filename.lower().endswith(f'.{extension}'):
+        # secure_filename drops non-ASCII characters: '简历.docx' comes back as 'docx',
+        # which would then be read as the wrong format
+        filename = f'resume.{extension}'
     filepath = os.path.join(temp_dir, filename)
     file.save(filepath)
+    ticket = None
+    claim = None
+    streamed = False
     
     try:
-        # Initialize analyzers
-        resume_analyzer = ResumeAnalyzer()
-        ats_analyzer = ATSScoreAnalyzer()
+        # The same file analyzed with the same options moments ago needs no second run
+        file_hash = result_cache.file_sha256(filepath)
+        cached = result_store.get(file_hash, options) if request_profiler is None else None
+        if cached is not None:
+            record_cohorts(file_hash, options, tags)
+            return api_response(cached, mimetype, stream_mimetype)
         
-        # Get ATS score and recommendations
-        ats_result = ats_analyzer.calculate_ats_score(
-            filepath, 
+        # ...and one being analyzed right now is waited for, without taking an analysis slot
+        if single_flight.ENABLED and request_profiler is None:
+            claim, shared = flights.join(f'{file_hash}-{options}')
+            if shared is not None:
+                record_cohorts(file_hash, options, tags)
+                return api_response(shared, mimetype, stream_mimetype)
+        
+        # Wait for an analysis slot, interactive uploads first and clients in fair turns
+        if admission.ENABLED:
+            ticket = admission_controller.acquire(client, lane)
+        
+        # Reject or downgrade pathological files before parsing them
+        preflight_result = run_preflight(filepath)
+        if not preflight_result['ok']:
+            return jsonify({
+                'error': preflight_result['error'],
+                'code': preflight_result['error_code']
+            }), PREFLIGHT_STATUS[preflight_result['error_code']]
+        
+        # Opt-in per-stage memory instrumentation (MEMORY_PROFILE=1)
+        profiler = MemoryProfiler() if memory_profile.ENABLED else None
+        
+        # A quicker, less detailed analysis beats a timeout; profiled runs always get everything
+        shed = frozenset()
+        if quality.ENABLED and request_profiler is None:
+            queue_depth = admission_controller.queue_depth() if admission.ENABLED else 0
+            shed = quality_governor.plan(queue_depth)
+        analysis_started = time.perf_counter()
+        
+        # The same file analyzed earlier with other options is already parsed; profiled runs parse anyway
+        measured = request_profiler is not None or profiler is not None
+        document = None if measured else result_store.get_document(file_hash, preflight_result['max_pages'])
+        if document is None:
+            with request_profile.profiling(request_profiler):
+                document = ats_analyzer.resume_analyzer.parse_document(
+                    filepath, max_pages=preflight_result['max_pages'], profiler=profiler, shed=shed
+                )
+            # Only full-quality parses are shared
+            if document is not None and 'layout_scan' not in shed:
+                result_store.put_document(file_hash, preflight_result['max_pages'], document)
+        if document is None:
+            return jsonify({'error': 'Could not extract text from the file', 'code': 'no_text'}), 422
+        
+        # Flag near-duplicates of earlier uploads, handing back their analysis when reuse is on
+        near_duplicate = None
+        if near_duplicates.ENABLED:
+            dedup_index = near_duplicates.get_index()
+            # A profiled request has to run the analysis it is meant to measure
+            reuse = near_duplicates.REUSE_ENABLED and request_profiler is None
+            signature, near_duplicate, stored = dedup_index.check(document.processed_text, options, reuse=reuse)
+            if stored is not None:
+                response = json.loads(stored)
+                response['nearDuplicate'] = dict(near_duplicate, reused=True)
+                result_store.put(file_hash, options, response)
+                if claim:
+                    claim.finish(response)
+                return api_response(response, mimetype, stream_mimetype)
+        
+        def finish(ats_result):
+            """Shape the final response and record it for dedup, similarity search and the result cache"""
+            quality_governor.observe(time.perf_counter() - analysis_started)
+            for stage in ats_result.degraded_stages:
+                metrics.increment('degraded_analyses_total', labels={'stage': stage})
+            # A degraded result is served once but never reused, so full quality returns with capacity
+            degraded = bool(ats_result.degraded_stages)
+            response = serializers.build_api_response(ats_result, preflight_result['warnings'])
+            if near_duplicates.ENABLED:
+                # Only cluster representatives are banded, so only they keep a reusable result
+                stored = None
+                if near_duplicates.REUSE_ENABLED and near_duplicate is None and not degraded:
+                    stored = serializers.dumps(response, serializers.JSON_MIMETYPE)
+                dedup_index.add(signature, label=filename, options=options, result=stored,
+                                duplicate_of=near_duplicate['documentId'] if near_duplicate else None)
+                if near_duplicate:
+                    response['nearDuplicate'] = dict(near_duplicate, reused=False)
+            if semantic.INDEX_ENABLED:
+                semantic.index_resume(filename, document.raw_text)
+            if feature_store.ENABLED:
+                feature_store.get_store().append(filename, ats_result, file_hash)
+            if cohort_analytics.ENABLED:
+                cohort_analytics.get_analytics().record(ats_result, tags, file_hash)
+                # Repeat uploads served from the cache or a shared flight are counted from this
+                result_store.put_counts(file_hash, options, ats_result.ats_score,
+                                        cohort_analytics.result_counts(ats_result))
+            if not degraded:
+                result_store.put(file_hash, options, response)
+            if claim:
+                claim.finish(response)
+            return response
+        
+        analysis_options = dict(
             job_description=job_description,
-            target_industry=target_industry
+            target_industry=target_industry,
+            max_pages=preflight_result['max_pages'],
+            profiler=profiler,
+            fuzzy=fuzzy,
+            job_descriptions=job_descriptions,
+            document=document,
+            semantic_match=semantic_match,
+            shed=shed
         )
         
-        # Format response
-        response = {
-            "success": True,
-            "ats_score": ats_result['ats_score'],
-            "recommendations": ats_result['recommendations'],
-            "metrics": {
-                "wordCount": ats_result['base_analysis']['metrics']['word_count'],
-                "actionVerbCount": ats_result['base_analysis']['metrics']['action_verbs']['count'],
-                "weakPhraseCount": ats_result['base_analysis']['metrics']['weak_phrases']['count'],
-                "sectionsFound": ats_result['base_analysis']['sections_found'],
-                "formattingIssues": ats_result['formatting_issues']
-            },
-            "keywordAnalysis": {
-                "industryKeywords": ats_result['base_analysis']['industry_keywords']
-            },
-            "factorScores": ats_result['factor_scores']
-        }
-        
-        return jsonify(response)
+        # Profiled runs are measured as one call, then sent as a single event below
+        if stream_mimetype and request_profiler is None:
+            # The document is already parsed, so the stream no longer needs the uploaded file
+            updates = ats_analyzer.iter_ats_score(filepath, **analysis_options)
+            
+            def events():
+                try:
+                    for update in updates:
+                        if isinstance(update, FactorUpdate):
+                            yield serializers.stream_event('factor', serializers.build_factor_event(update),
+                                                           stream_mimetype)
+                        else:
+                            if profiler:
+                                profiler.emit(filename)
+                            yield serializers.stream_event('result', finish(update), stream_mimetype)
+                except Exception as e:
+                    # Headers are already sent, so failures arrive as a final event
+                    yield serializers.stream_event('error', {'error': str(e)}, stream_mimetype)
+            
+            response = stream_response(events(), stream_mimetype)
+            if ticket:
+                # The slot stays held until the last event has been sent
+                response.call_on_close(ticket.release)
+                ticket = None
+            if claim:
+                # finish() shares the result from inside the stream; closing it releases waiters on failure
+                response.call_on_close(claim.finish)
+                streamed = True
+            return response
+        
+        # Get ATS score and recommendations
+        with request_profile.profiling(request_profiler):
+            ats_result = ats_analyzer.calculate_ats_score(filepath, **analysis_options)
+        if profiler:
+            profiler.emit(filename)
+        
+        if request_profiler:
+            profile_path = request_profiler.save(filename)
+            if request_profiler.respond:
+                with open(profile_path, 'rb') as f:
+                    profile_data = f.read()
+                return Response(profile_data, mimetype=request_profiler.mimetype, headers={
+                    'Content-Disposition': f'attachment; filename="{os.path.basename(profile_path)}"',
+                    'X-Profile-Path': profile_path
+                })
         
+        if 'error' in ats_result:
+            return jsonify({'error': ats_result['error'], 'code': 'no_text'}), 422
+        
+        # Format response, encoding records directly with the fastest available serializer;
+        # a sampled profile still answers a streaming client with its one 'result' event
+        return api_response(finish(ats_result), mimetype, stream_mimetype)
+        
+    except admission.Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
+        if ticket:
+            ticket.release()
+        if claim and not streamed:
+            # Any exit without a result lets waiting duplicates run their own analysis
+            claim.finish()
         # Clean up temp file
         try:
             os.remove(filepath)
@@ -91,12 +447,83 @@ def analyze_resume():
         except:
             pass
 
+@app.route('/similar', methods=['POST'])
+def similar_resumes():
+    """Indexed resumes closest in meaning to a job description"""
+    payload = request.get_json(silent=True) or {}
+    job_description = request.form.get('job_description') or payload.get('job_description')
+    if not job_description:
+        return jsonify({'error': 'job_description is required', 'code': 'missing_job_description'}), 400
+    k = max(1, min(request.args.get('k', 10, type=int), 100))
+    
+    matches = semantic.get_vector_index().search(semantic.get_encoder().encode(job_description), k)
+    return jsonify({'success': True, 'matches': [{'resume': label, 'similarity': round(score, 4)}
+                                                 for label, score in matches]})
+
+@app.route('/features/rescore', methods=['POST'])
+def rescore_features():
+    """Re-rank every stored analysis under new factor weights, without re-analysing anything"""
+    # The ranking lists upload filenames, so it is only shown to holders of the store's token
+    if not feature_store.authorized(request.headers):
+        return jsonify({'error': 'Rescoring requires a valid X-Features-Token header',
+                        'code': 'features_forbidden'}), 403
+    payload = request.get_json(silent=True) or {}
+    weights = payload.get('weights') or {}
+    if not isinstance(weights, dict):
+        return jsonify({'error': 'weights must be an object of factor: weight', 'code': 'invalid_weights'}), 400
+    try:
+        weights = feature_store.normalize_weights(weights, ats_analyzer.ats_factors)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e), 'code': 'invalid_weights'}), 400
+    limit = max(1, min(request.args.get('limit', 20, type=int), 1000))
+    
+    start = time.perf_counter()
+    scores, ranking = feature_store.get_store().rank(weights, limit)
+    return jsonify({
+        'success': True,
+        'resumes': len(scores),
+        'weights': weights,
+        'ranking': ranking,
+        'elapsedMs': round((time.perf_counter() - start) * 1000, 2)
+    })
+
+@app.route('/analytics')
+def cohort_aggregates():
+    """Score distribution, common formatting issues, section coverage and missing keywords for a cohort"""
+    tag = request.args.get('tag') or cohort_analytics.ALL
+    k = max(1, min(request.args.get('k', 10, type=int), 100))
+    aggregates = cohort_analytics.get_analytics().query(tag, k)
+    if aggregates is None:
+        return jsonify({'error': f"No analyses recorded for tag '{tag}'", 'code': 'unknown_cohort'}), 404
+    return jsonify(dict(aggregates, success=True))
+
+@app.route('/analytics/cohorts')
+def cohort_list():
+    return jsonify({'success': True, 'cohorts': cohort_analytics.get_analytics().cohorts()})
+
+@app.route('/metrics')
+def metrics_endpoint():
+    # Unique memory is what each additional worker really costs
+    memory = memory_profile.process_memory()
+    if memory['uss_kb'] is not None:
+        metrics.set_gauge('process_unique_memory_bytes', memory['uss_kb'] * 1024)
+        metrics.set_gauge('process_proportional_memory_bytes', memory['pss_kb'] * 1024)
+    return Response(metrics.render_prometheus(), mimetype='text/plain')
+
 @app.route('/health')
 def health_check():
+    # Liveness only: the process is up. Route traffic on /ready
     return jsonify({'status': 'ok'})
 
+@app.route('/ready')
+def readiness_check():
+    if not ready.is_set():
+        return jsonify({'status': 'warming_up'}), 503
+    return jsonify({'status': 'ready'})
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
+    warm_up_in_background()
     app.run(host='0.0.0.0', port=port)
 
 
@@ -3,6 +3,15 @@ import re
 import string
 from collections import Counter
 from resume_analyzer import ResumeAnalyzer
+import keyword_taxonomy
+import document_formats
+from skill_index import get_skill_index
+from feature_scanner import scan
+from fuzzy_matcher import get_fuzzy_index
+from memory_profile import profile_stage
+from job_matcher import JobDescriptionMatrix
+import semantic
+from results import FactorScores, FactorUpdate, Recommendation, ATSResult
 
 class ATSScoreAnalyzer:
     def __init__(self):
@@ -32,46 +41,65 @@ class ATSScoreAnalyzer:
             'uncommon file formats' # Non-standard formats may not parse correctly
         ]
         
-        # Keywords frequently used in job descriptions by industry
-        self.common_ats_keywords = {
-            'software_development': [
-                'javascript', 'python', 'java', 'react', 'angular', 'vue', 'node.js', 
-                'api', 'rest', 'git', 'aws', 'cloud', 'agile', 'scrum', 'ci/cd',
-                'full-stack', 'backend', 'frontend', 'database', 'sql', 'nosql',
-                'devops', 'docker', 'kubernetes', 'testing', 'microservices'
-            ],
-            'data_science': [
-                'machine learning', 'deep learning', 'neural networks', 'ai', 'data analysis',
-                'python', 'r', 'sql', 'pandas', 'numpy', 'scikit-learn', 'tensorflow',
-                'pytorch', 'statistics', 'big data', 'data visualization', 'nlp',
-                'computer vision', 'predictive modeling', 'data mining', 'feature engineering'
-            ],
-            'marketing': [
-                'digital marketing', 'social media', 'content marketing', 'seo', 'sem',
-                'google analytics', 'campaign management', 'market research', 'brand strategy',
-                'email marketing', 'crm', 'customer journey', 'analytics', 'kpis',
-                'conversion rate optimization', 'a/b testing', 'marketing automation'
-            ],
-            'finance': [
-                'financial analysis', 'accounting', 'budgeting', 'forecasting', 'risk assessment',
-                'financial reporting', 'investment analysis', 'portfolio management', 'excel',
-                'financial modeling', 'valuation', 'cfa', 'bloomberg', 'financial statements',
-                'compliance', 'regulatory reporting', 'audit', 'tax'
-            ],
-            'project_management': [
-                'project management', 'agile', 'scrum', 'kanban', 'waterfall', 'prince2',
-                'pmp', 'project planning', 'risk management', 'stakeholder management',
-                'resource allocation', 'gantt', 'jira', 'ms project', 'project lifecycle',
-                'change management', 'budget management', 'timeline', 'kpis'
-            ]
+        # Both PDF and DOCX parse reliably in every mainstream ATS; plain text loses all structure
+        self.file_format_scores = {'pdf': 1.0, 'docx': 1.0, 'txt': 0.7}
+        
+        # Punctuation outside this common set might confuse ATS parsers
+        self.special_chars = set(string.punctuation) - set('-_.,@:()/')
+        
+        # Thresholds applied to the layout facts collected during extraction
+        self.layout_limits = {
+            'table_rows': 3,        # Rows with three or more aligned cells
+            'table_rules': 30,      # Drawn lines and rectangles (cell borders)
+            'column_lines': 5,      # Lines with text in both halves of the page
+            'chart_curves': 40,     # Bezier segments (pie slices, plotted lines)
+            'isolated_blocks': 3,   # Short fragments away from the usual margins
+            'font_families': 3      # More families than this looks designed, not standard
         }
     
+    @property
+    def common_ats_keywords(self):
+        """Keywords frequently used in job descriptions by industry, from the shared taxonomy"""
+        return keyword_taxonomy.get_taxonomy().industry_keywords('ats')
+    
     def check_file_format(self, file_path):
-        """Check if the file is in ATS-friendly format (PDF)"""
-        return file_path.lower().endswith('.pdf')
+        """Check if the file is in ATS-friendly format (PDF or DOCX)"""
+        return self.file_format_score(file_path) == 1.0
+    
+    def file_format_score(self, file_path):
+        """Score for the upload's format; unknown formats get half marks"""
+        return self.file_format_scores.get(document_formats.file_type(file_path), 0.5)
+    
+    def detect_formatting_issues(self, text, layout=None):
+        """Detect potential ATS unfriendly formatting from layout facts gathered during extraction"""
+        if layout is None:
+            # No layout facts (e.g. text supplied directly): fall back to guessing from the text
+            return self._detect_formatting_issues_from_text(text)
+        
+        limits = self.layout_limits
+        issues = []
+        if layout.table_rows >= limits['table_rows'] or layout.vector_rules >= limits['table_rules']:
+            issues.append('tables')
+        if layout.column_lines >= limits['column_lines']:
+            issues.append('columns')
+        if layout.repeated_header or layout.repeated_footer:
+            issues.append('headers/footers')
+        if layout.image_count:
+            issues.append('images')
+        if layout.vector_curves >= limits['chart_curves'] or layout.charts:
+            issues.append('charts')
+        if layout.isolated_blocks > limits['isolated_blocks'] or layout.text_boxes:
+            issues.append('text boxes')
+        if not self.special_chars.isdisjoint(text):
+            issues.append('special characters')
+        # Families are counted after font_family folds faces together; which families are
+        # used is not judged, as embedded fonts parse the same whatever their name
+        if len(layout.fonts) > limits['font_families']:
+            issues.append('custom fonts')
+        return issues
     
-    def detect_formatting_issues(self, text):
-        """Detect potential ATS unfriendly formatting"""
+    def _detect_formatting_issues_from_text(self, text):
+        """Guess ATS unfriendly formatting from the flattened text alone"""
         issues = []
         
         # Check for potential tables (rows of similar format)
@@ -91,13 +119,7 @@ class ATSScoreAnalyzer:
                     break
         
         # Check for special characters that might confuse ATS
-        special_chars = set(string.punctuation) - set('-_.,@:()/')  # Common acceptable punctuation
-        unusual_chars = []
-        for char in text:
-            if char in special_chars:
-                unusual_chars.append(char)
-        
-        if unusual_chars:
+        if not self.special_chars.isdisjoint(text):
             issues.append('special characters')
         
         # Check for potential text boxes (short isolated text segments)
@@ -107,11 +129,12 @@ class ATSScoreAnalyzer:
         
         return list(set(issues))  # Remove duplicates
     
-    def analyze_contact_info(self, text):
+    def analyze_contact_info(self, text, features=None):
         """Check for complete contact information"""
-        has_email = bool(re.search(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', text))
-        has_phone = bool(re.search(r'(\+\d{1,3}\s?)?(\()?\d{3}(\))?[\s.-]?\d{3}[\s.-]?\d{4}', text))
-        has_linkedin = bool(re.search(r'linkedin\.com|linkedin', text.lower()))
+        found = (features or scan(text)).matches
+        has_email = 'email' in found
+        has_phone = 'phone' in found
+        has_linkedin = 'linkedin' in found
         
         missing_info = []
         if not has_email:
@@ -126,23 +149,24 @@ class ATSScoreAnalyzer:
             'missing': missing_info
         }
     
-    def check_education_format(self, education_text):
+    def check_education_format(self, education_text, features=None):
         """Check if education section follows ATS-friendly format"""
         if not education_text:
             return {'properly_formatted': False, 'issues': ['education section missing']}
         
         issues = []
+        found = features.sections.get('education', {}) if features else scan(education_text).matches
         
         # Check for degree mention
-        if not re.search(r'\b(bachelor|master|phd|doctor|mba|bs|ba|ms|ma|btech|mtech)\b', education_text.lower()):
+        if 'degree' not in found:
             issues.append('degree not clearly stated')
         
         # Check for graduation year
-        if not re.search(r'\b20\d{2}\b', education_text):
+        if not any(year.startswith('20') for year in found.get('year', ())):
             issues.append('graduation year not mentioned')
         
         # Check for institution name
-        if not re.search(r'\b(university|college|institute|school)\b', education_text.lower()):
+        if 'institution' not in found:
             issues.append('institution not clearly stated')
             
         return {
@@ -150,84 +174,148 @@ class ATSScoreAnalyzer:
             'issues': issues
         }
     
-    def calculate_keyword_match(self, text, job_description=None, target_industry=None):
+    def calculate_keyword_match(self, text, job_description=None, target_industry=None, skill_ids=None,
+                                fuzzy_ids=frozenset()):
         """Calculate keyword match score with job description or industry standards"""
+        index = get_skill_index()
         if job_description:
-            # Prepare job description
-            job_desc_words = self._extract_keywords(job_description)
-            
-            # Prepare resume text
-            resume_words = self._extract_keywords(text)
+            # Compare job description and resume as sets of skill and word ids
+            job_desc_ids = index.keyword_ids(job_description)
+            resume_ids = index.keyword_ids(text) | fuzzy_ids
             
             # Calculate match percentage
-            total_keywords = len(job_desc_words)
+            total_keywords = len(job_desc_ids)
             if total_keywords == 0:
                 return 0
                 
-            matches = sum(1 for word in job_desc_words if word in resume_words)
-            return matches / total_keywords
-        elif target_industry and target_industry in self.common_ats_keywords:
+            return len(job_desc_ids & resume_ids) / total_keywords
+        
+        if skill_ids is None:
+            skill_ids = index.match_ids(text)
+        skill_ids = skill_ids | fuzzy_ids
+        taxonomy = index.taxonomy
+        
+        if target_industry and target_industry in taxonomy.industry_index:
             # Use industry-specific keywords if no job description provided
-            industry_keywords = self.common_ats_keywords[target_industry]
-            resume_words = self._extract_keywords(text)
-            
-            # Calculate match percentage
-            total_keywords = len(industry_keywords)
-            matches = sum(1 for word in industry_keywords if word in resume_words)
-            return matches / total_keywords
+            standard_ids = taxonomy.industry_term_ids(target_industry, 'ats')
         else:
             # Default to industry keywords from resume analyzer
-            industry_keywords = self.resume_analyzer.identify_industry_keywords(text)
+            industry_keywords = self.resume_analyzer.identify_industry_keywords(text, skill_ids=skill_ids)
             if not industry_keywords:
                 return 0.3  # Default moderate score if no clear industry detected
                 
             # Use the industry with most matches
             best_industry = max(industry_keywords.keys(), key=lambda k: len(industry_keywords[k]))
-            standard_keywords = self.common_ats_keywords.get(best_industry, [])
+            standard_ids = taxonomy.industry_term_ids(best_industry, 'ats')
             
-            if not standard_keywords:
-                return 0.3
-                
-            resume_words = self._extract_keywords(text)
-            total_keywords = len(standard_keywords)
-            matches = sum(1 for word in standard_keywords if word in resume_words)
-            return matches / total_keywords
-    
-    def _extract_keywords(self, text):
-        """Extract important keywords from text"""
-        text = text.lower()
-        # Remove punctuation
-        text = re.sub(r'[^\w\s]', ' ', text)
-        # Tokenize
-        words = text.split()
-        # Remove stopwords (simplified)
-        stopwords = {'and', 'the', 'to', 'of', 'for', 'in', 'on', 'at', 'with', 'by', 'a', 'an'}
-        keywords = [word for word in words if word not in stopwords and len(word) > 2]
-        return set(keywords)
+        if not standard_ids:
+            return 0.3
+            
+        # Calculate match percentage
+        matches = sum(1 for skill_id in standard_ids if skill_id in skill_ids)
+        return matches / len(standard_ids)
     
-    def calculate_ats_score(self, pdf_path, job_description=None, target_industry=None):
+    def calculate_ats_score(self, pdf_path, job_description=None, target_industry=None, max_pages=None,
+                            profiler=None, fuzzy=False, job_descriptions=None, document=None,
+                            semantic_match=False, shed=frozenset()):
         """Calculate overall ATS compatibility score"""
-        # Extract text and analyze resume using base analyzer
-        raw_text = self.resume_analyzer.extract_text_from_pdf(pdf_path)
-        if not raw_text:
-            return {"error": "Could not extract text from the PDF"}
-            
-        processed_text = self.resume_analyzer.preprocess_text(raw_text)
-        sections = self.resume_analyzer.identify_sections(raw_text)
-        
-        # Get base analysis
-        base_analysis = self.resume_analyzer.analyze_resume(pdf_path, target_industry)
+        result = None
+        for result in self.iter_ats_score(pdf_path, job_description, target_industry, max_pages, profiler,
+                                          fuzzy, job_descriptions, document, semantic_match, shed):
+            pass
+        return result
+    
+    def iter_ats_score(self, pdf_path, job_description=None, target_industry=None, max_pages=None,
+                       profiler=None, fuzzy=False, job_descriptions=None, document=None,
+                       semantic_match=False, shed=frozenset()):
+        """Calculate the ATS score stage by stage, yielding a FactorUpdate as each factor settles.
+
+        Cheap structural checks run first and the spaCy pass last, so streaming callers
+        can show most factors before the slow stage starts. The final item is the
+        ATSResult (or an error dict when no text could be extracted).
+
+        shed names optional stages to skip under load (see quality.STAGES); the ones
+        that would otherwise have run are listed in the result's degraded_stages.
+        """
+        scores = FactorScores()
+        degraded_stages = []
+        
+        # 5. File format score, known before the file is even read
+        scores['file_format'] = self.file_format_score(pdf_path)
+        yield FactorUpdate('file_format', scores['file_format'], self.ats_factors['file_format'],
+                           self.file_format_recommendations(scores['file_format']))
+        
+        # Extract text and split sections once (unless the caller already did)
+        if document is None:
+            document = self.resume_analyzer.parse_document(pdf_path, max_pages=max_pages, profiler=profiler,
+                                                           shed=shed)
+        if document is None:
+            yield {"error": "Could not extract text from the file"}
+            return
+        if 'layout_scan' in shed and document.layout is None:
+            degraded_stages.append('layout_scan')
+        raw_text = document.raw_text
+        sections = document.sections
         
-        # Calculate individual factor scores
-        scores = {}
+        # 6. Contact info score
+        contact_info = self.analyze_contact_info(raw_text, document.features)
+        contact_score = 1.0 if contact_info['complete'] else 0.7 - (0.1 * len(contact_info['missing']))
+        scores['contact_info'] = max(0, contact_score)
+        yield FactorUpdate('contact_info', scores['contact_info'], self.ats_factors['contact_info'],
+                           self.contact_recommendations(contact_info), {'contact_info': contact_info})
         
-        # 1. Keyword match score
-        scores['keyword_match'] = self.calculate_keyword_match(raw_text, job_description, target_industry)
+        # 7. Education format score
+        education_text = sections.get('education', '')
+        education_check = self.check_education_format(education_text, document.features)
+        education_score = 1.0 if education_check['properly_formatted'] else 0.7 - (0.2 * len(education_check['issues']))
+        scores['education_format'] = max(0, education_score)
+        yield FactorUpdate('education_format', scores['education_format'], self.ats_factors['education_format'],
+                           self.education_recommendations(education_check))
         
         # 2. Format score
-        formatting_issues = self.detect_formatting_issues(raw_text)
+        with profile_stage(profiler, 'formatting_issues'):
+            formatting_issues = self.detect_formatting_issues(raw_text, layout=document.layout)
         format_score = 1.0 - (len(formatting_issues) / len(self.ats_unfriendly_elements))
         scores['format_score'] = max(0, format_score)  # Ensure non-negative
+        yield FactorUpdate('format_score', scores['format_score'], self.ats_factors['format_score'],
+                           self.formatting_recommendations(formatting_issues),
+                           {'formatting_issues': formatting_issues})
+        
+        # Optionally count misspelled skills ("kubernates") as matches, reported separately
+        fuzzy_matches = {}
+        if fuzzy and 'fuzzy_match' in shed:
+            degraded_stages.append('fuzzy_match')
+        elif fuzzy:
+            with profile_stage(profiler, 'fuzzy_match'):
+                fuzzy_matches = get_fuzzy_index().match(raw_text, exclude_ids=document.skill_ids)
+        fuzzy_ids = frozenset(fuzzy_matches)
+        
+        # 1. Keyword match score
+        with profile_stage(profiler, 'keyword_match'):
+            scores['keyword_match'] = self.calculate_keyword_match(raw_text, job_description, target_industry,
+                                                                   skill_ids=document.skill_ids,
+                                                                   fuzzy_ids=fuzzy_ids)
+        
+        # Paraphrase-tolerant similarity to the job description, reported next to the keyword match
+        semantic_similarity = None
+        if semantic_match and job_description and 'semantic_similarity' in shed:
+            degraded_stages.append('semantic_similarity')
+        elif semantic_match and job_description:
+            with profile_stage(profiler, 'semantic_similarity'):
+                semantic_similarity = semantic.get_encoder().similarity(raw_text, job_description)
+        
+        skill_ids = document.skill_ids | fuzzy_ids
+        yield FactorUpdate('keyword_match', scores['keyword_match'], self.ats_factors['keyword_match'],
+                           self.keyword_recommendations(scores['keyword_match'], target_industry, skill_ids,
+                                                        fuzzy_matches=list(fuzzy_matches.values())),
+                           {'fuzzy_matches': list(fuzzy_matches.values()), 'semantic_similarity': semantic_similarity})
+        
+        # Get base analysis (the spaCy pass, by far the slowest stage)
+        with profile_stage(profiler, 'analyze_resume'):
+            base_analysis = self.resume_analyzer.analyze_document(document, target_industry, profiler=profiler,
+                                                                  shed=shed)
+        if 'extract_entities' in shed:
+            degraded_stages.append('extract_entities')
         
         # 3. Word count score - penalize if too short or too long
         word_count = base_analysis['metrics']['word_count']
@@ -238,24 +326,16 @@ class ATSScoreAnalyzer:
             scores['word_count'] = max(0, scores['word_count'])  # Ensure non-negative
         else:
             scores['word_count'] = 1.0  # Optimal range
+        yield FactorUpdate('word_count', scores['word_count'], self.ats_factors['word_count'],
+                           self.content_recommendations(scores['word_count'], word_count),
+                           {'word_count': word_count})
             
         # 4. Action verbs score
         action_verb_count = base_analysis['metrics']['action_verbs']['count']
         scores['action_verbs'] = min(1.0, action_verb_count / 10)  # Cap at 10 action verbs
-        
-        # 5. File format score - binary PDF check
-        scores['file_format'] = 1.0 if self.check_file_format(pdf_path) else 0.5
-        
-        # 6. Contact info score
-        contact_info = self.analyze_contact_info(raw_text)
-        contact_score = 1.0 if contact_info['complete'] else 0.7 - (0.1 * len(contact_info['missing']))
-        scores['contact_info'] = max(0, contact_score)
-        
-        # 7. Education format score
-        education_text = sections.get('education', '')
-        education_check = self.check_education_format(education_text)
-        education_score = 1.0 if education_check['properly_formatted'] else 0.7 - (0.2 * len(education_check['issues']))
-        scores['education_format'] = max(0, education_score)
+        yield FactorUpdate('action_verbs', scores['action_verbs'], self.ats_factors['action_verbs'],
+                           self.action_verb_recommendations(scores['action_verbs']),
+                           {'action_verb_count': action_verb_count})
         
         # Calculate weighted score
         weighted_score = sum(scores[factor] * weight for factor, weight in self.ats_factors.items())
@@ -266,123 +346,194 @@ class ATSScoreAnalyzer:
         # Cap at 100%
         ats_score = min(100, ats_score)
         
+        # Rank any further job descriptions in one pass over the parsed resume
+        job_matches = []
+        if job_descriptions:
+            with profile_stage(profiler, 'rank_job_descriptions'):
+                job_matches = self.rank_job_descriptions(raw_text, job_descriptions, scores, fuzzy_ids)
+        
         # Generate recommendations
-        recommendations = self.generate_ats_recommendations(scores, formatting_issues, 
-                                                           contact_info, education_check, 
-                                                           base_analysis, target_industry)
+        with profile_stage(profiler, 'recommendations'):
+            recommendations = self.generate_ats_recommendations(scores, formatting_issues, 
+                                                               contact_info, education_check, 
+                                                               base_analysis, target_industry,
+                                                               skill_ids=skill_ids,
+                                                               fuzzy_matches=list(fuzzy_matches.values()))
+        
+        yield ATSResult(
+            ats_score=ats_score,
+            factor_scores=scores,
+            recommendations=recommendations,
+            formatting_issues=formatting_issues,
+            base_analysis=base_analysis,
+            fuzzy_matches=list(fuzzy_matches.values()),
+            job_matches=job_matches,
+            semantic_similarity=semantic_similarity,
+            contact_info=contact_info,
+            target_industry=target_industry,
+            missing_keywords=self.missing_industry_keywords(target_industry, skill_ids),
+            degraded_stages=degraded_stages
+        )
+    
+    def rank_job_descriptions(self, text, job_descriptions, scores, fuzzy_ids=frozenset(), limit=None):
+        """Score the resume against many job descriptions at once, best match first"""
+        if not isinstance(job_descriptions, JobDescriptionMatrix):
+            job_descriptions = JobDescriptionMatrix(job_descriptions)
+        resume_ids = get_skill_index().keyword_ids(text) | fuzzy_ids
         
-        return {
-            'ats_score': ats_score,
-            'factor_scores': scores,
-            'recommendations': recommendations,
-            'formatting_issues': formatting_issues,
-            'base_analysis': base_analysis
-        }
+        # Only the keyword factor depends on the job description
+        weight = self.ats_factors['keyword_match']
+        base_score = sum(scores[factor] * w for factor, w in self.ats_factors.items() if factor != 'keyword_match')
+        return job_descriptions.rank(resume_ids, base_score, weight, limit=limit)
         
     def generate_ats_recommendations(self, scores, formatting_issues, contact_info, 
-                                    education_check, base_analysis, target_industry):
+                                    education_check, base_analysis, target_industry, skill_ids=None,
+                                    fuzzy_matches=None):
         """Generate specific recommendations to improve ATS compatibility"""
-        recommendations = []
+        recommendations = (
+            self.keyword_recommendations(scores['keyword_match'], target_industry, skill_ids, base_analysis,
+                                         fuzzy_matches)
+            + self.formatting_recommendations(formatting_issues)
+            + self.content_recommendations(scores['word_count'], base_analysis['metrics']['word_count'])
+            + self.action_verb_recommendations(scores['action_verbs'])
+            + self.file_format_recommendations(scores['file_format'])
+            + self.contact_recommendations(contact_info)
+            + self.education_recommendations(education_check)
+            + self.structure_recommendations(base_analysis)
+        )
         
-        # 1. Keyword recommendations
-        if scores['keyword_match'] < 0.6:
+        # Sort by priority
+        priority_order = {'High': 0, 'Medium': 1, 'Low': 2}
+        recommendations.sort(key=lambda x: priority_order[x.priority])
+        
+        return recommendations
+    
+    def keyword_recommendations(self, score, target_industry, skill_ids=None, base_analysis=None,
+                                fuzzy_matches=None):
+        """1. Keyword recommendations"""
+        recommendations = []
+        if score < 0.6:
             if target_industry and target_industry in self.common_ats_keywords:
-                missing_keywords = [kw for kw in self.common_ats_keywords[target_industry] 
-                                   if kw not in ' '.join(base_analysis['industry_keywords'].get(target_industry, []))]
+                if skill_ids is None:
+                    found = base_analysis['industry_keywords'].get(target_industry, [])
+                    skill_ids = {get_skill_index().taxonomy.lookup(kw) for kw in found}
+                missing_keywords = self.missing_industry_keywords(target_industry, skill_ids)
                 if missing_keywords:
                     top_missing = missing_keywords[:5]
-                    recommendations.append({
-                        'category': 'Keywords',
-                        'recommendation': f"Add more industry-specific keywords such as: {', '.join(top_missing)}",
-                        'priority': 'High'
-                    })
+                    recommendations.append(Recommendation(
+                        category='Keywords',
+                        recommendation=f"Add more industry-specific keywords such as: {', '.join(top_missing)}",
+                        priority='High'
+                    ))
             else:
-                recommendations.append({
-                    'category': 'Keywords',
-                    'recommendation': "Add more relevant keywords from the job description to increase your match rate.",
-                    'priority': 'High'
-                })
-        
-        # 2. Formatting recommendations
-        if formatting_issues:
-            for issue in formatting_issues:
-                recommendations.append({
-                    'category': 'Formatting',
-                    'recommendation': f"Remove {issue} from your resume as they can confuse ATS systems.",
-                    'priority': 'High' if issue in ['tables', 'columns', 'text boxes'] else 'Medium'
-                })
-        
-        # 3. Word count recommendations
-        if scores['word_count'] < 0.7:
-            if base_analysis['metrics']['word_count'] < 300:
-                recommendations.append({
-                    'category': 'Content',
-                    'recommendation': "Your resume is too short. Add more relevant details about your experience and achievements.",
-                    'priority': 'Medium'
-                })
-            elif base_analysis['metrics']['word_count'] > 1000:
-                recommendations.append({
-                    'category': 'Content',
-                    'recommendation': "Your resume is too long. Trim it down to 1-2 pages focusing on the most relevant information.",
-                    'priority': 'Medium'
-                })
-        
-        # 4. Action verb recommendations
-        if scores['action_verbs'] < 0.5:
-            recommendations.append({
-                'category': 'Language',
-                'recommendation': "Use more strong action verbs like 'achieved', 'implemented', 'developed' to describe your accomplishments.",
-                'priority': 'Medium'
-            })
-        
-        # 5. File format recommendations
-        if scores['file_format'] < 1.0:
-            recommendations.append({
-                'category': 'File Format',
-                'recommendation': "Save your resume as a PDF to ensure consistent formatting when parsed by ATS.",
-                'priority': 'High'
-            })
-        
-        # 6. Contact info recommendations
+                recommendations.append(Recommendation(
+                    category='Keywords',
+                    recommendation="Add more relevant keywords from the job description to increase your match rate.",
+                    priority='High'
+                ))
+        
+        # Misspelled skills only matched fuzzily; a real ATS would miss them
+        if fuzzy_matches:
+            corrections = ', '.join(f"'{m.found}' -> '{m.term}'" for m in fuzzy_matches[:5])
+            recommendations.append(Recommendation(
+                category='Keywords',
+                recommendation=f"Fix the spelling of these skills so ATS keyword filters find them: {corrections}",
+                priority='High'
+            ))
+        return recommendations
+    
+    def missing_industry_keywords(self, target_industry, skill_ids):
+        """ATS keywords of the target industry that the resume does not mention"""
+        if not target_industry or target_industry not in self.common_ats_keywords:
+            return []
+        index = get_skill_index()
+        return [index.term(skill_id) for skill_id in index.taxonomy.industry_term_ids(target_industry, 'ats')
+                if skill_id not in skill_ids]
+    
+    def formatting_recommendations(self, formatting_issues):
+        """2. Formatting recommendations"""
+        return [Recommendation(
+            category='Formatting',
+            recommendation=f"Remove {issue} from your resume as they can confuse ATS systems.",
+            priority='High' if issue in ['tables', 'columns', 'text boxes'] else 'Medium'
+        ) for issue in formatting_issues]
+    
+    def content_recommendations(self, score, word_count):
+        """3. Word count recommendations"""
+        if score < 0.7:
+            if word_count < 300:
+                return [Recommendation(
+                    category='Content',
+                    recommendation="Your resume is too short. Add more relevant details about your experience and achievements.",
+                    priority='Medium'
+                )]
+            elif word_count > 1000:
+                return [Recommendation(
+                    category='Content',
+                    recommendation="Your resume is too long. Trim it down to 1-2 pages focusing on the most relevant information.",
+                    priority='Medium'
+                )]
+        return []
+    
+    def action_verb_recommendations(self, score):
+        """4. Action verb recommendations"""
+        if score < 0.5:
+            return [Recommendation(
+                category='Language',
+                recommendation="Use more strong action verbs like 'achieved', 'implemented', 'developed' to describe your accomplishments.",
+                priority='Medium'
+            )]
+        return []
+    
+    def file_format_recommendations(self, score):
+        """5. File format recommendations"""
+        if score < 1.0:
+            return [Recommendation(
+                category='File Format',
+                recommendation="Save your resume as a PDF or DOCX to ensure consistent formatting when parsed by ATS.",
+                priority='High'
+            )]
+        return []
+    
+    def contact_recommendations(self, contact_info):
+        """6. Contact info recommendations"""
         if not contact_info['complete']:
             missing = ', '.join(contact_info['missing'])
-            recommendations.append({
-                'category': 'Contact Information',
-                'recommendation': f"Add missing contact information: {missing}.",
-                'priority': 'High'
-            })
-        
-        # 7. Education recommendations
+            return [Recommendation(
+                category='Contact Information',
+                recommendation=f"Add missing contact information: {missing}.",
+                priority='High'
+            )]
+        return []
+    
+    def education_recommendations(self, education_check):
+        """7. Education recommendations"""
         if not education_check['properly_formatted']:
-            for issue in education_check['issues']:
-                recommendations.append({
-                    'category': 'Education',
-                    'recommendation': f"Fix education section: {issue}.",
-                    'priority': 'Medium'
-                })
-        
-        # 8. Section recommendations
+            return [Recommendation(
+                category='Education',
+                recommendation=f"Fix education section: {issue}.",
+                priority='Medium'
+            ) for issue in education_check['issues']]
+        return []
+    
+    def structure_recommendations(self, base_analysis):
+        """8. Section recommendations, then 9. general ATS recommendations"""
+        recommendations = []
         missing_sections = [section for section, data in base_analysis['metrics']['sections'].items() 
                           if not data['present'] and section in ['experience', 'education', 'skills']]
         if missing_sections:
             for section in missing_sections:
-                recommendations.append({
-                    'category': 'Structure',
-                    'recommendation': f"Add a {section.replace('_', ' ').title()} section - this is a standard section expected by ATS.",
-                    'priority': 'High'
-                })
-        
-        # 9. General ATS recommendations
-        recommendations.append({
-            'category': 'ATS Optimization',
-            'recommendation': "Use a simple, clean layout with standard section headings like 'Experience', 'Education', and 'Skills'.",
-            'priority': 'Medium'
-        })
-        
-        # Sort by priority
-        priority_order = {'High': 0, 'Medium': 1, 'Low': 2}
-        recommendations.sort(key=lambda x: priority_order[x['priority']])
-        
+                recommendations.append(Recommendation(
+                    category='Structure',
+                    recommendation=f"Add a {section.replace('_', ' ').title()} section - this is a standard section expected by ATS.",
+                    priority='High'
+                ))
+        
+        recommendations.append(Recommendation(
+            category='ATS Optimization',
+            recommendation="Use a simple, clean layout with standard section headings like 'Experience', 'Education', and 'Skills'.",
+            priority='Medium'
+        ))
         return recommendations
 
 # Example usage if this file is run directly
@@ -0,0 +1,124 @@
+# batch_analyze.py
+import os
+import time
+import argparse
+
+import serializers
+from ats_analyzer import ATSScoreAnalyzer
+from pdf_preflight import PDFPreflight
+import document_formats
+from near_duplicates import NearDuplicateIndex
+from feature_store import FeatureStore
+from result_cache import file_sha256
+import cohort_analytics
+from request_profile import RequestProfiler, profiling
+
+
+def find_resumes(directory):
+    """List the PDF, DOCX and text files in a directory, sorted for reproducible output"""
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if document_formats.file_type(name)
+    )
+
+
+def analyze_batch(paths, job_description=None, target_industry=None, fuzzy=False, dedup=False,
+                  profile_dir=None, profile_format='pstats', feature_dir=None, tags=None):
+    """Analyze many resumes with a single analyzer instance, optionally profiling each one"""
+    analyzer = ATSScoreAnalyzer()
+    preflight = PDFPreflight()
+    # Within-batch index: near-duplicates are flagged against earlier files of the same run
+    dedup_index = NearDuplicateIndex(':memory:') if dedup else None
+    # Factor scores kept for re-weighting the batch later (feature_store.py rescore)
+    features = FeatureStore(feature_dir) if feature_dir else None
+    # Tagged batches are folded into the shared cohort analytics (see /analytics?tag=)
+    analytics = cohort_analytics.get_analytics() if tags else None
+    results = []
+
+    for path in paths:
+        entry = {'file': os.path.basename(path)}
+        if document_formats.file_type(path) == 'pdf':
+            preflight_result, _ = preflight.check(path)
+        else:
+            preflight_result = document_formats.preflight(path)
+        if not preflight_result['ok']:
+            entry.update({'error': preflight_result['error'], 'code': preflight_result['error_code']})
+            results.append(entry)
+            continue
+
+        profiler = RequestProfiler(profile_format) if profile_dir else None
+        with profiling(profiler):
+            document = analyzer.resume_analyzer.parse_document(path, max_pages=preflight_result['max_pages'])
+        if document is None:
+            entry['error'] = "Could not extract text from the file"
+            results.append(entry)
+            continue
+
+        if dedup_index is not None:
+            signature = dedup_index.signature(document.processed_text)
+            matches = dedup_index.query(signature)
+            if matches:
+                entry['near_duplicate'] = {'file': dedup_index.label(matches[0][0]),
+                                           'similarity': round(matches[0][1], 3)}
+            dedup_index.add(signature, label=entry['file'], duplicate_of=matches[0][0] if matches else None)
+
+        with profiling(profiler):
+            ats_result = analyzer.calculate_ats_score(
+                path,
+                job_description=job_description,
+                target_industry=target_industry,
+                max_pages=preflight_result['max_pages'],
+                fuzzy=fuzzy,
+                document=document
+            )
+        if profiler:
+            entry['profile'] = profiler.save(entry['file'], profile_dir)
+        if 'error' in ats_result:
+            entry['error'] = ats_result['error']
+        else:
+            entry['result'] = serializers.build_api_response(ats_result, preflight_result['warnings'])
+            file_hash = file_sha256(path) if features is not None or analytics is not None else None
+            if features is not None:
+                features.append(entry['file'], ats_result, file_hash)
+            if analytics is not None:
+                analytics.record(ats_result, tags, file_hash)
+        results.append(entry)
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze a directory of resumes")
+    parser.add_argument('directory', help="Directory containing PDF, DOCX or text resumes")
+    parser.add_argument('-o', '--output', required=True, help="Output file")
+    parser.add_argument('--format', choices=['json', 'msgpack'], default='json')
+    parser.add_argument('--industry', default=None, help="Target industry")
+    parser.add_argument('--job-description', default=None, help="Path to a job description text file")
+    parser.add_argument('--fuzzy', action='store_true', help="Count misspelled skills as fuzzy matches")
+    parser.add_argument('--near-duplicates', action='store_true', help="Flag resumes that copy an earlier file")
+    parser.add_argument('--profile', metavar='DIR', default=None, help="Save a profile of each resume's analysis")
+    parser.add_argument('--profile-format', choices=['pstats', 'collapsed'], default='pstats')
+    parser.add_argument('--tag', default=None, help="Record the batch in cohort analytics under these tags")
+    parser.add_argument('--feature-store', metavar='DIR', default=None,
+                        help="Append each resume's factor scores to a feature store for re-weighting")
+    args = parser.parse_args()
+
+    job_description = None
+    if args.job_description:
+        with open(args.job_description) as f:
+            job_description = f.read()
+
+    start = time.perf_counter()
+    results = analyze_batch(find_resumes(args.directory), job_description, args.industry, args.fuzzy,
+                            args.near_duplicates, args.profile, args.profile_format, args.feature_store,
+                            cohort_analytics.parse_tags(args.tag))
+    analyzed = time.perf_counter()
+
+    mimetype = serializers.MSGPACK_MIMETYPES[0] if args.format == 'msgpack' else serializers.JSON_MIMETYPE
+    if args.format == 'msgpack' and serializers.msgpack is None:
+        parser.error("msgpack output requires the msgpack package")
+    with open(args.output, 'wb') as f:
+        f.write(serializers.dumps(results, mimetype))
+
+    print(f"Analyzed {len(results)} resume(s) in {analyzed - start:.2f}s, "
+          f"serialized in {(time.perf_counter() - analyzed) * 1000:.1f}ms -> {args.output}")
@@ -0,0 +1,201 @@
+# benchmarks.py
+import time
+import tempfile
+import argparse
+import statistics
+
+from synthetic_corpus import build_corpus
+
+
+def _time_call(func, *args, repeat=5, **kwargs):
+    """Return the median wall time of a call in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def bench_preflight(args):
+    """Compare pre-flight inspection cost with full text extraction"""
+    from pdf_preflight import PDFPreflight
+    from resume_analyzer import ResumeAnalyzer
+
+    preflight = PDFPreflight()
+    analyzer = ResumeAnalyzer()
+
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        corpus = build_corpus(corpus_dir, args.pages, per_size=1)
+        print(f"{'pages':>6} {'preflight ms':>13} {'extract ms':>11} {'ratio':>7}")
+        for pages, paths in corpus.items():
+            preflight_ms = _time_call(preflight.inspect, paths[0], repeat=args.repeat)
+            extract_ms = _time_call(analyzer.extract_text_from_pdf, paths[0], repeat=args.repeat)
+            print(f"{pages:>6} {preflight_ms:>13.2f} {extract_ms:>11.2f} {preflight_ms / extract_ms:>7.1%}")
+
+
+def bench_fuzzy(args):
+    """Measure the per-resume cost of fuzzy skill matching, cold and with a warm lookup cache"""
+    import random
+    from fuzzy_matcher import FuzzyIndex
+    from skill_index import get_skill_index
+    from synthetic_corpus import generate_resume_lines
+
+    start = time.perf_counter()
+    index = FuzzyIndex(get_skill_index())
+    print(f"index build: {(time.perf_counter() - start) * 1000:.2f}ms, {len(index.deletes)} deletion keys")
+
+    # Inject a few typos ("kubernetes" -> "kubernates") into each synthetic resume
+    rng = random.Random(0)
+    texts = []
+    for seed in range(args.repeat * 10):
+        text = '\n'.join(generate_resume_lines(seed=seed, pages=max(args.pages[0], 1)))
+        words = text.split()
+        for _ in range(5):
+            i = rng.randrange(len(words))
+            if len(words[i]) > 6:
+                j = rng.randrange(1, len(words[i]) - 1)
+                words[i] = words[i][:j] + words[i][j + 1:]
+        texts.append(' '.join(words))
+
+    cold = [_time_call(FuzzyIndex(index.skill_index).match, text, repeat=1) for text in texts[:args.repeat]]
+    warm = [_time_call(index.match, text, repeat=1) for text in texts]
+    print(f"per resume: cold cache {statistics.median(cold):.2f}ms, warm cache {statistics.median(warm):.2f}ms")
+    print(f"example: {[(m.found, m.term) for m in index.match('kubernates tensorflw javscript').values()]}")
+
+
+def _synthetic_job_descriptions(count, seed=0):
+    """Job postings mixing taxonomy skills with generic requirement text"""
+    import random
+    from keyword_taxonomy import get_taxonomy
+
+    rng = random.Random(seed)
+    taxonomy = get_taxonomy()
+    skills = [taxonomy.term(i) for i in range(taxonomy.term_count)]
+    filler = ("We are looking for a motivated engineer to join our growing team. You will collaborate with "
+              "product managers, designers and stakeholders to deliver reliable features. Requirements include "
+              "strong communication skills, ownership, attention to detail and experience with").split()
+    postings = []
+    for _ in range(count):
+        words = rng.sample(filler, 25) + rng.sample(skills, min(15, len(skills)))
+        rng.shuffle(words)
+        postings.append(' '.join(words))
+    return postings
+
+
+def bench_multi_jd(args):
+    """Rank one resume against many job descriptions: matrix pass versus one match call per posting"""
+    from ats_analyzer import ATSScoreAnalyzer
+    from job_matcher import JobDescriptionMatrix
+    from results import FactorScores
+    from synthetic_corpus import generate_resume_lines
+
+    analyzer = ATSScoreAnalyzer()
+    resume_text = '\n'.join(generate_resume_lines(seed=0, pages=max(args.pages[0], 1)))
+    postings = _synthetic_job_descriptions(args.jobs)
+    scores = FactorScores(format_score=1.0, word_count=1.0, action_verbs=1.0, file_format=1.0)
+
+    build_ms = _time_call(JobDescriptionMatrix, postings, repeat=args.repeat)
+    matrix = JobDescriptionMatrix(postings)
+    rank_ms = _time_call(analyzer.rank_job_descriptions, resume_text, matrix, scores, repeat=args.repeat)
+    total_ms = _time_call(analyzer.rank_job_descriptions, resume_text, postings, scores, repeat=args.repeat)
+    loop_ms = _time_call(lambda: [analyzer.calculate_keyword_match(resume_text, p) for p in postings], repeat=1)
+
+    print(f"{len(postings)} job descriptions, {len(matrix.terms)} distinct keywords, {len(matrix.indices)} entries")
+    print(f"matrix build {build_ms:.1f}ms, rank {rank_ms:.1f}ms, build + rank {total_ms:.1f}ms")
+    print(f"one calculate_keyword_match per posting: {loop_ms:.1f}ms")
+    best = analyzer.rank_job_descriptions(resume_text, matrix, scores, limit=1)[0]
+    print(f"best: #{best.job_id} match={best.keyword_match:.2f} score={best.ats_score} missing={best.missing_keywords[:5]}")
+
+
+def bench_formats(args):
+    """Extraction cost of the same resume as PDF, DOCX and plain text"""
+    import os
+    import document_formats
+    from resume_analyzer import ResumeAnalyzer
+    from synthetic_corpus import generate_resume_lines, write_pdf, write_docx
+
+    analyzer = ResumeAnalyzer()
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        print(f"{'pages':>6} {'pdf ms':>9} {'docx ms':>9} {'txt ms':>9} {'pdf/docx':>9}")
+        for pages in args.pages:
+            lines = generate_resume_lines(seed=pages, pages=pages)
+            pdf_path = write_pdf(lines, os.path.join(corpus_dir, f'resume_{pages}p.pdf'))
+            docx_path = write_docx(lines, os.path.join(corpus_dir, f'resume_{pages}p.docx'))
+            txt_path = os.path.join(corpus_dir, f'resume_{pages}p.txt')
+            with open(txt_path, 'w') as f:
+                f.write('\n'.join(lines))
+
+            pdf_ms = _time_call(analyzer.extract_text_from_pdf, pdf_path, repeat=args.repeat)
+            docx_ms = _time_call(document_formats.extract, docx_path, repeat=args.repeat)
+            txt_ms = _time_call(document_formats.extract, txt_path, repeat=args.repeat)
+            print(f"{pages:>6} {pdf_ms:>9.2f} {docx_ms:>9.2f} {txt_ms:>9.2f} {pdf_ms / docx_ms:>8.1f}x")
+
+
+def _legacy_checks(text, sections):
+    """The per-check regex searches the feature scanner replaced, for comparison"""
+    import re
+    education = sections.get('education', '')
+    return (
+        bool(re.search(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', text)),
+        bool(re.search(r'(\+\d{1,3}\s?)?(\()?\d{3}(\))?[\s.-]?\d{3}[\s.-]?\d{4}', text)),
+        bool(re.search(r'linkedin\.com|linkedin', text.lower())),
+        bool(re.search(r'\b(bachelor|master|phd|doctor|mba|bs|ba|ms|ma|btech|mtech)\b', education.lower())),
+        bool(re.search(r'\b20\d{2}\b', education)),
+        bool(re.search(r'\b(university|college|institute|school)\b', education.lower())),
+        bool(re.search(r'\d{4}', sections.get('experience', '').lower())),
+    )
+
+
+def _scanned_checks(features):
+    education = features.sections.get('education', {})
+    return (
+        'email' in features.matches,
+        'phone' in features.matches,
+        'linkedin' in features.matches,
+        'degree' in education,
+        any(year.startswith('20') for year in education.get('year', ())),
+        'institution' in education,
+        'digits' in features.sections.get('experience', {}),
+    )
+
+
+def bench_scanner(args):
+    """Contact, date and education checks: one scanner pass versus a regex search per check"""
+    from feature_scanner import scan
+    from resume_analyzer import ResumeAnalyzer
+    from synthetic_corpus import generate_resume_lines
+
+    analyzer = ResumeAnalyzer()
+    # No address anywhere and one long dotted token: the searches can't stop early and
+    # the email pattern retries the token from each of its characters
+    adversarial = 'ref ' + 'a.' * 5000
+    print(f"{'pages':>9} {'regex ms':>9} {'scan ms':>9} {'speedup':>8}  same")
+    for pages in args.pages:
+        lines = generate_resume_lines(seed=pages, pages=pages)
+        for label, text in ((str(pages), '\n'.join(lines)),
+                            (f'{pages}+adv', '\n'.join(lines + [adversarial]).replace('@', ' at '))):
+            spans = {}
+            sections = analyzer.identify_sections(text, spans)
+            legacy_ms = _time_call(_legacy_checks, text, sections, repeat=args.repeat)
+            scan_ms = _time_call(scan, text, spans, repeat=args.repeat)
+            same = _legacy_checks(text, sections) == _scanned_checks(scan(text, spans))
+            print(f"{label:>9} {legacy_ms:>9.2f} {scan_ms:>9.2f} {legacy_ms / scan_ms:>7.1f}x  {same}")
+
+
+BENCHMARKS = {
+    'preflight': bench_preflight,
+    'fuzzy': bench_fuzzy,
+    'multi-jd': bench_multi_jd,
+    'formats': bench_formats,
+    'scanner': bench_scanner,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the analysis pipeline")
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 5, 50, 300])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--jobs', type=int, default=1000, help="Job descriptions for multi-jd")
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
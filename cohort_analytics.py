@@ -0,0 +1,235 @@
+# cohort_analytics.py
+import os
+import re
+import time
+import sqlite3
+import argparse
+import threading
+
+DB_PATH = os.environ.get('ANALYTICS_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data',
+                                                        'cohort_analytics.sqlite3'))
+# Fold every analysis into running per-cohort aggregates
+ENABLED = os.environ.get('ANALYTICS_ENABLED', '1') == '1'
+
+# Every result also counts towards this cohort, so the whole population can be queried
+ALL = '*'
+# ats_score histogram bin width
+SCORE_BIN = 5
+# Open-ended key sets (missing keywords) keep their most frequent keys only: a
+# lossy top-k sketch that bounds storage and query cost whatever the cohort size
+MAX_KEYS = 500
+PRUNE_INTERVAL = 200
+# A file counts once per cohort: resubmitting it (or probing it by hash) adds nothing.
+# Which files a cohort has seen is remembered for this long
+SEEN_DAYS = float(os.environ.get('ANALYTICS_SEEN_DAYS', 365))
+# Upload tags: up to MAX_TAGS per resume, short and URL-safe
+MAX_TAGS = 5
+TAG_PATTERN = re.compile(r'^[A-Za-z0-9_.:-]{1,64}$')
+
+
+def parse_tags(value):
+    """'drive-2024, cse' -> ['drive-2024', 'cse']; raises ValueError for malformed tags"""
+    tags = [tag.strip() for tag in (value or '').split(',') if tag.strip()]
+    if len(tags) > MAX_TAGS:
+        raise ValueError(f"At most {MAX_TAGS} tags are allowed per upload")
+    for tag in tags:
+        if not TAG_PATTERN.match(tag) or tag == ALL:
+            raise ValueError(f"Invalid tag '{tag}': use letters, digits, '_', '.', ':' or '-'")
+    return tags
+
+
+def result_counts(ats_result):
+    """The (metric, key) pairs one analysis adds to its cohorts' counters"""
+    score_bin = min(ats_result.ats_score // SCORE_BIN * SCORE_BIN, 100)
+    counts = [('ats_score', str(score_bin))]
+    counts += [('formatting_issue', issue) for issue in ats_result.formatting_issues]
+    counts += [('section', section) for section in ats_result.base_analysis.sections_found]
+    if ats_result.target_industry:
+        counts.append(('industry', ats_result.target_industry))
+        counts += [(f'missing_keyword:{ats_result.target_industry}', keyword)
+                   for keyword in ats_result.missing_keywords]
+    return counts
+
+
+class CohortAnalytics:
+    """Per-cohort counters, score histograms and top-k keyword tallies in a local SQLite file.
+
+    Each analysis adds to a handful of counter rows when it finishes, so a query only
+    reads the rows of its cohort, bounded by the number of distinct keys and
+    independent of how many resumes the cohort holds.
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._records = 0
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect()
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript('''
+                CREATE TABLE IF NOT EXISTS cohorts (
+                    cohort TEXT PRIMARY KEY,
+                    resumes INTEGER NOT NULL,
+                    score_sum REAL NOT NULL,
+                    updated REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS counts (
+                    cohort TEXT NOT NULL,
+                    metric TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value INTEGER NOT NULL,
+                    PRIMARY KEY (cohort, metric, key)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS counts_by_value ON counts (cohort, metric, value);
+                CREATE TABLE IF NOT EXISTS seen (
+                    file_hash TEXT NOT NULL,
+                    cohort TEXT NOT NULL,
+                    seen REAL NOT NULL,
+                    PRIMARY KEY (file_hash, cohort)
+                ) WITHOUT ROWID;
+            ''')
+            self._local.connection = connection
+        return connection
+
+    def record(self, ats_result, tags=(), file_hash=None):
+        """Fold one finished analysis into the aggregates of its tags and of the whole population.
+
+        With a file_hash, cohorts that already counted the file are skipped.
+        """
+        self.record_counts(ats_result.ats_score, result_counts(ats_result), tags, file_hash)
+
+    def record_counts(self, ats_score, counts, tags=(), file_hash=None):
+        """Same as record, from an ats_score and result_counts kept with a cached result"""
+        cohorts = [ALL] + list(tags)
+        connection = self._connect()
+        with connection:
+            if file_hash is not None:
+                now = time.time()
+                cohorts = [cohort for cohort in cohorts if connection.execute(
+                    'INSERT OR IGNORE INTO seen (file_hash, cohort, seen) VALUES (?, ?, ?)',
+                    (file_hash, cohort, now)
+                ).rowcount]
+                if not cohorts:
+                    return
+            connection.executemany(
+                'INSERT INTO cohorts (cohort, resumes, score_sum, updated) VALUES (?, 1, ?, ?) '
+                'ON CONFLICT (cohort) DO UPDATE SET resumes = resumes + 1, '
+                'score_sum = score_sum + excluded.score_sum, updated = excluded.updated',
+                [(cohort, ats_score, time.time()) for cohort in cohorts]
+            )
+            connection.executemany(
+                'INSERT INTO counts (cohort, metric, key, value) VALUES (?, ?, ?, 1) '
+                'ON CONFLICT (cohort, metric, key) DO UPDATE SET value = value + 1',
+                [(cohort, metric, key) for cohort in cohorts for metric, key in counts]
+            )
+        self._records += 1
+        if self._records % PRUNE_INTERVAL == 0:
+            self.prune()
+
+    def prune(self, max_keys=MAX_KEYS):
+        """Drop the rarest keys of open-ended metrics beyond max_keys per cohort, and old seen files"""
+        connection = self._connect()
+        with connection:
+            connection.execute('DELETE FROM seen WHERE seen < ?', (time.time() - SEEN_DAYS * 86400,))
+            groups = connection.execute(
+                "SELECT cohort, metric FROM counts WHERE metric LIKE 'missing_keyword:%' "
+                'GROUP BY cohort, metric HAVING COUNT(*) > ?', (max_keys,)
+            ).fetchall()
+            for cohort, metric in groups:
+                connection.execute(
+                    'DELETE FROM counts WHERE cohort = ? AND metric = ? AND key NOT IN '
+                    '(SELECT key FROM counts WHERE cohort = ? AND metric = ? ORDER BY value DESC LIMIT ?)',
+                    (cohort, metric, cohort, metric, max_keys)
+                )
+
+    def _top(self, cohort, metric, k):
+        return self._connect().execute(
+            'SELECT key, value FROM counts WHERE cohort = ? AND metric = ? ORDER BY value DESC, key LIMIT ?',
+            (cohort, metric, k)
+        ).fetchall()
+
+    def query(self, cohort=ALL, k=10):
+        """Aggregates for one cohort, or None if nothing has been recorded under it"""
+        connection = self._connect()
+        row = connection.execute('SELECT resumes, score_sum, updated FROM cohorts WHERE cohort = ?',
+                                 (cohort,)).fetchone()
+        if row is None:
+            return None
+        resumes, score_sum, updated = row
+
+        histogram = dict(connection.execute(
+            "SELECT key, value FROM counts WHERE cohort = ? AND metric = 'ats_score'", (cohort,)
+        ).fetchall())
+        bins = [{'from': low, 'to': min(low + SCORE_BIN - 1, 100), 'count': histogram.get(str(low), 0)}
+                for low in range(0, 101, SCORE_BIN)]
+        median = None
+        seen = 0
+        for entry in bins:
+            seen += entry['count']
+            if seen * 2 >= resumes:
+                median = entry['from']
+                break
+
+        sections = connection.execute(
+            "SELECT key, value FROM counts WHERE cohort = ? AND metric = 'section' ORDER BY key", (cohort,)
+        ).fetchall()
+        return {
+            'cohort': cohort,
+            'resumes': resumes,
+            'updated': updated,
+            'atsScore': {
+                'mean': round(score_sum / resumes, 2),
+                'medianBin': median,
+                'histogram': bins
+            },
+            'formattingIssues': [{'issue': issue, 'count': count, 'rate': round(count / resumes, 4)}
+                                 for issue, count in self._top(cohort, 'formatting_issue', k)],
+            'sectionCoverage': {section: round(count / resumes, 4) for section, count in sections},
+            'missingKeywords': {
+                industry: [{'keyword': keyword, 'count': count, 'rate': round(count / total, 4)}
+                           for keyword, count in self._top(cohort, f'missing_keyword:{industry}', k)]
+                for industry, total in self._top(cohort, 'industry', 50)
+            }
+        }
+
+    def cohorts(self):
+        return [{'cohort': cohort, 'resumes': resumes} for cohort, resumes in self._connect().execute(
+            'SELECT cohort, resumes FROM cohorts ORDER BY cohort').fetchall()]
+
+
+_lock = threading.Lock()
+_analytics = None
+
+
+def get_analytics():
+    """Process-wide aggregates on DB_PATH, opened on first use"""
+    global _analytics
+    if _analytics is None:
+        with _lock:
+            if _analytics is None:
+                _analytics = CohortAnalytics()
+    return _analytics
+
+
+if __name__ == "__main__":
+    import json
+
+    parser = argparse.ArgumentParser(description="Query cohort analytics")
+    parser.add_argument('command', choices=['cohorts', 'show'])
+    parser.add_argument('--tag', default=ALL, help="Cohort tag (default: everything)")
+    parser.add_argument('-k', type=int, default=10, help="Entries in each top list")
+    args = parser.parse_args()
+
+    analytics = get_analytics()
+    if args.command == 'cohorts':
+        for entry in analytics.cohorts():
+            print(f"{entry['resumes']:>8}  {entry['cohort']}")
+    else:
+        print(json.dumps(analytics.query(args.tag, args.k), indent=2))
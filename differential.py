@@ -0,0 +1,283 @@
+# differential.py
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import importlib
+import tempfile
+import statistics
+from collections import Counter
+
+from synthetic_corpus import generate_resume_lines, write_pdf, write_docx
+
+# Discrepancies kept per engine as examples in the report
+MAX_EXAMPLES = 20
+# Frozen reference: outcomes of the analyzer recorded once for a fixed corpus, so drift in
+# the analyzer itself shows up as a 'reference' discrepancy instead of moving the baseline
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'differential_reference.json')
+GOLDEN_CASES = 100
+GOLDEN_SEED = 0
+
+JOB_DESCRIPTIONS = [
+    "Backend engineer with Python, SQL, Docker and AWS experience, comfortable with REST APIs and CI/CD",
+    "Data analyst skilled in Excel, SQL, pandas and dashboards, with strong communication skills",
+    "Frontend developer: JavaScript, React, Node.js, Git and agile delivery in a Scrum team",
+    "Marketing associate with SEO, Google Analytics, social media campaigns and conversion rate optimization",
+]
+
+
+def build_cases(directory, count, seed=0):
+    """Write `count` synthetic resumes (PDF, DOCX and text of the same lines) with varied options"""
+    import keyword_taxonomy
+
+    rng = random.Random(seed)
+    industries = list(keyword_taxonomy.get_taxonomy().industries)
+    cases = []
+    for i in range(count):
+        case_seed = seed * 100000 + i
+        pages = rng.choice((1, 1, 1, 2, 4))
+        lines = generate_resume_lines(seed=case_seed, pages=pages)
+        layout = rng.choice(('plain', 'plain', 'columns', 'header', 'photo'))
+        base = os.path.join(directory, f'case-{i:04d}')
+        write_pdf(lines, base + '.pdf', columns=2 if layout == 'columns' else 1,
+                  header=lines[0] if layout == 'header' else None, photo=layout == 'photo')
+        write_docx(lines, base + '.docx')
+        with open(base + '.txt', 'w') as f:
+            f.write('\n'.join(lines))
+
+        options = {}
+        kind = i % 4
+        if kind == 1:
+            options['target_industry'] = rng.choice(industries)
+        elif kind == 2:
+            options['job_description'] = rng.choice(JOB_DESCRIPTIONS)
+        elif kind == 3:
+            options.update(target_industry=rng.choice(industries), fuzzy=True)
+        cases.append({'id': f'case-{i:04d}', 'pdf': base + '.pdf', 'docx': base + '.docx', 'txt': base + '.txt',
+                      'pages': pages, 'layout': layout, 'options': options})
+    return cases
+
+
+def outcome(result):
+    """ats_score, factor_scores and recommendations of an ATSResult as plain JSON-ready values"""
+    if result is None or 'error' in result:
+        return {'error': (result or {}).get('error', 'no result')}
+    return {
+        'ats_score': result.ats_score,
+        'factor_scores': dict(result.factor_scores.items()),
+        'recommendations': sorted(f"{rec.priority}|{rec.category}|{rec.recommendation}"
+                                  for rec in result.recommendations)
+    }
+
+
+def environment():
+    """Library and model versions outcomes depend on; a golden file only applies where they match"""
+    import nltk
+    import spacy
+    import PyPDF2
+    from resume_analyzer import nlp
+    return {
+        'spacy': spacy.__version__,
+        'spacy_model': f"{nlp.meta.get('name')}-{nlp.meta.get('version')}",
+        'nltk': nltk.__version__,
+        'nltk_stopwords': len(nltk.corpus.stopwords.words('english')),
+        'pypdf2': PyPDF2.__version__,
+    }
+
+
+def load_golden(path, cases, seed):
+    """Recorded reference outcomes; ValueError when they don't apply to this corpus or environment"""
+    with open(path) as f:
+        saved = json.load(f)
+    if (saved['cases'], saved['seed']) != (cases, seed):
+        raise ValueError(f"{path} was recorded with --cases {saved['cases']} --seed {saved['seed']}")
+    current = environment()
+    if saved['environment'] != current:
+        changed = ', '.join(f"{key} {saved['environment'].get(key)} -> {value}"
+                            for key, value in current.items() if saved['environment'].get(key) != value)
+        raise ValueError(f"{path} was recorded under a different environment ({changed}); "
+                         f"record it again with --save-reference")
+    return saved['outcomes']
+
+
+def compare(reference, candidate, score_tolerance=0, factor_tolerance=1e-6):
+    """Field-by-field differences between two outcomes: a list of (field, reference, candidate)"""
+    if 'error' in reference or 'error' in candidate:
+        if reference.get('error') != candidate.get('error'):
+            return [('error', reference.get('error'), candidate.get('error'))]
+        return []
+    differences = []
+    if abs(reference['ats_score'] - candidate['ats_score']) > score_tolerance:
+        differences.append(('ats_score', reference['ats_score'], candidate['ats_score']))
+    for factor, expected in reference['factor_scores'].items():
+        actual = candidate['factor_scores'].get(factor)
+        if actual is None or abs(expected - actual) > factor_tolerance:
+            differences.append((f'factor_scores.{factor}', expected, actual))
+    expected = Counter(reference['recommendations'])
+    actual = Counter(candidate['recommendations'])
+    missing = sorted((expected - actual).elements())
+    extra = sorted((actual - expected).elements())
+    if missing or extra:
+        differences.append(('recommendations', missing, extra))
+    return differences
+
+
+# Engine factories return a function of (case) -> ATSResult. 'reference' is the current
+# analyzer: the golden file records its outcomes, and it is re-run locally for timings and
+# to check it against them. The built-in alternatives measure how far the repo's own fast
+# paths drift from the recorded outcomes. Any other engine is named as 'module:factory'.
+
+def reference_engine():
+    from ats_analyzer import ATSScoreAnalyzer
+    analyzer = ATSScoreAnalyzer()
+    return lambda case: analyzer.calculate_ats_score(case['pdf'], **case['options'])
+
+
+def degraded_engine():
+    """Every optional stage shed, as under heavy load"""
+    from ats_analyzer import ATSScoreAnalyzer
+    from quality import STAGES
+    analyzer = ATSScoreAnalyzer()
+    shed = frozenset(name for name, stage in STAGES.items() if stage['optional'])
+    return lambda case: analyzer.calculate_ats_score(case['pdf'], shed=shed, **case['options'])
+
+
+def docx_engine():
+    """The same resume submitted as DOCX instead of PDF.
+
+    Only 'plain' cases should match: the DOCX writer has no columns, header or photo.
+    """
+    from ats_analyzer import ATSScoreAnalyzer
+    analyzer = ATSScoreAnalyzer()
+    return lambda case: analyzer.calculate_ats_score(case['docx'], **case['options'])
+
+
+ENGINES = {
+    'reference': reference_engine,
+    'degraded': degraded_engine,
+    'docx': docx_engine,
+}
+
+
+def load_engine(name):
+    if name in ENGINES:
+        return ENGINES[name]()
+    module_name, _, attribute = name.partition(':')
+    if not attribute:
+        raise ValueError(f"Unknown engine '{name}': use one of {', '.join(ENGINES)} or module:factory")
+    return getattr(importlib.import_module(module_name), attribute)()
+
+
+def run_engine(engine, cases):
+    """({case id: outcome}, {case id: milliseconds}) for every case"""
+    outcomes = {}
+    timings = {}
+    for case in cases:
+        start = time.perf_counter()
+        result = engine(case)
+        timings[case['id']] = (time.perf_counter() - start) * 1000
+        outcomes[case['id']] = outcome(result)
+    return outcomes, timings
+
+
+def engine_report(name, reference, candidate, reference_ms, candidate_ms, score_tolerance, factor_tolerance):
+    """Discrepancy counts, worst numeric drift, examples and speedup of one engine against the reference"""
+    by_field = Counter()
+    max_drift = {}
+    examples = []
+    matching = 0
+    for case_id, expected in reference.items():
+        differences = compare(expected, candidate[case_id], score_tolerance, factor_tolerance)
+        if not differences:
+            matching += 1
+        for field, expected_value, actual_value in differences:
+            by_field[field] += 1
+            if isinstance(expected_value, (int, float)) and isinstance(actual_value, (int, float)):
+                max_drift[field] = max(max_drift.get(field, 0), abs(expected_value - actual_value))
+            if len(examples) < MAX_EXAMPLES:
+                examples.append({'case': case_id, 'field': field, 'reference': expected_value,
+                                 'candidate': actual_value})
+    reference_median = statistics.median(reference_ms.values()) if reference_ms else None
+    candidate_median = statistics.median(candidate_ms.values())
+    return {
+        'engine': name,
+        'cases': len(reference),
+        'matching': matching,
+        'discrepancies': dict(by_field),
+        'maxDrift': {field: round(drift, 6) for field, drift in max_drift.items()},
+        'referenceMedianMs': round(reference_median, 3) if reference_median else None,
+        'engineMedianMs': round(candidate_median, 3),
+        'speedup': round(reference_median / candidate_median, 2) if reference_median else None,
+        'examples': examples
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check alternative analysis engines against the reference analyzer")
+    parser.add_argument('--engine', action='append', dest='engines', default=[],
+                        help=f"Engine to compare: {', '.join(e for e in ENGINES if e != 'reference')} "
+                             f"or module:factory (repeatable)")
+    parser.add_argument('--cases', type=int, default=GOLDEN_CASES, help="Synthetic resumes in the corpus")
+    parser.add_argument('--seed', type=int, default=GOLDEN_SEED)
+    parser.add_argument('--reference', metavar='FILE', default=GOLDEN_PATH,
+                        help="Recorded reference outcomes to compare against (default: the committed golden file)")
+    parser.add_argument('--live-reference', action='store_true',
+                        help="Take the current analyzer's outcomes as the reference instead of a recorded file")
+    parser.add_argument('--save-reference', metavar='FILE', nargs='?', const=GOLDEN_PATH,
+                        help="Record the current analyzer's outcomes (default file: the golden file)")
+    parser.add_argument('--score-tolerance', type=int, default=0, help="Allowed ats_score difference")
+    parser.add_argument('--factor-tolerance', type=float, default=1e-6, help="Allowed factor score difference")
+    parser.add_argument('-o', '--output', help="Write the full JSON report here")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cases = build_cases(directory, args.cases, args.seed)
+        # Always run here: speedups compare timings taken on the same machine in the same run
+        live, reference_ms = run_engine(load_engine('reference'), cases)
+        if args.save_reference:
+            with open(args.save_reference, 'w') as f:
+                json.dump({'cases': args.cases, 'seed': args.seed, 'environment': environment(),
+                           'outcomes': live}, f, indent=1, sort_keys=True)
+            print(f"Reference outcomes for {len(cases)} cases saved to {args.save_reference}")
+
+        reports = []
+        if args.live_reference or args.save_reference:
+            reference = live
+        else:
+            try:
+                reference = load_golden(args.reference, args.cases, args.seed)
+            except FileNotFoundError:
+                parser.error(f"No recorded reference at {args.reference}: record one with --save-reference, "
+                             f"or compare against the current analyzer with --live-reference")
+            except ValueError as e:
+                parser.error(str(e))
+            # The current analyzer is itself checked against what was recorded
+            reports.append(engine_report('reference', reference, live, reference_ms, reference_ms,
+                                         args.score_tolerance, args.factor_tolerance))
+        for name in args.engines:
+            outcomes, timings = run_engine(load_engine(name), cases)
+            reports.append(engine_report(name, reference, outcomes, reference_ms, timings,
+                                         args.score_tolerance, args.factor_tolerance))
+
+    print(f"\n{'engine':<24} {'match':>11} {'ref ms':>8} {'ms':>8} {'speedup':>8}  discrepancies")
+    for report in reports:
+        speedup = f"{report['speedup']:.2f}x" if report['speedup'] else '-'
+        discrepancies = ', '.join(f"{field}={count}" for field, count in sorted(report['discrepancies'].items()))
+        print(f"{report['engine']:<24} {report['matching']:>5}/{report['cases']:<5} "
+              f"{report['referenceMedianMs'] or 0:>8.2f} {report['engineMedianMs']:>8.2f} {speedup:>8}  "
+              f"{discrepancies or 'none'}")
+        for field, drift in sorted(report['maxDrift'].items()):
+            print(f"{'':<24} max drift {field}: {drift}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'cases': args.cases, 'seed': args.seed, 'engines': reports}, f, indent=2)
+        print(f"Report written to {args.output}")
+    # Non-zero when any engine is not equivalent, so it can gate a change in CI
+    return 1 if any(report['matching'] < report['cases'] for report in reports) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+# document_formats.py
+import os
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+from pdf_preflight import MAX_FILE_BYTES
+from pdf_layout import font_family
+from results import LayoutFacts
+
+# Uploads accepted by extension; PDFs go through PyPDF2, the rest through the cheap extractors here
+EXTRACTORS = ('pdf', 'docx', 'txt')
+# A DOCX is a zip, so every XML part read is capped separately (it may be far larger than the
+# upload), and so are all of them together: a small zip can hold many highly compressed parts
+MAX_DOCX_XML_BYTES = int(os.environ.get('PREFLIGHT_MAX_DOCX_XML_BYTES', 20 * 1024 * 1024))
+MAX_DOCX_TOTAL_BYTES = int(os.environ.get('PREFLIGHT_MAX_DOCX_TOTAL_BYTES', 2 * MAX_DOCX_XML_BYTES))
+
+ERROR_STATUS = {
+    'file_too_large': 413,
+    'docx_unreadable': 422,
+    'docx_too_large': 413,
+}
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_A = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+_C = '{http://schemas.openxmlformats.org/drawingml/2006/chart}'
+# Word writes text boxes twice, as DrawingML and as a VML fallback for old readers
+_FALLBACK = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+_PAGES = re.compile(rb'<Pages>(\d+)</Pages>')
+_HEADER_PART = re.compile(r'^word/(header|footer)\d*\.xml$')
+
+
+def file_type(path):
+    """'pdf', 'docx' or 'txt' by extension, or None for anything else"""
+    extension = path.rsplit('.', 1)[-1].lower() if '.' in path else ''
+    return extension if extension in EXTRACTORS else None
+
+
+def _parts(archive):
+    """ZipInfo of every part extract_docx reads; KeyError when there is no document part"""
+    infos = [archive.getinfo('word/document.xml')]
+    for info in archive.infolist():
+        if _HEADER_PART.match(info.filename) or info.filename in ('word/styles.xml', 'docProps/app.xml'):
+            infos.append(info)
+    return infos
+
+
+def _oversized(infos):
+    # Declared sizes are binding: zipfile stops decompressing a member at its file_size
+    return (any(info.file_size > MAX_DOCX_XML_BYTES for info in infos)
+            or sum(info.file_size for info in infos) > MAX_DOCX_TOTAL_BYTES)
+
+
+def _rejection(code, message):
+    return {'ok': False, 'error_code': code, 'error': message, 'max_pages': None, 'warnings': []}
+
+
+def preflight(path):
+    """Cheap checks for DOCX and text uploads, in the same shape as PDFPreflight.check results"""
+    size = os.path.getsize(path)
+    if size > MAX_FILE_BYTES:
+        return _rejection('file_too_large', f"File is larger than {MAX_FILE_BYTES // (1024 * 1024)}MB.")
+    if file_type(path) == 'docx':
+        try:
+            with zipfile.ZipFile(path) as archive:
+                infos = _parts(archive)
+        except (zipfile.BadZipFile, KeyError, OSError):
+            # Password-protected DOCX files are OLE containers, not zips
+            return _rejection('docx_unreadable', "DOCX could not be read, the file may be corrupted or protected.")
+        if _oversized(infos):
+            return _rejection('docx_too_large', "DOCX content is too large to analyze.")
+    return {'ok': True, 'error_code': None, 'error': None, 'max_pages': None, 'warnings': []}
+
+
+def extract_text_file(path):
+    """Plain-text resume: UTF-8 (with or without BOM), falling back to Latin-1"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    try:
+        return data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return data.decode('latin-1')
+
+
+class _DocxLayout:
+    """Layout counters gathered while the document XML streams past"""
+
+    def __init__(self):
+        self.fonts = set()
+        self.images = 0
+        self.charts = 0
+        self.table_rows = 0
+        self.two_cell_rows = 0
+        self.text_box_paragraphs = 0
+        self.text_boxes = 0
+        self.paragraphs = 0
+        self.multi_column = False
+        self.header_text = False
+        self.footer_text = False
+        self.pages = None
+        self._font_names = set()
+
+    def add_font(self, name):
+        # Every run repeats its font, so each distinct name is normalized once
+        if name and name not in self._font_names:
+            self._font_names.add(name)
+            self.fonts.add(font_family(name.replace(' ', '')))
+
+
+def _paragraph_text(paragraph):
+    parts = []
+    # Nested paragraphs (text boxes) were cleared when they ended, so only this one's runs remain
+    for elem in paragraph.iter():
+        tag = elem.tag
+        if tag == _W + 't':
+            parts.append(elem.text or '')
+        elif tag == _W + 'tab':
+            parts.append('\t')
+        elif tag == _W + 'br' or tag == _W + 'cr':
+            parts.append('\n')
+    return ''.join(parts)
+
+
+def _paragraphs(stream, layout=None):
+    """Text of each paragraph of a WordprocessingML part, parsed incrementally.
+
+    Only end events are read: an element's subtree is complete by then, which is all
+    the table and text-box bookkeeping needs, and it halves the parser callbacks.
+    """
+    paragraphs = []
+    for _, elem in ET.iterparse(stream):
+        tag = elem.tag
+        if tag == _W + 'p':
+            paragraphs.append(_paragraph_text(elem))
+            # Finished paragraphs are emptied so memory stays flat on long documents
+            elem.clear()
+        elif tag == _FALLBACK:
+            # The VML copy of content already read from mc:Choice: take its paragraphs back
+            repeated = sum(1 for _ in elem.iter(_W + 'p'))
+            if repeated:
+                del paragraphs[-repeated:]
+            if layout:
+                for text_box in elem.iter(_W + 'txbxContent'):
+                    layout.text_boxes -= 1
+                    layout.text_box_paragraphs -= sum(1 for _ in text_box.iter(_W + 'p'))
+            elem.clear()
+        elif layout is None:
+            continue
+        elif tag == _W + 'tr':
+            cells = len(elem.findall(_W + 'tc'))
+            if cells >= 3:
+                layout.table_rows += 1
+            elif cells == 2:
+                layout.two_cell_rows += 1
+        elif tag == _W + 'txbxContent':
+            layout.text_boxes += 1
+            layout.text_box_paragraphs += sum(1 for _ in elem.iter(_W + 'p'))
+        elif tag == _W + 'rFonts':
+            layout.add_font(elem.get(_W + 'ascii'))
+        elif tag == _A + 'blip':
+            layout.images += 1
+        elif tag == _C + 'chart':
+            layout.charts += 1
+        elif tag == _W + 'cols':
+            if int(elem.get(_W + 'num', 1)) > 1:
+                layout.multi_column = True
+    if layout:
+        layout.paragraphs += len(paragraphs)
+    return paragraphs
+
+
+def extract_docx(path, layout=None):
+    """Text of a DOCX, streamed from its zip without loading the archive or building a DOM.
+
+    Pass a _DocxLayout to collect the layout counters behind docx_layout_facts.
+    """
+    with zipfile.ZipFile(path) as archive:
+        # Also checked by preflight; repeated for callers that extract without it
+        if _oversized(_parts(archive)):
+            raise ValueError("DOCX content is too large to analyze")
+        with archive.open('word/document.xml') as stream:
+            text = '\n'.join(_paragraphs(stream, layout))
+        if layout is None:
+            return text
+        names = archive.namelist()
+        # Header and footer parts repeat on every page; they only matter when they hold text
+        for name in names:
+            match = _HEADER_PART.match(name)
+            if match:
+                with archive.open(name) as stream:
+                    if any(p.strip() for p in _paragraphs(stream)):
+                        setattr(layout, f'{match.group(1)}_text', True)
+        if 'word/styles.xml' in names:
+            with archive.open('word/styles.xml') as stream:
+                for _, elem in ET.iterparse(stream):
+                    if elem.tag == _W + 'rFonts':
+                        layout.add_font(elem.get(_W + 'ascii'))
+                    # Nothing here needs a subtree, so no element outlives its end event
+                    elem.clear()
+        if 'docProps/app.xml' in names:
+            match = _PAGES.search(archive.read('docProps/app.xml'))
+            layout.pages = int(match.group(1)) if match else None
+    return text
+
+
+def docx_layout_facts(layout):
+    """Map DOCX structure onto the LayoutFacts the formatting checks read.
+
+    Word already knows what PDF extraction has to infer: real tables, section
+    columns, text boxes, header and footer parts, embedded images and charts.
+    """
+    return LayoutFacts(
+        page_count=layout.pages or 1,
+        fonts=sorted(layout.fonts),
+        image_count=layout.images,
+        # Side-by-side two-cell rows and multi-column sections read like PDF columns
+        column_lines=layout.paragraphs if layout.multi_column else layout.two_cell_rows,
+        table_rows=layout.table_rows,
+        isolated_blocks=layout.text_box_paragraphs,
+        repeated_header=layout.header_text,
+        repeated_footer=layout.footer_text,
+        vector_rules=0,
+        vector_curves=0,
+        text_boxes=layout.text_boxes,
+        charts=layout.charts
+    )
+
+
+def extract(path):
+    """(text, LayoutFacts) for a DOCX or plain-text resume"""
+    if file_type(path) == 'docx':
+        layout = _DocxLayout()
+        text = extract_docx(path, layout)
+        return text, docx_layout_facts(layout)
+    # Plain text has no layout at all, which is better than guessing one from the characters
+    return extract_text_file(path), docx_layout_facts(_DocxLayout())
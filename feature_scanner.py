@@ -0,0 +1,156 @@
+# feature_scanner.py
+import re
+from bisect import bisect_right
+
+from results import TextFeatures
+
+DEGREES = ('bachelor', 'master', 'phd', 'doctor', 'mba', 'bs', 'ba', 'ms', 'ma', 'btech', 'mtech')
+INSTITUTIONS = ('university', 'college', 'institute', 'school')
+PROFILES = ('linkedin', 'github')
+
+# Characters of an email's local part. The scanner runs over lowercased text.
+_LOCAL = 'a-z0-9._%+-'
+_ADDRESS = f'[{_LOCAL}]+@[a-z0-9.-]+\\.[a-z]{{2,}}'
+EMAIL = re.compile(_ADDRESS)
+
+# Every contact, date and education signal in one alternation, scanned once left to right.
+# Alternatives are only tried where a word starts, so the engine rejects every other
+# position with a single lookbehind and nothing is rescanned from inside a run. Digit
+# clusters are maximal runs of digits and phone punctuation, plus the letters of the
+# word they sit in: any phone number or year lies inside one and is picked out of it.
+# Profiles count anywhere, even glued to other words ('john@x.comlinkedin'), so they
+# are found with plain substring searches instead.
+_TERMS = '|'.join(DEGREES + INSTITUTIONS)
+_CLUSTER = r'\+?\(?\d+(?:\)?[\s.-]?\(?\d+)*'
+_DIGITS = f'[a-z_]*+{_CLUSTER}(?:[a-z_]++{_CLUSTER})*'
+SCANNER = re.compile(f'(?<![a-z0-9_])(?:(?<![.%+-])(?P<email>{_ADDRESS})|(?<!\\w)(?P<term>(?:{_TERMS})\\b)'
+                     f'|(?P<digits>{_DIGITS}))')
+# What an email address can hide: me@university.edu, john.2023@...
+INNER_SCANNER = re.compile(f'(?<![a-z0-9_])(?:(?<!\\w)(?P<term>(?:{_TERMS})\\b)|(?P<digits>{_DIGITS}))')
+# Digits glued to the end of an earlier match ('me@x.org2020')
+TAIL_SCANNER = re.compile(f'(?P<digits>{_DIGITS})')
+TERM = re.compile(f'(?<!\\w)(?:{_TERMS})\\b')
+# The only characters whose lowercase holds ASCII letters: 'İ' -> 'i̇' and the Kelvin sign -> 'k'
+_FOLDS_TO_ASCII = re.compile('[\u0130\u212a]')
+_ASCII_LOWER = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+PHONE = re.compile(r'(?:\+\d{1,3}\s?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}')
+YEAR = re.compile(r'\b(?:19|20)\d{2}\b')
+FOUR_DIGITS = re.compile(r'\d{4}')
+
+_LOCAL_CHARS = frozenset('abcdefghijklmnopqrstuvwxyz0123456789._%+-')
+_TERM_KINDS = dict.fromkeys(DEGREES, 'degree')
+_TERM_KINDS.update(dict.fromkeys(INSTITUTIONS, 'institution'))
+
+
+class _Collector:
+    def __init__(self, text, section_lines, matches=None, sections=None):
+        self.text = text
+        self.section_lines = section_lines
+        self.line_starts = [0]
+        if section_lines:
+            self.line_starts += [m.end() for m in re.finditer('\n', text)]
+        self.matches = {} if matches is None else matches
+        self.sections = {} if sections is None else sections
+        self.terms = True
+
+    def add(self, kind, value, offset):
+        self.matches.setdefault(kind, []).append(value)
+        if self.section_lines:
+            line = bisect_right(self.line_starts, offset) - 1
+            for section, (first, end) in self.section_lines.items():
+                if first <= line < end:
+                    self.sections.setdefault(section, {}).setdefault(kind, []).append(value)
+                    break
+
+    def visit(self, match):
+        """Record one scanner match and return where scanning resumes"""
+        kind = match.lastgroup
+        if kind == 'email':
+            return self.email(match)
+        if kind == 'digits':
+            text = self.text
+            end = match.end()
+            # A cluster can run into an address ('555 123john@x.com') that starts at the
+            # last run of local-part characters inside it
+            if end < len(text) and (text[end] in _LOCAL_CHARS or text[end] == '@'):
+                local_start = end
+                while local_start > match.start() and text[local_start - 1] in _LOCAL_CHARS:
+                    local_start -= 1
+                email = EMAIL.match(text, local_start)
+                if email:
+                    self.digits(match.start(), end, before=local_start)
+                    return self.email(email)
+        self.record(match)
+        return match.end()
+
+    def record(self, match):
+        kind = match.lastgroup
+        if kind == 'term':
+            if self.terms:
+                self.add(_TERM_KINDS[match.group()], match.group(), match.start())
+        else:
+            self.digits(match.start(), match.end())
+
+    def email(self, match):
+        self.add('email', match.group(), match.start())
+        # Searches get one character past a match so \b sees what really follows it
+        stop = min(match.end() + 1, len(self.text))
+        for inner in INNER_SCANNER.finditer(self.text, match.start(), stop):
+            if inner.start() < match.end():
+                self.record(inner)
+        return match.end()
+
+    def digits(self, start, end, before=None):
+        """Phone numbers, years and 4-digit runs of the cluster text[start:end] starting before `before`"""
+        text = self.text
+        before = end if before is None else before
+        stop = min(end + 1, len(text))
+        for phone in PHONE.finditer(text, start, stop):
+            if phone.start() < before:
+                self.add('phone', phone.group(), phone.start())
+        for year in YEAR.finditer(text, start, stop):
+            if year.start() < before:
+                self.add('year', year.group(), year.start())
+        for digits in FOUR_DIGITS.finditer(text, start, end):
+            if digits.start() < before:
+                self.add('digits', digits.group(), digits.start())
+
+
+def scan(text, section_lines=None):
+    """Emails, phone numbers, LinkedIn/GitHub mentions, years, 4-digit runs, degree and
+    institution terms of a text, found in one linear pass. Values come back lowercased.
+
+    section_lines maps section names to the (first, end) line numbers of their content,
+    as filled in by ResumeAnalyzer.identify_sections; each feature found on those lines
+    is also listed under its section.
+    """
+    # Lowercasing keeps the line structure, so section line numbers still apply
+    lowered = text.lower()
+    if _FOLDS_TO_ASCII.search(text) is None:
+        text = lowered
+    else:
+        # Terms and profiles are matched in the lowercased text, but addresses and numbers in
+        # the text as written: 'İ2020' holds no year. Only ASCII is lowercased for the scan
+        text = text.translate(_ASCII_LOWER)
+    collector = _Collector(text, section_lines)
+    words = collector
+    if text is not lowered:
+        collector.terms = False
+        words = _Collector(lowered, section_lines, collector.matches, collector.sections)
+        for term in TERM.finditer(lowered):
+            words.add(_TERM_KINDS[term.group()], term.group(), term.start())
+    position = 0
+    while True:
+        match = TAIL_SCANNER.match(text, position) if position else None
+        if match is None:
+            match = SCANNER.search(text, position)
+        if match is None:
+            break
+        position = collector.visit(match)
+    for profile in PROFILES:
+        start = lowered.find(profile)
+        while start != -1:
+            words.add(profile, profile, start)
+            start = lowered.find(profile, start + len(profile))
+    return TextFeatures(matches=collector.matches, sections=collector.sections)
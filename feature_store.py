@@ -0,0 +1,316 @@
+# feature_store.py
+import os
+import time
+import fcntl
+import hmac
+import argparse
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+from results import FactorScores
+
+STORE_DIR = os.environ.get('FEATURE_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data',
+                                                             'features'))
+# Persist every analysis's factor scores and raw features for later re-weighting (opt-in:
+# labels are upload filenames, which often carry a student's name)
+ENABLED = os.environ.get('FEATURE_STORE_ENABLED', '0') == '1'
+# /features/rescore lists stored labels, so it needs this token in the X-Features-Token
+# header; with no token configured the endpoint is refused
+ACCESS_TOKEN = os.environ.get('FEATURE_STORE_TOKEN', '')
+# Only the most recent rows are kept: once the store is COMPACT_SLACK over MAX_ROWS,
+# the next append rewrites it down to MAX_ROWS, so the rewrite cost is amortized
+MAX_ROWS = int(os.environ.get('FEATURE_STORE_MAX_ROWS', 1000000))
+COMPACT_SLACK = 0.25
+
+FACTORS = FactorScores.__slots__
+
+# One append-only binary file per column; row i of the store is element i of every file.
+# Factor scores keep their factor names, so raw counts use distinct ones ('words')
+COLUMNS = dict(
+    {factor: np.float32 for factor in FACTORS},
+    ats_score=np.int16,
+    words=np.int32,
+    action_verb_count=np.int32,
+    weak_phrase_count=np.int32,
+    missing_contact_fields=np.int8,
+    keyword_hits=np.int32,
+    formatting_issue_count=np.int8,
+    created=np.float64,
+    label_offset=np.int64,
+    # First 8 bytes of the file's SHA-256: a file uploaded again replaces its earlier row
+    key=np.int64
+)
+LABELS_FILE = 'labels.txt'
+
+
+def authorized(headers):
+    """Whether a request may read stored labels through the HTTP API"""
+    token = headers.get('X-Features-Token', '')
+    return bool(ACCESS_TOKEN) and hmac.compare_digest(token, ACCESS_TOKEN)
+
+
+def row_key(sha256):
+    """int64 row key from a file's hex SHA-256"""
+    return int.from_bytes(bytes.fromhex(sha256[:16]), 'little', signed=True)
+
+
+def latest_rows(keys):
+    """Sorted row numbers holding the last row stored for each key"""
+    if not len(keys):
+        return np.zeros(0, dtype=np.int64)
+    _, from_end = np.unique(np.asarray(keys)[::-1], return_index=True)
+    return np.sort(len(keys) - 1 - from_end)
+
+
+def features_from_result(ats_result):
+    """Flatten an ATSResult into one row of column values"""
+    metrics = ats_result.base_analysis.metrics
+    row = {factor: ats_result.factor_scores[factor] for factor in FACTORS}
+    row.update(
+        ats_score=ats_result.ats_score,
+        words=metrics.word_count,
+        action_verb_count=metrics.action_verbs['count'],
+        weak_phrase_count=metrics.weak_phrases['count'],
+        missing_contact_fields=len((ats_result.contact_info or {}).get('missing', ())),
+        keyword_hits=len({kw for found in ats_result.base_analysis.industry_keywords.values() for kw in found}),
+        formatting_issue_count=len(ats_result.formatting_issues)
+    )
+    return row
+
+
+def normalize_weights(weights, defaults):
+    """Overlay weights on the defaults and scale them to sum to 1, so scores stay on 0-100"""
+    unknown = set(weights) - set(FACTORS)
+    if unknown:
+        raise ValueError(f"Unknown factor(s): {', '.join(sorted(unknown))}")
+    merged = {factor: float(weights.get(factor, defaults[factor])) for factor in FACTORS}
+    if any(w < 0 for w in merged.values()) or not sum(merged.values()):
+        raise ValueError("Weights must be non-negative and not all zero")
+    total = sum(merged.values())
+    return {factor: w / total for factor, w in merged.items()}
+
+
+class FeatureStore:
+    """Columnar store of per-resume features on local disk, read back as numpy memmaps.
+
+    Appends write one fixed-width value to each column file under an exclusive file
+    lock, so gunicorn workers can share a store. Readers map the files and only see
+    rows present in every column, which also hides a half-written last row. Rows are
+    keyed by file hash and only the latest row of each key is ranked. Past max_rows
+    the store is rewritten with the newest latest rows, so rank() reads under a
+    shared lock to see columns and labels from the same generation.
+    """
+
+    def __init__(self, directory=STORE_DIR, max_rows=MAX_ROWS):
+        self.directory = directory
+        self.max_rows = max_rows
+        os.makedirs(directory, exist_ok=True)
+        self._lock_path = os.path.join(directory, '.lock')
+        self._thread_lock = threading.Lock()
+        self._add_key_column()
+
+    def _path(self, name):
+        return os.path.join(self.directory, f'{name}.bin')
+
+    @contextmanager
+    def _locked(self, mode):
+        with open(self._lock_path, 'a') as lock:
+            fcntl.flock(lock, mode)
+            yield
+
+    def _add_key_column(self):
+        # Stores written before rows were keyed get a distinct key per existing row
+        if os.path.exists(self._path('key')) or not os.path.exists(self._path('label_offset')):
+            return
+        with self._thread_lock, self._locked(fcntl.LOCK_EX):
+            if not os.path.exists(self._path('key')):
+                count = min(os.path.getsize(self._path(name)) // np.dtype(dtype).itemsize
+                            for name, dtype in COLUMNS.items() if name != 'key')
+                (-1 - np.arange(count, dtype=np.int64)).tofile(self._path('key'))
+
+    def append(self, label, ats_result, sha256):
+        row = features_from_result(ats_result)
+        row['key'] = row_key(sha256)
+        self.append_rows([label], [row])
+
+    def append_rows(self, labels, rows):
+        """Append rows of column values (see features_from_result) with their labels"""
+        if not rows:
+            return
+        with self._thread_lock, self._locked(fcntl.LOCK_EX):
+            # Re-align columns a crashed writer left uneven before adding anything
+            count = len(self)
+            for name, dtype in COLUMNS.items():
+                path = self._path(name)
+                if os.path.exists(path) and os.path.getsize(path) > count * np.dtype(dtype).itemsize:
+                    os.truncate(path, count * np.dtype(dtype).itemsize)
+
+            labels_path = os.path.join(self.directory, LABELS_FILE)
+            offset = os.path.getsize(labels_path) if os.path.exists(labels_path) else 0
+            offsets = []
+            with open(labels_path, 'ab') as f:
+                for label in labels:
+                    encoded = label.replace('\n', ' ').encode() + b'\n'
+                    offsets.append(offset)
+                    offset += len(encoded)
+                    f.write(encoded)
+
+            now = time.time()
+            for name, dtype in COLUMNS.items():
+                if name == 'label_offset':
+                    values = offsets
+                elif name == 'created':
+                    values = [row.get('created', now) for row in rows]
+                else:
+                    values = [row[name] for row in rows]
+                with open(self._path(name), 'ab') as f:
+                    f.write(np.asarray(values, dtype=dtype).tobytes())
+
+            if count + len(rows) > self.max_rows * (1 + COMPACT_SLACK):
+                self._compact(count + len(rows), self.max_rows)
+
+    def _compact(self, count, keep):
+        """Rewrite every file with the last `keep` of the latest rows per key; call with the lock held"""
+        rows = latest_rows(np.fromfile(self._path('key'), dtype=COLUMNS['key'], count=count))[-keep:]
+        labels_path = os.path.join(self.directory, LABELS_FILE)
+        with open(labels_path, 'rb') as f:
+            labels = f.read()
+        offsets = np.fromfile(self._path('label_offset'), dtype=COLUMNS['label_offset'], count=count)
+        ends = np.append(offsets[1:], len(labels))
+        kept = [labels[offsets[row]:ends[row]] for row in rows]
+        # Files are swapped in with os.replace, so maps readers already hold stay valid
+        with open(labels_path + '.tmp', 'wb') as f:
+            f.write(b''.join(kept))
+        for name, dtype in COLUMNS.items():
+            if name == 'label_offset':
+                values = np.cumsum([0] + [len(label) for label in kept[:-1]])
+            else:
+                values = np.fromfile(self._path(name), dtype=dtype, count=count)[rows]
+            values.astype(dtype).tofile(self._path(name) + '.tmp')
+            os.replace(self._path(name) + '.tmp', self._path(name))
+        os.replace(labels_path + '.tmp', labels_path)
+
+    def __len__(self):
+        sizes = []
+        for name, dtype in COLUMNS.items():
+            path = self._path(name)
+            sizes.append(os.path.getsize(path) // np.dtype(dtype).itemsize if os.path.exists(path) else 0)
+        return min(sizes)
+
+    def column(self, name, count=None):
+        """Read-only memmap of one column"""
+        count = len(self) if count is None else count
+        if count == 0:
+            return np.zeros(0, dtype=COLUMNS[name])
+        return np.memmap(self._path(name), dtype=COLUMNS[name], mode='r', shape=(count,))
+
+    def labels(self, rows, count=None):
+        """Labels of the given row numbers, read by seeking to their offsets"""
+        offsets = self.column('label_offset', count)
+        result = []
+        with open(os.path.join(self.directory, LABELS_FILE), 'rb') as f:
+            for row in rows:
+                f.seek(int(offsets[row]))
+                result.append(f.readline().rstrip(b'\n').decode())
+        return result
+
+    def rescore(self, weights, count=None):
+        """ATS score of every stored resume under new factor weights, as one vectorized pass"""
+        count = len(self) if count is None else count
+        total = np.zeros(count, dtype=np.float32)
+        for factor, weight in weights.items():
+            if weight:
+                total += np.float32(weight) * self.column(factor, count)
+        return np.minimum(np.rint(total * 100), 100).astype(np.int16)
+
+    def rank(self, weights, limit=20):
+        """Rescore the store and return the best `limit` resumes with old and new scores"""
+        with self._locked(fcntl.LOCK_SH):
+            return self._rank(weights, limit)
+
+    def _rank(self, weights, limit):
+        count = len(self)
+        rows = latest_rows(self.column('key', count))
+        scores = self.rescore(weights, count)[rows]
+        if not len(rows):
+            return scores, []
+        limit = min(limit, len(rows))
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.lexsort((top, -scores[top]))]
+        previous = self.column('ats_score', count)
+        ranking = [{'resume': label, 'atsScore': int(scores[i]), 'previousScore': int(previous[rows[i]])}
+                   for i, label in zip(top, self.labels(rows[top], count))]
+        return scores, ranking
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = FeatureStore()
+    return _store
+
+
+def _synthetic_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for _ in range(n):
+        row = {factor: float(rng.random()) for factor in FACTORS}
+        row.update(ats_score=int(rng.integers(0, 101)), words=int(rng.integers(100, 1500)),
+                   action_verb_count=int(rng.integers(0, 30)), weak_phrase_count=int(rng.integers(0, 10)),
+                   missing_contact_fields=int(rng.integers(0, 4)), keyword_hits=int(rng.integers(0, 40)),
+                   formatting_issue_count=int(rng.integers(0, 5)))
+        rows.append(row)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect, re-weight or benchmark the feature store")
+    parser.add_argument('command', choices=['stats', 'rescore', 'bench'])
+    parser.add_argument('--weight', action='append', default=[], metavar='FACTOR=WEIGHT',
+                        help="Override a factor weight, e.g. keyword_match=0.5 (repeatable)")
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--rows', type=int, default=1000000, help="Synthetic rows for bench")
+    args = parser.parse_args()
+
+    if args.command == 'stats':
+        store = get_store()
+        print(f"{store.directory}: {len(store)} resume(s)")
+    elif args.command == 'rescore':
+        from ats_analyzer import ATSScoreAnalyzer
+
+        overrides = dict(item.split('=', 1) for item in args.weight)
+        weights = normalize_weights(overrides, ATSScoreAnalyzer().ats_factors)
+        start = time.perf_counter()
+        _, ranking = get_store().rank(weights, args.limit)
+        print(f"Rescored in {(time.perf_counter() - start) * 1000:.1f}ms with "
+              + ', '.join(f'{f}={w:.3f}' for f, w in weights.items()))
+        for entry in ranking:
+            print(f"{entry['atsScore']:>4} (was {entry['previousScore']:>3})  {entry['resume']}")
+    else:
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = FeatureStore(directory)
+            rows = _synthetic_rows(10000)
+            start = time.perf_counter()
+            for i in range(0, args.rows, len(rows)):
+                batch = [dict(row, key=i + j) for j, row in enumerate(rows[:min(len(rows), args.rows - i)])]
+                store.append_rows([f'resume-{i + j}.pdf' for j in range(len(batch))], batch)
+            print(f"appended {len(store)} rows in {time.perf_counter() - start:.2f}s")
+
+            weights = normalize_weights({'keyword_match': 0.5}, {f: 1 / len(FACTORS) for f in FACTORS})
+            timings = []
+            for _ in range(5):
+                start = time.perf_counter()
+                store.rank(weights, args.limit)
+                timings.append(time.perf_counter() - start)
+            print(f"rescore + top-{args.limit} over {len(store)} rows: best {min(timings) * 1000:.1f}ms, "
+                  f"median {sorted(timings)[2] * 1000:.1f}ms")
@@ -0,0 +1,131 @@
+# fuzzy_matcher.py
+import os
+import threading
+
+from keyword_taxonomy import tokenize
+from skill_index import get_skill_index
+from results import FuzzyMatch
+
+# Tokens shorter than this are too likely to be real words one edit away from a skill
+MIN_TOKEN_LENGTH = int(os.environ.get('FUZZY_MIN_LENGTH', 6))
+# Longer words tolerate two edits, shorter ones only one
+TWO_EDIT_LENGTH = int(os.environ.get('FUZZY_TWO_EDIT_LENGTH', 9))
+# Per-process memo of token lookups; resumes repeat most of their vocabulary
+LOOKUP_CACHE_SIZE = 50000
+
+
+def allowed_distance(word):
+    return 2 if len(word) >= TWO_EDIT_LENGTH else 1
+
+
+def _deletes(word, distance):
+    """All strings reachable from word by deleting up to `distance` characters"""
+    results = {word}
+    frontier = {word}
+    for _ in range(distance):
+        next_frontier = set()
+        for item in frontier:
+            for i in range(len(item)):
+                next_frontier.add(item[:i] + item[i + 1:])
+        results |= next_frontier
+        frontier = next_frontier
+    return results
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance, giving up once it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class FuzzyIndex:
+    """SymSpell-style deletion index over the single-word skill vocabulary.
+
+    Every skill variant is stored under each of its deletions (up to two edits), so a
+    misspelled token is resolved by generating its own deletions and probing the table,
+    instead of comparing it against every keyword.
+    """
+
+    def __init__(self, skill_index):
+        self.skill_index = skill_index
+        self.deletes = {}
+        self._cache = {}
+
+        for form, skill_id in skill_index.phrases.items():
+            if ' ' in form or len(form) < MIN_TOKEN_LENGTH:
+                continue
+            for deleted in _deletes(form, allowed_distance(form)):
+                self.deletes.setdefault(deleted, []).append((form, skill_id))
+
+    def lookup(self, token):
+        """Closest skill (form, skill id, distance) within the allowed edits, or None"""
+        if token in self._cache:
+            return self._cache[token]
+
+        best = None
+        limit = allowed_distance(token)
+        seen = set()
+        for deleted in _deletes(token, limit):
+            for form, skill_id in self.deletes.get(deleted, ()):
+                # Typos rarely hit the first letter; requiring it avoids most false friends
+                if form in seen or form[0] != token[0]:
+                    continue
+                seen.add(form)
+                allowed = min(limit, allowed_distance(form))
+                distance = edit_distance(token, form, allowed)
+                if distance <= allowed and (best is None or distance < best[2]):
+                    best = (form, skill_id, distance)
+
+        if len(self._cache) >= LOOKUP_CACHE_SIZE:
+            self._cache.clear()
+        self._cache[token] = best
+        return best
+
+    def match(self, text, exclude_ids=frozenset()):
+        """Skills that appear in the text only as misspellings, one entry per skill"""
+        phrases = self.skill_index.phrases
+        matches = {}
+        for token in set(tokenize(text)):
+            if len(token) < MIN_TOKEN_LENGTH or token in phrases:
+                continue
+            hit = self.lookup(token)
+            if hit is None:
+                continue
+            form, skill_id, distance = hit
+            if skill_id in exclude_ids or skill_id in matches:
+                continue
+            matches[skill_id] = FuzzyMatch(term=self.skill_index.term(skill_id), found=token, distance=distance)
+        return matches
+
+
+_lock = threading.Lock()
+_index = None
+
+
+def get_fuzzy_index():
+    """Return the fuzzy index for the current skill index, rebuilding it after a reload"""
+    global _index
+    skill_index = get_skill_index()
+    index = _index
+    if index is None or index.skill_index is not skill_index:
+        with _lock:
+            if _index is None or _index.skill_index is not skill_index:
+                _index = FuzzyIndex(skill_index)
+            index = _index
+    return index
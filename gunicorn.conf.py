@@ -0,0 +1,33 @@
+# gunicorn.conf.py
+import gc
+import os
+
+import memory_profile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 2))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+# Import the app (spaCy pipeline, NLTK corpora, taxonomy and skill indexes) once in
+# the master; forked workers share those pages copy-on-write instead of loading their own
+preload_app = True
+
+
+def when_ready(server):
+    """Warm every model in the master, then freeze the heap before workers fork"""
+    import app
+    app.warm_up()
+    # Frozen objects are skipped by the cyclic GC, whose passes would otherwise write
+    # to their headers in each worker and un-share the pages
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"Preloaded and froze {gc.get_freeze_count()} objects, master memory "
+                    f"{memory_profile.process_memory()}")
+
+
+def post_worker_init(worker):
+    import app
+    # Already warm when forked from a preloaded master; otherwise warm up before serving
+    app.warm_up()
+    worker.log.info(f"Worker {worker.pid} ready, memory {memory_profile.process_memory()}")
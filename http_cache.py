@@ -0,0 +1,106 @@
+# http_cache.py
+import os
+import gzip
+import hashlib
+import threading
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Bodies smaller than this gain nothing from compression
+MIN_COMPRESS_BYTES = 512
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/javascript', 'text/javascript', 'text/html',
+                          'text/css', 'text/plain', 'image/svg+xml'}
+# Fingerprinted static URLs (?v=<hash>) never change, so browsers may keep them for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# Unversioned static URLs are revalidated with their ETag after this long
+STATIC_MAX_AGE = 300
+
+_static_versions = {}
+_compressed_static = {}
+_lock = threading.Lock()
+
+
+def static_version(static_folder, filename):
+    """Short content hash of a static file, refreshed when its mtime changes"""
+    path = os.path.join(static_folder, filename)
+    mtime = os.stat(path).st_mtime
+    cached = _static_versions.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, 'rb') as f:
+            cached = (mtime, hashlib.sha256(f.read()).hexdigest()[:12])
+        _static_versions[path] = cached
+    return cached[1]
+
+
+def choose_encoding(accept_encoding):
+    """'br' or 'gzip' if the client accepts it (brotli only when installed), else None"""
+    accepted = {part.split(';')[0].strip() for part in (accept_encoding or '').lower().split(',')}
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def finalize(response, request, static=False):
+    """Add cache headers for static assets and compress eligible bodies"""
+    if static:
+        # send_file marks files no-cache when no max age is configured
+        response.cache_control.no_cache = None
+        if request.args.get('v'):
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.public = True
+            response.cache_control.max_age = STATIC_MAX_AGE
+
+    response.vary.add('Accept-Encoding')
+    if (response.status_code != 200 or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+    if encoding is None:
+        return response
+
+    etag, _ = response.get_etag()
+    if static and etag and request.if_none_match.contains(f'{etag}-{encoding}'):
+        # Revalidation of the compressed entity the client already holds
+        response.status_code = 304
+        response.direct_passthrough = False
+        response.set_data(b'')
+        response.set_etag(f'{etag}-{encoding}')
+        return response
+
+    response.direct_passthrough = False
+    data = response.get_data()
+    if static and etag:
+        # Static files are compressed once per version and encoding
+        key = (etag, encoding)
+        body = _compressed_static.get(key)
+        if body is None:
+            body = compress(data, encoding)
+            with _lock:
+                _compressed_static[key] = body
+    else:
+        if len(data) < MIN_COMPRESS_BYTES:
+            return response
+        body = compress(data, encoding)
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    if etag:
+        # The compressed representation is a different entity from the plain one
+        response.set_etag(f'{etag}-{encoding}')
+    return response
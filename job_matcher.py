@@ -0,0 +1,86 @@
+# job_matcher.py
+import numpy as np
+
+from skill_index import get_skill_index
+from results import JobMatch
+
+
+class JobDescriptionMatrix:
+    """Sparse binary keyword matrix with one row per job description (CSR layout).
+
+    Keywords are the skill and word ids produced by SkillIndex.keyword_terms, so a
+    resume is scored against every row with one gather and one cumulative sum.
+    """
+
+    def __init__(self, job_descriptions):
+        index = get_skill_index()
+        self.labels = []
+        column_of = {}
+        self.terms = []
+        indices = []
+        indptr = [0]
+
+        for position, job in enumerate(job_descriptions):
+            if isinstance(job, dict):
+                label, text = job.get('id', position), job.get('text', '')
+            else:
+                label, text = position, job
+            self.labels.append(label)
+
+            for keyword_id, term in index.keyword_terms(text or '').items():
+                column = column_of.get(keyword_id)
+                if column is None:
+                    column = column_of[keyword_id] = len(self.terms)
+                    self.terms.append(term)
+                indices.append(column)
+            indptr.append(len(indices))
+
+        self.column_of = column_of
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.row_lengths = np.diff(self.indptr)
+        # Skills (non-negative ids) are listed before plain words in missing keywords
+        self.is_skill = np.fromiter((keyword_id >= 0 for keyword_id in column_of), dtype=bool, count=len(column_of))
+
+    def __len__(self):
+        return len(self.labels)
+
+    def resume_vector(self, resume_ids):
+        """Dense boolean vector over the matrix columns for the ids found in a resume"""
+        vector = np.zeros(len(self.terms), dtype=bool)
+        columns = [self.column_of[i] for i in resume_ids if i in self.column_of]
+        vector[columns] = True
+        return vector
+
+    def keyword_match(self, resume_vector):
+        """Fraction of each job description's keywords present in the resume"""
+        hits = np.concatenate(([0], np.cumsum(resume_vector[self.indices], dtype=np.int64)))
+        matches = hits[self.indptr[1:]] - hits[self.indptr[:-1]]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.row_lengths > 0, matches / np.maximum(self.row_lengths, 1), 0.0)
+
+    def missing_keywords(self, row, resume_vector, limit=10):
+        """Keywords of one job description that the resume lacks, skills first"""
+        columns = self.indices[self.indptr[row]:self.indptr[row + 1]]
+        missing = columns[~resume_vector[columns]]
+        missing = np.concatenate((missing[self.is_skill[missing]], missing[~self.is_skill[missing]]))
+        return [self.terms[column] for column in missing[:limit]]
+
+    def rank(self, resume_ids, base_score=0.0, keyword_weight=1.0, limit=None, missing_limit=10):
+        """Rank job descriptions for a resume; base_score holds the JD-independent weighted factors"""
+        vector = self.resume_vector(resume_ids)
+        match = self.keyword_match(vector)
+        ats_scores = np.minimum(100, np.rint((base_score + keyword_weight * match) * 100)).astype(int)
+        order = np.argsort(-match, kind='stable')
+        if limit is not None:
+            order = order[:limit]
+
+        return [
+            JobMatch(
+                job_id=self.labels[row],
+                keyword_match=float(match[row]),
+                ats_score=int(ats_scores[row]),
+                missing_keywords=self.missing_keywords(row, vector, missing_limit)
+            )
+            for row in order
+        ]
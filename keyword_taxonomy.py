@@ -0,0 +1,356 @@
+# keyword_taxonomy.py
+import os
+import re
+import json
+import mmap
+import time
+import struct
+import zlib
+import argparse
+import threading
+from collections.abc import Mapping
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_PATH = os.environ.get('TAXONOMY_SOURCE', os.path.join(BASE_DIR, 'data', 'taxonomy.json'))
+ARTIFACT_PATH = os.environ.get('TAXONOMY_PATH', os.path.join(BASE_DIR, 'data', 'taxonomy.bin'))
+
+# How often (seconds) workers stat the artifact to pick up a rebuilt taxonomy
+RELOAD_INTERVAL = float(os.environ.get('TAXONOMY_RELOAD_INTERVAL', 5))
+
+MAGIC = b'RTAX'
+FORMAT_VERSION = 2
+# magic, format version, roles, terms, industries, hash table slots, longest variant in words, string blob size
+HEADER = struct.Struct('<4sHHIIIII')
+EMPTY_SLOT = 0xFFFFFFFF
+
+
+def _align(size):
+    return (size + 3) & ~3
+
+
+def _hash(variant_bytes):
+    return zlib.crc32(variant_bytes)
+
+
+# Word characters plus trailing + or # so "c++" and "c#" survive tokenization
+TOKEN_PATTERN = re.compile(r'[^\W_]+[+#]*')
+
+
+def tokenize(text):
+    """Lowercase text and split it into the tokens used for keyword matching"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def canonical_forms(variant):
+    """Canonical keys for a surface variant: its tokens joined by spaces, and glued together.
+
+    "Node.js", "node js" and "nodejs" all reduce to "node js" or "nodejs",
+    and "CI/CD" reduces to "ci cd" or "cicd".
+    """
+    tokens = tokenize(variant)
+    if not tokens:
+        return []
+    forms = [' '.join(tokens)]
+    if len(tokens) > 1:
+        forms.append(''.join(tokens))
+    return forms
+
+
+def compile_taxonomy(source):
+    """Compile a taxonomy definition (parsed taxonomy.json) into the binary artifact format.
+
+    Layout, all integers little-endian uint32 and each array 4-byte aligned:
+      header | term offsets | industry name offsets | role name offsets | member list offsets |
+      member term ids | variant hash table (hash, string offset, string length, term id) | string blob
+    """
+    roles = list(source['roles'])
+    industries = list(source['industries'])
+
+    blob = bytearray()
+    term_ids = {}
+    term_offsets = []
+
+    def add_string(text):
+        offset = len(blob)
+        blob.extend(text.encode('utf-8'))
+        return offset
+
+    # Synonyms resolve to their head term, wherever they appear in the industry lists
+    heads = {}
+    for term, synonyms in source.get('synonyms', {}).items():
+        for synonym in synonyms:
+            heads[synonym.lower()] = term.lower()
+
+    def term_id(term):
+        term = heads.get(term.lower(), term.lower())
+        if term not in term_ids:
+            term_ids[term] = len(term_offsets)
+            term_offsets.append(add_string(term))
+        return term_ids[term]
+
+    # Industry membership lists keep their source order, which recommendations rely on
+    member_ids = []
+    list_offsets = [0]
+    for industry in industries:
+        for role in roles:
+            listed = set()
+            for term in source['industries'][industry].get(role, []):
+                tid = term_id(term)
+                if tid not in listed:
+                    listed.add(tid)
+                    member_ids.append(tid)
+            list_offsets.append(len(member_ids))
+    for term in source.get('synonyms', {}):
+        term_id(term)
+    term_offsets.append(len(blob))
+
+    # Every canonical form of every variant (terms and synonyms) points to the head term id.
+    # Exact forms are registered before glued ones so they win any collision.
+    variants = {}
+    surface = list(term_ids.items())
+    surface.extend((synonym, term_id(head)) for synonym, head in heads.items())
+    for glued in (False, True):
+        for text, tid in surface:
+            forms = canonical_forms(text)
+            for form in forms[1:] if glued else forms[:1]:
+                variants.setdefault(form, tid)
+
+    industry_offsets = [add_string(name) for name in industries]
+    industry_offsets.append(len(blob))
+    role_offsets = [add_string(name) for name in roles]
+    role_offsets.append(len(blob))
+
+    # Open-addressing hash table sized to stay at most half full
+    table_size = 8
+    while table_size < len(variants) * 2:
+        table_size *= 2
+    table = [(0, 0, 0, EMPTY_SLOT)] * table_size
+    for variant, tid in variants.items():
+        encoded = variant.encode('utf-8')
+        h = _hash(encoded)
+        slot = h & (table_size - 1)
+        while table[slot][3] != EMPTY_SLOT:
+            slot = (slot + 1) & (table_size - 1)
+        table[slot] = (h, add_string(variant), len(encoded), tid)
+
+    max_words = max((len(v.split()) for v in variants), default=1)
+
+    def pack_u32(values):
+        return struct.pack(f'<{len(values)}I', *values)
+
+    out = bytearray(HEADER.pack(MAGIC, FORMAT_VERSION, len(roles), len(term_ids), len(industries),
+                                table_size, max_words, len(blob)))
+    for array in (term_offsets, industry_offsets, role_offsets, list_offsets, member_ids):
+        out += pack_u32(array)
+    out += pack_u32([value for entry in table for value in entry])
+    out += blob
+    out += b'\0' * (_align(len(out)) - len(out))
+    return bytes(out)
+
+
+class IndustryKeywords(Mapping):
+    """Read-only {industry: [terms]} view over one role of a taxonomy, decoded lazily"""
+
+    def __init__(self, taxonomy, role):
+        self._taxonomy = taxonomy
+        self._role = role
+        self._cache = {}
+
+    def __getitem__(self, industry):
+        if industry not in self._cache:
+            self._cache[industry] = self._taxonomy.industry_terms(industry, self._role)
+        return self._cache[industry]
+
+    def __iter__(self):
+        return iter(self._taxonomy.industries)
+
+    def __len__(self):
+        return len(self._taxonomy.industries)
+
+    def __contains__(self, industry):
+        return industry in self._taxonomy.industry_index
+
+
+class Taxonomy:
+    def __init__(self, buffer, path=None):
+        """Wrap a compiled artifact (an mmap or bytes) without copying its arrays"""
+        self.path = path
+        self._buffer = buffer
+        view = memoryview(buffer)
+        magic, version, n_roles, n_terms, n_industries, table_size, max_words, blob_size = \
+            HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported taxonomy artifact: {magic!r} v{version}")
+
+        # Identifies the compiled content wherever it is loaded, e.g. for keys of cached results
+        self.digest = format(zlib.crc32(buffer), '08x')
+        self.term_count = n_terms
+        self.table_size = table_size
+        self.max_words = max_words
+
+        offset = HEADER.size
+
+        def take(count):
+            nonlocal offset
+            array = view[offset:offset + count * 4].cast('I')
+            offset += count * 4
+            return array
+
+        self._term_offsets = take(n_terms + 1)
+        industry_offsets = take(n_industries + 1)
+        role_offsets = take(n_roles + 1)
+        self._list_offsets = take(n_industries * n_roles + 1)
+        self._member_ids = take(self._list_offsets[-1])
+        self._table = take(table_size * 4)
+        self._blob = view[offset:offset + blob_size]
+
+        self.industries = [self._string(industry_offsets[i], industry_offsets[i + 1]) for i in range(n_industries)]
+        self.roles = [self._string(role_offsets[i], role_offsets[i + 1]) for i in range(n_roles)]
+        self.industry_index = {name: i for i, name in enumerate(self.industries)}
+        self._role_index = {name: i for i, name in enumerate(self.roles)}
+        self._terms = {}
+        self._views = {}
+
+    def _string(self, start, end):
+        return bytes(self._blob[start:end]).decode('utf-8')
+
+    def term(self, term_id):
+        """Canonical term for an id"""
+        term = self._terms.get(term_id)
+        if term is None:
+            term = self._string(self._term_offsets[term_id], self._term_offsets[term_id + 1])
+            self._terms[term_id] = term
+        return term
+
+    def industry_term_ids(self, industry, role):
+        """Member term ids of an industry for a role, in source order"""
+        index = self.industry_index[industry] * len(self.roles) + self._role_index[role]
+        return self._member_ids[self._list_offsets[index]:self._list_offsets[index + 1]]
+
+    def industry_terms(self, industry, role):
+        return [self.term(tid) for tid in self.industry_term_ids(industry, role)]
+
+    def industry_keywords(self, role):
+        """{industry: [terms]} mapping for a role, shared by every caller of this taxonomy"""
+        if role not in self._views:
+            self._views[role] = IndustryKeywords(self, role)
+        return self._views[role]
+
+    def variants(self):
+        """Yield (canonical form, term id) for every entry of the variant table"""
+        table = self._table
+        for slot in range(self.table_size):
+            base = slot * 4
+            tid = table[base + 3]
+            if tid != EMPTY_SLOT:
+                start = table[base + 1]
+                yield self._string(start, start + table[base + 2]), tid
+
+    def lookup(self, variant):
+        """Canonical term id for a surface variant, or None if the variant is unknown"""
+        forms = canonical_forms(variant)
+        if not forms:
+            return None
+        encoded = forms[0].encode('utf-8')
+        h = _hash(encoded)
+        mask = self.table_size - 1
+        slot = h & mask
+        table = self._table
+        while True:
+            base = slot * 4
+            tid = table[base + 3]
+            if tid == EMPTY_SLOT:
+                return None
+            if table[base] == h and table[base + 2] == len(encoded):
+                start = table[base + 1]
+                if self._blob[start:start + len(encoded)] == encoded:
+                    return tid
+            slot = (slot + 1) & mask
+
+
+def build(source_path=SOURCE_PATH, artifact_path=ARTIFACT_PATH):
+    """Compile the JSON taxonomy and atomically replace the artifact so running workers reload it"""
+    with open(source_path) as f:
+        artifact = compile_taxonomy(json.load(f))
+    tmp_path = f"{artifact_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(artifact)
+    os.replace(tmp_path, artifact_path)
+    return len(artifact)
+
+
+def load(artifact_path=ARTIFACT_PATH, source_path=SOURCE_PATH):
+    """Map the compiled artifact read-only so all workers share its pages"""
+    try:
+        with open(artifact_path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return Taxonomy(buffer, artifact_path)
+    except (OSError, ValueError) as e:
+        # No usable artifact (e.g. a dev checkout): compile in memory from the source
+        print(f"Taxonomy artifact unavailable ({e}), compiling {source_path}")
+        with open(source_path) as f:
+            return Taxonomy(compile_taxonomy(json.load(f)))
+
+
+class TaxonomyStore:
+    """Holds the current taxonomy and swaps in a new one when the artifact file changes"""
+
+    def __init__(self, artifact_path=ARTIFACT_PATH, source_path=SOURCE_PATH, reload_interval=RELOAD_INTERVAL):
+        self.artifact_path = artifact_path
+        self.source_path = source_path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._taxonomy = None
+        self._signature = None
+        self._checked_at = 0.0
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.artifact_path)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def get(self):
+        """Return the current taxonomy, reloading it if the artifact was rebuilt"""
+        now = time.monotonic()
+        if self._taxonomy is not None and now - self._checked_at < self.reload_interval:
+            return self._taxonomy
+
+        with self._lock:
+            self._checked_at = now
+            signature = self._file_signature()
+            if self._taxonomy is None or signature != self._signature:
+                # The old taxonomy is left for the garbage collector; requests may still hold it
+                self._taxonomy = load(self.artifact_path, self.source_path)
+                self._signature = signature
+                print(f"Loaded keyword taxonomy ({self._taxonomy.term_count} terms)")
+        return self._taxonomy
+
+
+store = TaxonomyStore()
+
+
+def get_taxonomy():
+    return store.get()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the keyword taxonomy into its binary artifact")
+    parser.add_argument('command', choices=['build', 'show'])
+    parser.add_argument('--source', default=SOURCE_PATH)
+    parser.add_argument('--output', default=ARTIFACT_PATH)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        start = time.perf_counter()
+        size = build(args.source, args.output)
+        print(f"Wrote {args.output} ({size} bytes) in {(time.perf_counter() - start) * 1000:.1f}ms")
+    else:
+        start = time.perf_counter()
+        taxonomy = load(args.output, args.source)
+        print(f"Loaded in {(time.perf_counter() - start) * 1000:.2f}ms: {taxonomy.term_count} terms, "
+              f"roles {taxonomy.roles}")
+        for industry in taxonomy.industries:
+            print(f"{industry}: " + ', '.join(f"{role}={len(taxonomy.industry_term_ids(industry, role))}"
+                                              for role in taxonomy.roles))
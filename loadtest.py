@@ -0,0 +1,249 @@
+# loadtest.py
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+
+from synthetic_corpus import build_corpus
+
+# A level saturates the server once it gets this close to the best throughput seen
+SATURATION_FRACTION = 0.9
+STARTUP_TIMEOUT = 120
+
+
+def multipart_body(path, fields=None):
+    """Encode a resume upload (plus form fields) as multipart/form-data"""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in (fields or {}).items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    with open(path, 'rb') as f:
+        content = f.read()
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="resume"; filename="{os.path.basename(path)}"\r\n'
+        f'Content-Type: application/pdf\r\n\r\n'.encode() + content + b'\r\n'
+    )
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    position = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[position]
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class ServerProcess:
+    """Run the app in a child process: Flask's threaded dev server or gunicorn"""
+
+    def __init__(self, kind='gunicorn', workers=1, threads=1, port=None, env=None):
+        self.kind = kind
+        self.workers = workers
+        self.threads = threads
+        self.port = port or _free_port()
+        # Every load-test client shares one address, so per-client rate limits stay off by default.
+        # The same few files are replayed, so anything that reuses an earlier result is off
+        # too: otherwise every level after the first few requests times cache hits. Shedding
+        # would change the work being measured, and the feature store, cohort analytics and
+        # semantic index would fill the data directory with synthetic resumes.
+        self.env = dict(os.environ, **{'ADMISSION_ENABLED': '0', 'RESULT_CACHE_BACKEND': 'off',
+                                       'SINGLE_FLIGHT_ENABLED': '0', 'DEDUP_ENABLED': '0',
+                                       'ADAPTIVE_QUALITY': '0', 'FEATURE_STORE_ENABLED': '0',
+                                       'ANALYTICS_ENABLED': '0', 'SEMANTIC_INDEX': '0', **(env or {})})
+        self.process = None
+
+    @property
+    def name(self):
+        if self.kind == 'flask':
+            return 'flask'
+        return f'gunicorn {self.workers}w x {self.threads}t'
+
+    def command(self):
+        if self.kind == 'flask':
+            return [sys.executable, '-c',
+                    f"import app; app.warm_up(); app.app.run(host='127.0.0.1', port={self.port}, threaded=True)"]
+        # The production config (preload and warm-up); flags given here override its settings
+        return ['gunicorn', '--config', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{self.port}',
+                '--workers', str(self.workers), '--threads', str(self.threads), '--timeout', '120', 'app:app']
+
+    def start(self):
+        app_dir = os.path.dirname(os.path.abspath(__file__))
+        self.process = subprocess.Popen(self.command(), cwd=app_dir, env=self.env,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"{self.name} exited with code {self.process.returncode}")
+            try:
+                connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=2)
+                connection.request('GET', '/ready')
+                if connection.getresponse().status == 200:
+                    return self
+            except OSError:
+                pass
+            time.sleep(0.25)
+        self.stop()
+        raise RuntimeError(f"{self.name} did not become ready within {STARTUP_TIMEOUT}s")
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+def run_level(port, bodies, concurrency, duration, timeout=120):
+    """Keep `concurrency` clients posting resumes for `duration` seconds"""
+    latencies = []
+    errors = {}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client(offset):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+        i = offset
+        while time.monotonic() < stop_at:
+            body, content_type = bodies[i % len(bodies)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                connection.request('POST', '/analyze', body=body, headers={'Content-Type': content_type})
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+                status = type(e).__name__
+            elapsed = time.perf_counter() - start
+            with lock:
+                if status == 200:
+                    latencies.append(elapsed)
+                else:
+                    errors[str(status)] = errors.get(str(status), 0) + 1
+        connection.close()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    total = len(latencies) + sum(errors.values())
+    return {
+        'concurrency': concurrency,
+        'requests': total,
+        'throughput_rps': round(len(latencies) / wall, 2),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 1),
+        'p90_ms': round(percentile(latencies, 0.90) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+        'error_rate': round(sum(errors.values()) / total, 4) if total else 0.0,
+        'errors': errors
+    }
+
+
+def saturation_point(levels):
+    """Lowest concurrency whose throughput is within SATURATION_FRACTION of the peak"""
+    if not levels:
+        return None
+    peak = max(level['throughput_rps'] for level in levels)
+    for level in levels:
+        if level['throughput_rps'] >= SATURATION_FRACTION * peak:
+            return {'concurrency': level['concurrency'], 'throughput_rps': level['throughput_rps'],
+                    'p99_ms': level['p99_ms'], 'peak_rps': peak}
+
+
+def parse_config(spec):
+    """'flask' or 'gunicorn:WORKERSxTHREADS' (e.g. gunicorn:4x2)"""
+    if spec == 'flask':
+        return ServerProcess('flask')
+    kind, _, shape = spec.partition(':')
+    if kind != 'gunicorn':
+        raise argparse.ArgumentTypeError(f"unknown server config '{spec}'")
+    workers, _, threads = (shape or '1x1').partition('x')
+    return ServerProcess('gunicorn', int(workers), int(threads or 1))
+
+
+def run_sweep(server, bodies, levels, duration, warmup=1):
+    print(f"\n=== {server.name} ===")
+    server.start()
+    try:
+        # Let every worker load its models before measuring
+        run_level(server.port, bodies, max(1, server.workers * server.threads), warmup)
+        results = []
+        print(f"{'conc':>5} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for concurrency in levels:
+            level = run_level(server.port, bodies, concurrency, duration)
+            results.append(level)
+            print(f"{concurrency:>5} {level['throughput_rps']:>8.2f} {level['p50_ms']:>8.1f} "
+                  f"{level['p90_ms']:>8.1f} {level['p99_ms']:>8.1f} {level['error_rate']:>7.1%}")
+    finally:
+        server.stop()
+    saturation = saturation_point(results)
+    if saturation:
+        print(f"saturates at concurrency {saturation['concurrency']} "
+              f"({saturation['throughput_rps']} of {saturation['peak_rps']} req/s peak)")
+    return {'server': server.name, 'levels': results, 'saturation': saturation}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive /analyze under increasing concurrency")
+    parser.add_argument('--config', type=parse_config, action='append', dest='configs',
+                        help="Server to test: flask or gunicorn:WORKERSxTHREADS; repeat to compare")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--duration', type=float, default=10, help="Seconds per concurrency level")
+    parser.add_argument('--corpus', default=None, help="Directory of PDFs (default: synthetic corpus)")
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 2], help="Synthetic resume sizes")
+    parser.add_argument('--industry', default=None)
+    parser.add_argument('--job-description', default=None, help="Path to a job description text file")
+    parser.add_argument('-o', '--output', default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    fields = {}
+    if args.industry:
+        fields['industry'] = args.industry
+    if args.job_description:
+        with open(args.job_description) as f:
+            fields['job_description'] = f.read()
+
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        if args.corpus:
+            paths = sorted(os.path.join(args.corpus, n) for n in os.listdir(args.corpus) if n.lower().endswith('.pdf'))
+        else:
+            paths = [p for group in build_corpus(corpus_dir, args.pages, per_size=3).values() for p in group]
+        bodies = [multipart_body(path, fields) for path in paths]
+        print(f"{len(bodies)} resume(s) in the request mix")
+
+        report = [run_sweep(server, bodies, args.concurrency, args.duration)
+                  for server in (args.configs or [ServerProcess('gunicorn', 1, 1)])]
+
+    print("\n=== comparison ===")
+    print(f"{'server':<22} {'peak req/s':>11} {'saturates at':>13} {'p99 there ms':>13}")
+    for entry in report:
+        saturation = entry['saturation'] or {}
+        print(f"{entry['server']:<22} {saturation.get('peak_rps', 0):>11.2f} "
+              f"{saturation.get('concurrency', '-'):>13} {saturation.get('p99_ms', 0):>13.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
@@ -0,0 +1,210 @@
+# memory_profile.py
+import os
+import resource
+import tempfile
+import argparse
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+import metrics
+
+# Opt-in: tracemalloc slows allocation-heavy code down noticeably
+ENABLED = os.environ.get('MEMORY_PROFILE', '0') == '1'
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KB (ru_maxrss is KB on Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def current_rss_kb():
+    """Current resident set size of this process in KB"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except OSError:
+        return peak_rss_kb()
+
+
+def process_memory(pid='self'):
+    """RSS, PSS and USS (private pages) of a process in KB, from /proc/<pid>/smaps_rollup.
+
+    USS is what a forked worker really costs: pages still shared with the master
+    copy-on-write count towards RSS but not USS.
+    """
+    fields = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == 'kB':
+                    fields[parts[0].rstrip(':')] = int(parts[1])
+    except OSError:
+        return {'rss_kb': peak_rss_kb() if pid == 'self' else 0, 'pss_kb': None, 'uss_kb': None}
+    return {
+        'rss_kb': fields.get('Rss', 0),
+        'pss_kb': fields.get('Pss', 0),
+        'uss_kb': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    }
+
+
+def child_pids(pid):
+    """Direct children of a process, e.g. the workers of a gunicorn master"""
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # The command name may contain spaces; the parent pid follows its closing paren
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def worker_memory_report(master_pid):
+    """Memory of a pre-fork server's master and each of its workers"""
+    return {
+        'master': dict(process_memory(master_pid), pid=master_pid),
+        'workers': [dict(process_memory(pid), pid=pid) for pid in child_pids(master_pid)]
+    }
+
+
+class MemoryProfiler:
+    """Record per-stage allocation deltas and peaks with tracemalloc.
+
+    tracemalloc is process wide, so with several request threads per worker the
+    numbers for overlapping requests include each other's allocations.
+    """
+
+    def __init__(self):
+        self.stages = []
+        self._stack = []
+        self._started_tracing = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        return self
+
+    def stop(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def _note_peak(self):
+        # tracemalloc has a single peak counter, so share it with every open stage
+        _, peak = tracemalloc.get_traced_memory()
+        for frame in self._stack:
+            frame['peak'] = max(frame['peak'], peak)
+
+    @contextmanager
+    def stage(self, name):
+        """Measure the memory allocated and the peak reached while the block runs"""
+        if not tracemalloc.is_tracing():
+            yield
+            return
+
+        self._note_peak()
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        frame = {'peak': before}
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._note_peak()
+            self._stack.pop()
+            after, _ = tracemalloc.get_traced_memory()
+            self.stages.append({
+                'stage': name,
+                'allocated_kb': round((after - before) / 1024, 1),
+                'peak_kb': round((frame['peak'] - before) / 1024, 1)
+            })
+
+    def report(self):
+        """Summarize the recorded stages together with process RSS"""
+        return {
+            'stages': list(self.stages),
+            'peak_kb': max((s['peak_kb'] for s in self.stages), default=0),
+            'rss_kb': current_rss_kb(),
+            'peak_rss_kb': peak_rss_kb()
+        }
+
+    def emit(self, label=''):
+        """Log the report and push it to the metrics registry"""
+        report = self.report()
+        stages = ', '.join(f"{s['stage']}=+{s['allocated_kb']}KB/peak {s['peak_kb']}KB" for s in report['stages'])
+        print(f"Memory profile {label}: {stages}; rss={report['rss_kb']}KB peak_rss={report['peak_rss_kb']}KB")
+
+        for s in report['stages']:
+            metrics.observe('analysis_stage_allocated_bytes', s['allocated_kb'] * 1024, {'stage': s['stage']})
+            metrics.observe('analysis_stage_peak_bytes', s['peak_kb'] * 1024, {'stage': s['stage']})
+        metrics.set_gauge('process_resident_memory_bytes', report['rss_kb'] * 1024)
+        metrics.set_gauge('process_peak_resident_memory_bytes', report['peak_rss_kb'] * 1024)
+        return report
+
+
+def profile_stage(profiler, name):
+    """Return the profiler's stage context, or a no-op when profiling is off"""
+    if profiler is None:
+        return nullcontext()
+    return profiler.stage(name)
+
+
+def run_corpus(page_counts, per_size, target_industry=None):
+    """Profile calculate_ats_score over the synthetic corpus, grouped by document size"""
+    from ats_analyzer import ATSScoreAnalyzer
+    from synthetic_corpus import build_corpus
+
+    analyzer = ATSScoreAnalyzer()
+    results = {}
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        corpus = build_corpus(corpus_dir, page_counts, per_size)
+        for pages, paths in corpus.items():
+            reports = []
+            for path in paths:
+                profiler = MemoryProfiler().start()
+                try:
+                    analyzer.calculate_ats_score(path, target_industry=target_industry, profiler=profiler)
+                finally:
+                    profiler.stop()
+                reports.append(profiler.report())
+            results[pages] = reports
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-stage memory profile of the analysis pipeline")
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 2, 4, 8], help="Document sizes in pages")
+    parser.add_argument('--count', type=int, default=3, help="Documents per size")
+    parser.add_argument('--industry', default='software_development')
+    parser.add_argument('--gunicorn', type=int, metavar='MASTER_PID', default=None,
+                        help="Instead of profiling, report RSS/PSS/USS of a running gunicorn's workers")
+    args = parser.parse_args()
+
+    if args.gunicorn:
+        report = worker_memory_report(args.gunicorn)
+        print(f"{'process':<16} {'rss KB':>10} {'pss KB':>10} {'uss KB':>10}")
+        for name, entry in [('master', report['master'])] + [(f"worker {w['pid']}", w) for w in report['workers']]:
+            print(f"{name:<16} {entry['rss_kb']:>10} {entry['pss_kb']:>10} {entry['uss_kb']:>10}")
+        if report['workers']:
+            uss = sum(w['uss_kb'] for w in report['workers']) / len(report['workers'])
+            print(f"mean worker USS: {uss:.0f} KB")
+        raise SystemExit
+
+    results = run_corpus(args.pages, args.count, args.industry)
+    for pages, reports in results.items():
+        print(f"\n--- {pages} page(s), {len(reports)} document(s) ---")
+        stage_names = [s['stage'] for s in reports[0]['stages']]
+        print(f"{'stage':<34} {'alloc KB':>10} {'peak KB':>10}")
+        for index, name in enumerate(stage_names):
+            allocated = sum(r['stages'][index]['allocated_kb'] for r in reports) / len(reports)
+            peak = max(r['stages'][index]['peak_kb'] for r in reports)
+            print(f"{name:<34} {allocated:>10.1f} {peak:>10.1f}")
+        print(f"{'rss after size (KB)':<34} {reports[-1]['rss_kb']:>10}")
+        print(f"{'peak rss (KB)':<34} {reports[-1]['peak_rss_kb']:>10}")
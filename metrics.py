@@ -0,0 +1,67 @@
+# metrics.py
+import threading
+
+# Process-local metrics registry, rendered in Prometheus text format by the /metrics endpoint
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_summaries = {}
+
+
+def _key(name, labels):
+    return (name, tuple(sorted((labels or {}).items())))
+
+
+def increment(name, value=1, labels=None):
+    """Add to a monotonically increasing counter"""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name, value, labels=None):
+    """Set a gauge to its current value"""
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(name, value, labels=None):
+    """Record one observation in a summary (count, sum and max)"""
+    key = _key(name, labels)
+    with _lock:
+        summary = _summaries.setdefault(key, {'count': 0, 'sum': 0.0, 'max': float('-inf')})
+        summary['count'] += 1
+        summary['sum'] += value
+        summary['max'] = max(summary['max'], value)
+
+
+def snapshot():
+    """Return a copy of all metrics as plain dictionaries"""
+    with _lock:
+        return {
+            'counters': dict(_counters),
+            'gauges': dict(_gauges),
+            'summaries': {key: dict(summary) for key, summary in _summaries.items()}
+        }
+
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + list((extra or {}).items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+
+def render_prometheus():
+    """Render the registry in the Prometheus text exposition format"""
+    data = snapshot()
+    lines = []
+    for (name, labels), value in sorted(data['counters'].items()):
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+    for (name, labels), value in sorted(data['gauges'].items()):
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+    for (name, labels), summary in sorted(data['summaries'].items()):
+        lines.append(f"{name}_count{_format_labels(labels)} {summary['count']}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {summary['sum']}")
+        lines.append(f"{name}_max{_format_labels(labels)} {summary['max']}")
+    return '\n'.join(lines) + '\n'
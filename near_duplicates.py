@@ -0,0 +1,303 @@
+# near_duplicates.py
+import os
+import time
+import zlib
+import sqlite3
+import hashlib
+import argparse
+import threading
+
+import numpy as np
+
+import metrics
+
+DB_PATH = os.environ.get('DEDUP_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data',
+                                                    'near_duplicates.sqlite3'))
+# Flag resumes that closely match an earlier upload (opt-in: it keeps every upload's
+# filename and signature on disk)
+ENABLED = os.environ.get('DEDUP_ENABLED', '0') == '1'
+# Estimated Jaccard similarity above which two resumes count as near-duplicates
+SIMILARITY_THRESHOLD = float(os.environ.get('DEDUP_THRESHOLD', 0.85))
+# Stricter bar for handing back a stored analysis instead of running a new one
+REUSE_THRESHOLD = float(os.environ.get('DEDUP_REUSE_THRESHOLD', 0.97))
+REUSE_ENABLED = os.environ.get('DEDUP_REUSE', '0') == '1'
+# Only the most recent uploads are kept; older ones are pruned every PRUNE_INTERVAL additions
+MAX_DOCUMENTS = int(os.environ.get('DEDUP_MAX_DOCUMENTS', 100000))
+PRUNE_INTERVAL = 200
+
+SHINGLE_SIZE = 3
+NUM_PERM = 128
+# 16 bands of 8 rows: pairs near 0.85 similarity collide in some band ~97% of the time
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Candidates sharing the most bands are verified first; a template reused hundreds
+# of times would otherwise make every lookup compare against all of its copies
+MAX_CANDIDATES = 32
+
+_PRIME = 4294967291  # largest prime below 2**32
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+
+def shingles(processed_text, size=SHINGLE_SIZE):
+    """Hashes of the overlapping word n-grams of text already cleaned by preprocess_text"""
+    words = processed_text.split()
+    if len(words) < size:
+        return {zlib.crc32(' '.join(words).encode())} if words else set()
+    return {zlib.crc32(' '.join(words[i:i + size]).encode()) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """MinHash over shingle hashes with NUM_PERM universal hash functions (a*x + b mod p)"""
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        rng = np.random.RandomState(seed)
+        # a < 2**31 keeps a * x + b inside uint64 for 32-bit x and b
+        self.a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_hashes):
+        """uint32 signature; an empty document gets the all-max signature"""
+        if not shingle_hashes:
+            return np.full(len(self.a), _MAX_HASH, dtype=np.uint32)
+        values = np.fromiter(shingle_hashes, dtype=np.uint64, count=len(shingle_hashes))
+        hashed = (np.outer(values, self.a) + self.b) % np.uint64(_PRIME)
+        return hashed.min(axis=0).astype(np.uint32)
+
+
+def band_keys(signature):
+    """One 64-bit key per band of ROWS signature values"""
+    keys = []
+    for band in range(BANDS):
+        digest = hashlib.blake2b(signature[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'little', signed=True))
+    return keys
+
+
+class NearDuplicateIndex:
+    """Banded MinHash LSH index kept in a local SQLite file.
+
+    Each document is stored once with its signature and under one (band, key) row
+    per band; a lookup is BANDS primary-key probes plus a signature comparison for
+    the few candidates that collide, so it stays flat as the index grows. Documents
+    added as a near-duplicate of an earlier one are not banded themselves, so a
+    template submitted hundreds of times is still found through one representative.
+    """
+
+    def __init__(self, path=DB_PATH, threshold=SIMILARITY_THRESHOLD, max_documents=MAX_DOCUMENTS):
+        self.path = path
+        self.threshold = threshold
+        self.max_documents = max_documents
+        self._added = 0
+        self.hasher = MinHasher()
+        self._local = threading.local()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connect()
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript('''
+                CREATE TABLE IF NOT EXISTS documents (
+                    id INTEGER PRIMARY KEY,
+                    label TEXT,
+                    options TEXT,
+                    duplicate_of INTEGER,
+                    signature BLOB NOT NULL,
+                    created REAL NOT NULL,
+                    result BLOB
+                );
+                CREATE TABLE IF NOT EXISTS bands (
+                    band INTEGER NOT NULL,
+                    key INTEGER NOT NULL,
+                    document_id INTEGER NOT NULL,
+                    PRIMARY KEY (band, key, document_id)
+                ) WITHOUT ROWID;
+            ''')
+            self._local.connection = connection
+        return connection
+
+    def signature(self, processed_text):
+        return self.hasher.signature(shingles(processed_text))
+
+    def query(self, signature, threshold=None):
+        """Stored documents similar to the signature as (id, similarity), most similar first"""
+        threshold = self.threshold if threshold is None else threshold
+        connection = self._connect()
+        keys = band_keys(signature)
+        placeholders = ' OR '.join(['(band = ? AND key = ?)'] * BANDS)
+        params = [value for band, key in enumerate(keys) for value in (band, key)]
+        rows = connection.execute(
+            f'SELECT document_id FROM bands WHERE {placeholders} '
+            'GROUP BY document_id ORDER BY COUNT(*) DESC LIMIT ?', params + [MAX_CANDIDATES]
+        ).fetchall()
+        if not rows:
+            return []
+
+        ids = [row[0] for row in rows]
+        candidates = connection.execute(
+            f"SELECT id, signature FROM documents WHERE id IN ({','.join('?' * len(ids))})", ids
+        ).fetchall()
+        signatures = np.frombuffer(b''.join(blob for _, blob in candidates), dtype=np.uint32)
+        similarities = (signatures.reshape(len(candidates), -1) == signature).mean(axis=1)
+        matches = [(candidates[i][0], float(similarities[i]))
+                   for i in np.argsort(-similarities, kind='stable') if similarities[i] >= threshold]
+        return matches
+
+    def add(self, signature, label=None, options=None, result=None, duplicate_of=None):
+        """Store a document and return its id; result is an optional serialized analysis"""
+        connection = self._connect()
+        with connection:
+            cursor = connection.execute(
+                'INSERT INTO documents (label, options, duplicate_of, signature, created, result) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (label, options, duplicate_of, signature.astype(np.uint32).tobytes(), time.time(), result)
+            )
+            document_id = cursor.lastrowid
+            if duplicate_of is None:
+                connection.executemany(
+                    'INSERT OR IGNORE INTO bands (band, key, document_id) VALUES (?, ?, ?)',
+                    [(band, key, document_id) for band, key in enumerate(band_keys(signature))]
+                )
+        self._added += 1
+        if self._added % PRUNE_INTERVAL == 0:
+            self.prune()
+        return document_id
+
+    def prune(self, max_documents=None):
+        """Drop all but the max_documents most recently added documents and their bands.
+
+        A cluster whose representative is dropped keeps its newest surviving member as
+        the new, banded representative, and the other survivors point at that one.
+        """
+        max_documents = self.max_documents if max_documents is None else max_documents
+        connection = self._connect()
+        with connection:
+            newest = connection.execute('SELECT MAX(id) FROM documents').fetchone()[0]
+            if newest is None or newest <= max_documents:
+                return 0
+            cutoff = newest - max_documents
+            # Band rows are found by primary key from each signature, so no extra index is kept
+            evicted = connection.execute(
+                'SELECT id, signature FROM documents WHERE id <= ? AND duplicate_of IS NULL', (cutoff,)
+            ).fetchall()
+            connection.executemany(
+                'DELETE FROM bands WHERE band = ? AND key = ? AND document_id = ?',
+                [(band, key, document_id) for document_id, blob in evicted
+                 for band, key in enumerate(band_keys(np.frombuffer(blob, dtype=np.uint32)))]
+            )
+            # Representatives are older than their duplicates, so orphans are all past the cutoff
+            orphans = connection.execute(
+                'SELECT id, duplicate_of, signature FROM documents WHERE id > ? AND duplicate_of <= ?',
+                (cutoff, cutoff)
+            ).fetchall()
+            successors = {}
+            for document_id, representative, blob in orphans:
+                if document_id > successors.get(representative, (0, None))[0]:
+                    successors[representative] = (document_id, blob)
+            connection.executemany(
+                'UPDATE documents SET duplicate_of = ? WHERE id = ?',
+                [(None if successors[representative][0] == document_id else successors[representative][0],
+                  document_id) for document_id, representative, _ in orphans]
+            )
+            connection.executemany(
+                'INSERT OR IGNORE INTO bands (band, key, document_id) VALUES (?, ?, ?)',
+                [(band, key, document_id) for document_id, blob in successors.values()
+                 for band, key in enumerate(band_keys(np.frombuffer(blob, dtype=np.uint32)))]
+            )
+            removed = connection.execute('DELETE FROM documents WHERE id <= ?', (cutoff,)).rowcount
+        return removed
+
+    def label(self, document_id):
+        row = self._connect().execute('SELECT label FROM documents WHERE id = ?', (document_id,)).fetchone()
+        return row[0] if row else None
+
+    def stored_result(self, document_id, options=None):
+        """Serialized analysis stored for a document, if it was analyzed with the same options"""
+        row = self._connect().execute(
+            'SELECT result FROM documents WHERE id = ? AND options IS ?', (document_id, options)
+        ).fetchone()
+        return row[0] if row else None
+
+    def check(self, processed_text, options=None, reuse=REUSE_ENABLED):
+        """Look a document up before analysis.
+
+        Returns (signature, nearest match or None, reusable serialized result or None).
+        """
+        signature = self.signature(processed_text)
+        matches = self.query(signature)
+        if not matches:
+            return signature, None, None
+
+        document_id, similarity = matches[0]
+        metrics.increment('near_duplicates_total')
+        result = None
+        if reuse and similarity >= REUSE_THRESHOLD:
+            result = self.stored_result(document_id, options)
+            if result is not None:
+                metrics.increment('near_duplicate_reuses_total')
+        return signature, {'documentId': document_id, 'similarity': round(similarity, 3)}, result
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+
+_lock = threading.Lock()
+_index = None
+
+
+def get_index():
+    """Process-wide index on DB_PATH, opened on first use"""
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                _index = NearDuplicateIndex()
+    return _index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or benchmark the near-duplicate index")
+    parser.add_argument('command', choices=['stats', 'bench'])
+    parser.add_argument('--documents', type=int, default=100000, help="Synthetic documents for bench")
+    args = parser.parse_args()
+
+    if args.command == 'stats':
+        print(f"{DB_PATH}: {len(get_index())} document(s), threshold {SIMILARITY_THRESHOLD}")
+    else:
+        import random
+        import tempfile
+        from synthetic_corpus import generate_resume_lines
+
+        with tempfile.TemporaryDirectory() as directory:
+            index = NearDuplicateIndex(os.path.join(directory, 'bench.sqlite3'))
+            base = [' '.join(generate_resume_lines(seed=seed)).lower() for seed in range(50)]
+            rng = random.Random(0)
+
+            def variant(i, edits):
+                words = base[i % len(base)].split()
+                for _ in range(len(words) // edits):
+                    words[rng.randrange(len(words))] = f"w{rng.randrange(1 << 30)}"
+                return ' '.join(words)
+
+            # Half the documents are light edits (one word in two hundred) of a few templates,
+            # the other half are rewritten enough to be distinct from everything else
+            start = time.perf_counter()
+            signatures = [index.signature(variant(i, 200 if i % 2 else 2)) for i in range(args.documents)]
+            print(f"signatures: {(time.perf_counter() - start) / args.documents * 1000:.3f}ms each")
+
+            start = time.perf_counter()
+            for i, signature in enumerate(signatures):
+                matches = index.query(signature)
+                index.add(signature, label=str(i), duplicate_of=matches[0][0] if matches else None)
+            print(f"query + insert: {(time.perf_counter() - start) / args.documents * 1000:.3f}ms each")
+
+            # Fresh light edits of the copied templates, never inserted themselves
+            probes = [index.signature(variant(i, 200)) for i in range(1, 2000, 2)]
+            start = time.perf_counter()
+            found = sum(1 for signature in probes if index.query(signature))
+            print(f"query: {(time.perf_counter() - start) / len(probes) * 1000:.3f}ms each, "
+                  f"{found}/{len(probes)} found a near-duplicate, index size {len(index)}")
@@ -0,0 +1,147 @@
+# pdf_layout.py
+import re
+from collections import Counter
+
+from results import LayoutFacts
+
+# Text fragments whose baselines are this close (in points) share a line
+LINE_TOLERANCE = 3.0
+# Column starts within this distance (in points) count as aligned
+ALIGN_TOLERANCE = 3.0
+# Digits are dropped before comparing header/footer lines, so page numbers still match
+_DIGITS = re.compile(r'\d+')
+_SUBSET_PREFIX = re.compile(r'^[A-Z]{6}\+')
+# Weight, style and PostScript/Monotype suffixes that name a face of a family, not another
+# family: 'TimesNewRomanPS-BoldMT', 'TimesNewRomanPSMT' and 'Arial Bold' are one family each
+_FACE_SUFFIXES = re.compile(r'(?:ps|mt|bold|italic|oblique|regular|light|medium|semibold|demibold|black|heavy'
+                            r'|condensed|narrow)+$')
+
+
+def font_family(base_font):
+    """'ABCDEF+Calibri-BoldItalic' -> 'calibri', 'TimesNewRomanPS-BoldMT' -> 'timesnewroman'"""
+    name = _SUBSET_PREFIX.sub('', str(base_font).lstrip('/'))
+    family = re.split(r'[-,]', name)[0].replace(' ', '').lower()
+    return _FACE_SUFFIXES.sub('', family) or family
+
+
+def _repeats(lines, page_count):
+    """Whether the same top (or bottom) line appears on more than one page"""
+    return page_count > 1 and bool(lines) and lines.most_common(1)[0][1] > 1
+
+
+class LayoutCollector:
+    """Collect layout facts through PyPDF2's extract_text visitor callbacks.
+
+    Text positions, drawing operators and page resources are recorded during the
+    same content-stream pass that produces the text, so formatting checks can read
+    facts instead of re-scanning the flattened text.
+    """
+
+    def __init__(self):
+        self.fonts = set()
+        self.image_count = 0
+        self.rules = 0
+        self.curves = 0
+        self.pages = []
+        self._lines = None
+
+    def visit(self, page):
+        """Start a page and return the visitor keyword arguments for page.extract_text"""
+        box = page.mediabox
+        self._width = float(box.width) or 612.0
+        self._lines = {}
+        self.pages.append({'width': self._width, 'lines': self._lines})
+        self._collect_resources(page.get('/Resources'))
+        return {'visitor_text': self._text, 'visitor_operand_before': self._operator}
+
+    def _collect_resources(self, resources, depth=0):
+        if resources is None or depth > 2:
+            return
+        resources = resources.get_object()
+        fonts = resources.get('/Font')
+        if fonts is not None:
+            for font in fonts.get_object().values():
+                base_font = font.get_object().get('/BaseFont')
+                if base_font:
+                    self.fonts.add(font_family(base_font))
+        xobjects = resources.get('/XObject')
+        if xobjects is not None:
+            for xobject in xobjects.get_object().values():
+                xobject = xobject.get_object()
+                subtype = xobject.get('/Subtype')
+                if subtype == '/Image':
+                    self.image_count += 1
+                elif subtype == '/Form':
+                    # Logos and charts are often wrapped in form XObjects
+                    self._collect_resources(xobject.get('/Resources'), depth + 1)
+
+    def _text(self, text, cm, tm, font, size):
+        text = text.strip()
+        if not text:
+            return
+        x = tm[4] * cm[0] + tm[5] * cm[2] + cm[4]
+        y = tm[4] * cm[1] + tm[5] * cm[3] + cm[5]
+        self._lines.setdefault(round(y / LINE_TOLERANCE), []).append((x, text))
+
+    def _operator(self, operator, operands, cm, tm):
+        if operator == b're' or operator == b'l':
+            self.rules += 1
+        elif operator == b'c' or operator == b'v' or operator == b'y':
+            self.curves += 1
+
+    def facts(self):
+        """Summarize the collected pages into a LayoutFacts record"""
+        column_lines = 0
+        table_rows = 0
+        isolated_blocks = 0
+        tops = Counter()
+        bottoms = Counter()
+
+        for page in self.pages:
+            width = page['width']
+            lines = [sorted(page['lines'][key]) for key in sorted(page['lines'], reverse=True)]
+            if not lines:
+                continue
+            tops[_DIGITS.sub('', ' '.join(t for _, t in lines[0])).lower()] += 1
+            bottoms[_DIGITS.sub('', ' '.join(t for _, t in lines[-1])).lower()] += 1
+
+            # Two columns: text starting near the left margin and again past the middle
+            for fragments in lines:
+                xs = [x for x, _ in fragments]
+                if xs[0] < 0.4 * width and xs[-1] > 0.5 * width:
+                    column_lines += 1
+
+            # Tables: runs of three or more rows with three or more cells aligned to the row above
+            run = 0
+            previous = None
+            for fragments in lines:
+                xs = [x for x, _ in fragments]
+                aligned = previous is not None and len(xs) >= 3 and sum(
+                    1 for x in xs if any(abs(x - p) <= ALIGN_TOLERANCE for p in previous)) >= 3
+                run = run + 1 if aligned else 0
+                if run == 2:
+                    table_rows += 3
+                elif run > 2:
+                    table_rows += 1
+                previous = xs
+
+            # Text boxes: short lone fragments away from every common left margin
+            margins = [x for x, _ in Counter(round(f[0][0]) for f in lines).most_common(3)]
+            for fragments in lines:
+                x, text = fragments[0]
+                if len(fragments) == 1 and len(text) <= 20 and all(abs(x - m) > ALIGN_TOLERANCE for m in margins):
+                    isolated_blocks += 1
+
+        page_count = len(self.pages)
+        return LayoutFacts(
+            page_count=page_count,
+            fonts=sorted(self.fonts),
+            image_count=self.image_count,
+            column_lines=column_lines,
+            table_rows=table_rows,
+            isolated_blocks=isolated_blocks,
+            repeated_header=_repeats(tops, page_count),
+            repeated_footer=_repeats(bottoms, page_count),
+            vector_rules=self.rules,
+            vector_curves=self.curves
+        )
@@ -0,0 +1,166 @@
+# pdf_preflight.py
+import os
+import PyPDF2
+
+# Limits can be tuned per deployment through environment variables
+MAX_FILE_BYTES = int(os.environ.get('PREFLIGHT_MAX_BYTES', 8 * 1024 * 1024))
+MAX_PAGES = int(os.environ.get('PREFLIGHT_MAX_PAGES', 50))
+MAX_OBJECTS = int(os.environ.get('PREFLIGHT_MAX_OBJECTS', 50000))
+EXTRACT_PAGES = int(os.environ.get('PREFLIGHT_EXTRACT_PAGES', 10))
+SAMPLE_PAGES = int(os.environ.get('PREFLIGHT_SAMPLE_PAGES', 3))
+# Page tree nodes walked while sampling pages, so a malformed tree can't pin a worker
+MAX_TREE_NODES = int(os.environ.get('PREFLIGHT_MAX_TREE_NODES', 1000))
+
+# Error codes returned to clients, with the HTTP status used for each
+ERROR_STATUS = {
+    'pdf_too_large': 413,
+    'pdf_too_many_pages': 422,
+    'pdf_too_many_objects': 422,
+    'pdf_encrypted': 422,
+    'pdf_image_only': 422,
+    'pdf_unreadable': 422,
+}
+
+
+class PDFPreflight:
+    def __init__(self, max_bytes=None, max_pages=None, max_objects=None, extract_pages=None,
+                 sample_pages=None):
+        self.max_bytes = MAX_FILE_BYTES if max_bytes is None else max_bytes
+        self.max_pages = MAX_PAGES if max_pages is None else max_pages
+        self.max_objects = MAX_OBJECTS if max_objects is None else max_objects
+        self.extract_pages = EXTRACT_PAGES if extract_pages is None else extract_pages
+        self.sample_pages = SAMPLE_PAGES if sample_pages is None else sample_pages
+
+    def inspect(self, pdf_path):
+        """Read the trailer, xref and page tree root of a PDF without touching content streams"""
+        report = {
+            'file_size': os.path.getsize(pdf_path),
+            'page_count': None,
+            'object_count': None,
+            'encrypted': False,
+            'font_count': 0,
+            'image_count': 0,
+            'content_hint': 'unknown',
+        }
+
+        # Don't even open oversized files
+        if report['file_size'] > self.max_bytes:
+            return report
+
+        with open(pdf_path, 'rb') as file:
+            reader = PyPDF2.PdfReader(file, strict=False)
+            trailer = reader.trailer
+
+            report['object_count'] = int(trailer.get('/Size', 0))
+            report['encrypted'] = '/Encrypt' in trailer
+            if report['encrypted']:
+                # Documents with an empty user password can still be read
+                try:
+                    if not reader.decrypt(''):
+                        return report
+                except Exception:
+                    return report
+                report['encrypted'] = False
+
+            # Kept as a reference so the walk below can recognise nodes it has already seen
+            page_tree_ref = trailer['/Root'].raw_get('/Pages')
+            report['page_count'] = int(page_tree_ref.get_object().get('/Count', 0))
+
+            # Look at the resources of the first few pages to guess whether there is any text
+            for page in self._first_pages(page_tree_ref, self.sample_pages):
+                resources = page.get('/Resources')
+                resources = resources.get_object() if resources is not None else {}
+                fonts = resources.get('/Font')
+                if fonts is not None:
+                    report['font_count'] += len(fonts.get_object())
+                xobjects = resources.get('/XObject')
+                if xobjects is not None:
+                    for xobject in xobjects.get_object().values():
+                        if xobject.get_object().get('/Subtype') == '/Image':
+                            report['image_count'] += 1
+
+        if report['font_count']:
+            report['content_hint'] = 'text'
+        elif report['image_count']:
+            report['content_hint'] = 'image_only'
+        else:
+            report['content_hint'] = 'empty'
+
+        return report
+
+    def _first_pages(self, node, limit):
+        """Walk the page tree depth-first and yield at most `limit` leaf pages.
+        
+        Raises ValueError on a tree that refers back to itself or has more than
+        MAX_TREE_NODES nodes.
+        """
+        stack = [(node, None)]
+        visited = set()
+        found = 0
+        while stack and found < limit:
+            node, inherited = stack.pop()
+            node_id = (node.idnum, node.generation) if hasattr(node, 'idnum') else id(node)
+            if node_id in visited:
+                raise ValueError("PDF page tree contains a cycle")
+            visited.add(node_id)
+            if len(visited) > MAX_TREE_NODES:
+                raise ValueError(f"PDF page tree has more than {MAX_TREE_NODES} nodes")
+            node = node.get_object()
+            resources = node.get('/Resources', inherited)
+            if node.get('/Type') == '/Pages':
+                kids = node.get('/Kids', [])
+                for kid in reversed(kids):
+                    stack.append((kid, resources))
+            else:
+                if '/Resources' not in node and resources is not None:
+                    node = dict(node)
+                    node['/Resources'] = resources
+                found += 1
+                yield node
+
+    def evaluate(self, report):
+        """Decide whether a document should be rejected, downgraded or analyzed in full"""
+        if report['file_size'] > self.max_bytes:
+            return _rejection('pdf_too_large', f"PDF is larger than {self.max_bytes // (1024 * 1024)}MB.")
+        if report['encrypted']:
+            return _rejection('pdf_encrypted', "PDF is password protected, please upload an unlocked file.")
+        if report['object_count'] and report['object_count'] > self.max_objects:
+            return _rejection('pdf_too_many_objects', "PDF structure is too complex to analyze.")
+        if report['page_count'] and report['page_count'] > self.max_pages:
+            return _rejection('pdf_too_many_pages',
+                              f"PDF has {report['page_count']} pages, the limit is {self.max_pages}.")
+        if report['content_hint'] == 'image_only':
+            return _rejection('pdf_image_only',
+                              "PDF appears to contain only images, please upload a text-based PDF.")
+
+        # Extraction always stops at extract_pages: /Count is only what the file declares
+        result = {'ok': True, 'error_code': None, 'error': None, 'max_pages': self.extract_pages, 'warnings': []}
+
+        # Long documents are analyzed on their first pages only
+        if report['page_count'] and report['page_count'] > self.extract_pages:
+            result['warnings'].append(
+                f"Only the first {self.extract_pages} of {report['page_count']} pages were analyzed."
+            )
+
+        return result
+
+    def check(self, pdf_path):
+        """Inspect and evaluate a PDF in one call, returning (result, report)"""
+        try:
+            report = self.inspect(pdf_path)
+        except Exception as e:
+            print(f"Error inspecting PDF: {e}")
+            return _rejection('pdf_unreadable', "PDF could not be read, the file may be corrupted."), None
+        return self.evaluate(report), report
+
+
+def _rejection(code, message):
+    return {'ok': False, 'error_code': code, 'error': message, 'max_pages': None, 'warnings': []}
+
+
+if __name__ == "__main__":
+    import sys
+    preflight = PDFPreflight()
+    for path in sys.argv[1:]:
+        result, report = preflight.check(path)
+        print(path, report, result)
@@ -0,0 +1,122 @@
+# quality.py
+import os
+import time
+import threading
+from collections import deque
+
+import metrics
+
+# Shed optional analysis stages while the service is overloaded
+ENABLED = os.environ.get('ADAPTIVE_QUALITY', '1') == '1'
+# Load counts as pressure above either threshold: analyses waiting for a slot, or
+# the recent p95 analysis time in seconds
+QUEUE_THRESHOLD = float(os.environ.get('QUALITY_QUEUE_THRESHOLD', 8))
+P95_THRESHOLD = float(os.environ.get('QUALITY_P95_THRESHOLD', 5.0))
+# Once shedding, full quality only returns when pressure falls below this fraction of the
+# thresholds, so the service doesn't flap between modes around the limit
+RECOVERY_FRACTION = 0.7
+# Latencies behind the p95: the last WINDOW_SECONDS, at most WINDOW_SAMPLES of them
+WINDOW_SECONDS = 30
+WINDOW_SAMPLES = 500
+
+# Every stage of an analysis with its relative cost (share of a typical one-page
+# analysis) and importance to the result (1 low to 3 high). Required stages always
+# run; optional ones are shed under pressure, least important per unit of cost first.
+STAGES = {
+    'extract_text':          {'cost': 20, 'importance': 3, 'optional': False},
+    # Layout facts gathered during PDF extraction; without them formatting checks guess from text
+    'layout_scan':           {'cost': 8,  'importance': 2, 'optional': True},
+    'identify_sections':     {'cost': 2,  'importance': 3, 'optional': False},
+    'skill_ids':             {'cost': 2,  'importance': 3, 'optional': False},
+    'scan_features':         {'cost': 1,  'importance': 3, 'optional': False},
+    'formatting_issues':     {'cost': 1,  'importance': 3, 'optional': False},
+    # Typo-tolerant skill matches, an opt-in refinement of the keyword score
+    'fuzzy_match':           {'cost': 5,  'importance': 1, 'optional': True},
+    'keyword_match':         {'cost': 2,  'importance': 3, 'optional': False},
+    'semantic_similarity':   {'cost': 8,  'importance': 1, 'optional': True},
+    # The spaCy named-entity pass; nothing in the score or recommendations reads it yet
+    'extract_entities':      {'cost': 40, 'importance': 1, 'optional': True},
+    'calculate_metrics':     {'cost': 15, 'importance': 3, 'optional': False},
+    'rank_job_descriptions': {'cost': 5,  'importance': 3, 'optional': False},
+    'recommendations':       {'cost': 1,  'importance': 3, 'optional': False},
+}
+
+
+def shed_order(stages=STAGES):
+    """Optional stages, the ones giving back the most cost per unit of importance first"""
+    optional = [name for name, stage in stages.items() if stage['optional']]
+    return sorted(optional, key=lambda name: -stages[name]['cost'] / stages[name]['importance'])
+
+
+class QualityGovernor:
+    """Pick which optional stages to skip from current queue depth and recent latency.
+
+    Pressure is the larger of queue depth and p95 latency relative to their
+    thresholds. At pressure p > 1 the governor sheds optional stages in shed_order()
+    until the declared cost saved reaches 1 - 1/p of a full analysis, so heavier
+    overload sheds more. Below RECOVERY_FRACTION everything runs again.
+    """
+
+    def __init__(self, queue_threshold=QUEUE_THRESHOLD, p95_threshold=P95_THRESHOLD, stages=STAGES):
+        self.queue_threshold = queue_threshold
+        self.p95_threshold = p95_threshold
+        self.stages = stages
+        self._order = shed_order(stages)
+        self._total_cost = sum(stage['cost'] for stage in stages.values())
+        self._latencies = deque(maxlen=WINDOW_SAMPLES)
+        self._lock = threading.Lock()
+        self._shedding = False
+
+    def observe(self, seconds):
+        """Record how long one analysis took"""
+        with self._lock:
+            self._latencies.append((time.monotonic(), seconds))
+
+    def p95(self):
+        cutoff = time.monotonic() - WINDOW_SECONDS
+        with self._lock:
+            while self._latencies and self._latencies[0][0] < cutoff:
+                self._latencies.popleft()
+            recent = sorted(seconds for _, seconds in self._latencies)
+        if not recent:
+            return 0.0
+        return recent[min(len(recent) - 1, int(0.95 * len(recent)))]
+
+    def pressure(self, queue_depth):
+        return max(queue_depth / self.queue_threshold, self.p95() / self.p95_threshold)
+
+    def plan(self, queue_depth=0):
+        """Frozenset of stage names to skip for an analysis starting now"""
+        pressure = self.pressure(queue_depth)
+        with self._lock:
+            if self._shedding:
+                self._shedding = pressure >= RECOVERY_FRACTION
+            else:
+                self._shedding = pressure > 1
+            shedding = self._shedding
+        shed = []
+        if shedding:
+            target = (1 - 1 / max(pressure, 1)) * self._total_cost
+            saved = 0
+            for name in self._order:
+                # Always shed at least the first stage while in shedding mode
+                if shed and saved >= target:
+                    break
+                shed.append(name)
+                saved += self.stages[name]['cost']
+        metrics.set_gauge('quality_pressure', round(pressure, 3))
+        metrics.set_gauge('quality_shed_stages', len(shed))
+        return frozenset(shed)
+
+
+_governor = None
+_governor_lock = threading.Lock()
+
+
+def get_governor():
+    global _governor
+    if _governor is None:
+        with _governor_lock:
+            if _governor is None:
+                _governor = QualityGovernor()
+    return _governor
@@ -0,0 +1,142 @@
+# request_profile.py
+import os
+import sys
+import hmac
+import time
+import random
+import marshal
+import cProfile
+import threading
+from collections import Counter
+from contextlib import nullcontext
+
+# Debug profiling of a single request needs this token in the X-Profile-Token header;
+# with no token configured the 'profile' parameter is refused
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+# Fraction of ordinary requests profiled (with the low-overhead sampler) into PROFILE_DIR
+SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles'))
+# Oldest profiles are pruned beyond this many files
+MAX_PROFILES = int(os.environ.get('PROFILE_MAX_FILES', 200))
+SAMPLE_INTERVAL = 0.001
+
+# 'pstats' is cProfile output (snakeviz, gprof2dot); 'collapsed' is folded stacks
+# for flamegraph.pl, speedscope or inferno
+MODES = {
+    'pstats': ('.prof', 'application/octet-stream'),
+    'collapsed': ('.collapsed', 'text/plain'),
+}
+
+
+class StackSampler:
+    """Sample one thread's Python stack at a fixed interval and count folded stacks"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.counts = Counter()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self._target = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[';'.join(reversed(stack))] += 1
+
+
+class RequestProfiler:
+    """Profile the blocks run inside it; may be entered several times per request"""
+
+    def __init__(self, mode='pstats', respond=False):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile format '{mode}', expected one of: {', '.join(MODES)}")
+        self.mode = mode
+        # Debug requests get the profile back instead of the analysis
+        self.respond = respond
+        self._profile = cProfile.Profile() if mode == 'pstats' else None
+        self._sampler = StackSampler() if mode == 'collapsed' else None
+
+    def __enter__(self):
+        if self._profile:
+            self._profile.enable()
+        else:
+            self._sampler.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._profile:
+            self._profile.disable()
+        else:
+            self._sampler.stop()
+        return False
+
+    @property
+    def extension(self):
+        return MODES[self.mode][0]
+
+    @property
+    def mimetype(self):
+        return MODES[self.mode][1]
+
+    def dump(self):
+        """Profile as bytes, in the format pstats.Stats or flamegraph tools read"""
+        if self._profile:
+            self._profile.create_stats()
+            return marshal.dumps(self._profile.stats)
+        return ''.join(f"{stack} {count}\n" for stack, count in self._sampler.counts.most_common()).encode()
+
+    def save(self, label, directory=PROFILE_DIR):
+        """Write the profile to the store and return its path"""
+        os.makedirs(directory, exist_ok=True)
+        safe_label = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in label)[:60]
+        path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{safe_label}{self.extension}")
+        with open(path, 'wb') as f:
+            f.write(self.dump())
+        _prune(directory)
+        return path
+
+
+def _prune(directory, keep=MAX_PROFILES):
+    names = sorted(n for n in os.listdir(directory) if n.endswith(tuple(ext for ext, _ in MODES.values())))
+    for name in names[:-keep]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
+
+
+def for_request(args, headers):
+    """Profiler for this request, or None (the common case, costing one dict lookup).
+
+    Raises PermissionError for a profile request without the right token and
+    ValueError for an unknown format.
+    """
+    mode = args.get('profile')
+    if mode:
+        token = headers.get('X-Profile-Token', '')
+        if not PROFILE_TOKEN or not hmac.compare_digest(token, PROFILE_TOKEN):
+            raise PermissionError("Profiling requires a valid X-Profile-Token header")
+        return RequestProfiler(mode, respond=True)
+    if SAMPLE_RATE and random.random() < SAMPLE_RATE:
+        return RequestProfiler('collapsed')
+    return None
+
+
+def profiling(profiler):
+    """Return the profiler as a context, or a no-op when the request is not profiled"""
+    return nullcontext() if profiler is None else profiler
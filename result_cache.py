@@ -0,0 +1,390 @@
+# result_cache.py
+import os
+import json
+import glob
+import time
+import socket
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+import metrics
+import serializers
+import keyword_taxonomy
+from results import ParsedDocument, LayoutFacts, TextFeatures
+
+# Where finished API responses and parsed documents are kept, keyed by file hash:
+# 'sqlite' shares one local file between every worker on the node, 'redis' shares a
+# Redis (or anything speaking its protocol) between nodes, 'memory' keeps a copy per process
+# and 'off' stores nothing (load tests, which must time analyses rather than hits)
+BACKEND = os.environ.get('RESULT_CACHE_BACKEND', 'sqlite')
+CACHE_SIZE = int(os.environ.get('RESULT_CACHE_SIZE', 256))
+CACHE_TTL = float(os.environ.get('RESULT_CACHE_TTL', 3600))
+CACHE_PATH = os.environ.get('RESULT_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data',
+                                                              'result_cache.sqlite3'))
+# Serialized bytes the SQLite file may hold before least recently used entries are evicted
+CACHE_MAX_BYTES = int(os.environ.get('RESULT_CACHE_MAX_BYTES', 256 << 20))
+# Redis bounds its own size: run it with maxmemory and an allkeys-lru policy
+REDIS_URL = os.environ.get('RESULT_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+REDIS_TIMEOUT = float(os.environ.get('RESULT_CACHE_REDIS_TIMEOUT', 1.0))
+# Share of RESULT_CACHE_MAX_BYTES left after an eviction pass
+EVICT_TO = 0.9
+# A hit refreshes an entry's last use at most this often, so most reads stay read-only
+TOUCH_INTERVAL = 60
+
+
+def options_key(*options):
+    """Stable key for the analysis options a stored result was produced with"""
+    return hashlib.sha1(repr(options).encode()).hexdigest()
+
+
+def file_sha256(path, chunk_size=1 << 16):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def code_version():
+    """Digest of the app's Python sources: shared entries outlive a deploy, results of older code must not"""
+    digest = hashlib.sha1()
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), '*.py'))):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+CODE_VERSION = code_version()
+
+
+def cache_version():
+    """Code version plus the loaded taxonomy's digest, so a rebuilt taxonomy misses what the old one produced"""
+    return f'{CODE_VERSION}-{keyword_taxonomy.get_taxonomy().digest}'
+
+
+def load_document(payload):
+    """ParsedDocument back from the JSON a shared backend stored"""
+    fields = json.loads(payload)
+    layout = fields.get('layout')
+    features = fields.get('features')
+    return ParsedDocument(
+        raw_text=fields['raw_text'],
+        processed_text=fields['processed_text'],
+        sections=fields['sections'],
+        skill_ids=frozenset(fields['skill_ids']),
+        layout=LayoutFacts(**layout) if layout else None,
+        features=TextFeatures(**features) if features else None
+    )
+
+
+class MemoryBackend:
+    """Entry-count bounded LRU holding objects as they are, private to this process"""
+    shared = False
+
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() > entry[0]:
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class NullBackend:
+    """Stores nothing, so every lookup is a miss"""
+    shared = False
+
+    def get(self, key):
+        return None
+
+    def put(self, key, value, ttl):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+class SQLiteBackend:
+    """Serialized payloads in a local SQLite file that every worker on the node opens.
+
+    WAL mode lets readers proceed while one worker writes. A running byte total is
+    kept by triggers, and a write that pushes it over max_bytes evicts expired
+    entries, then the least recently used, until EVICT_TO of the limit is left.
+    """
+    shared = True
+
+    def __init__(self, path=CACHE_PATH, max_bytes=CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        # Connections never cross a fork into a worker
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript('''
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    payload BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires REAL NOT NULL,
+                    used REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS entries_used ON entries (used);
+                CREATE TABLE IF NOT EXISTS usage (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL);
+                INSERT OR IGNORE INTO usage (id, bytes) VALUES (0, 0);
+                CREATE TRIGGER IF NOT EXISTS entries_inserted AFTER INSERT ON entries
+                    BEGIN UPDATE usage SET bytes = bytes + new.size; END;
+                CREATE TRIGGER IF NOT EXISTS entries_updated AFTER UPDATE OF size ON entries
+                    BEGIN UPDATE usage SET bytes = bytes + new.size - old.size; END;
+                CREATE TRIGGER IF NOT EXISTS entries_deleted AFTER DELETE ON entries
+                    BEGIN UPDATE usage SET bytes = bytes - old.size; END;
+            ''')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key):
+        connection = self._connect()
+        row = connection.execute('SELECT payload, expires, used FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        payload, expires, used = row
+        now = time.time()
+        if now > expires:
+            return None
+        if now - used > TOUCH_INTERVAL:
+            with connection:
+                connection.execute('UPDATE entries SET used = ? WHERE key = ?', (now, key))
+        return payload
+
+    def put(self, key, payload, ttl):
+        connection = self._connect()
+        now = time.time()
+        with connection:
+            connection.execute(
+                'INSERT INTO entries (key, payload, size, expires, used) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET payload = excluded.payload, size = excluded.size, '
+                'expires = excluded.expires, used = excluded.used',
+                (key, payload, len(payload), now + ttl, now)
+            )
+            if self._bytes(connection) > self.max_bytes:
+                self._evict(connection, now)
+
+    def _bytes(self, connection):
+        return connection.execute('SELECT bytes FROM usage WHERE id = 0').fetchone()[0]
+
+    def _evict(self, connection, now):
+        evicted = connection.execute('DELETE FROM entries WHERE expires < ?', (now,)).rowcount
+        # Free down to EVICT_TO of the limit, so the next writes don't each evict again
+        excess = self._bytes(connection) - int(self.max_bytes * EVICT_TO)
+        if excess > 0:
+            evicted += connection.execute(
+                'DELETE FROM entries WHERE key IN (SELECT key FROM ('
+                '    SELECT key, size, SUM(size) OVER (ORDER BY used, key) AS freed FROM entries'
+                ') WHERE freed - size < ?)', (excess,)
+            ).rowcount
+        metrics.increment('result_cache_evictions_total', evicted)
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+
+class RedisError(Exception):
+    """Error reply from the server"""
+
+
+class RedisBackend:
+    """Serialized payloads in Redis, spoken to over its wire protocol (RESP) directly.
+
+    Only GET and SET ... PX are used, so any server implementing those, such as a
+    local stand-in in tests, will do. The server enforces the size bound through
+    its maxmemory policy; an unreachable server just means cache misses.
+    """
+    shared = True
+
+    def __init__(self, url=REDIS_URL, timeout=REDIS_TIMEOUT):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            connection = (sock, sock.makefile('rb'))
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+            if self.password:
+                self._command('AUTH', self.password)
+            if self.db:
+                self._command('SELECT', str(self.db))
+        return connection
+
+    def _close(self):
+        connection = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if connection is not None:
+            connection[1].close()
+            connection[0].close()
+
+    def _command(self, *args):
+        sock, reader = self._connect()
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            if isinstance(arg, str):
+                arg = arg.encode()
+            parts += [b'$%d\r\n' % len(arg), arg, b'\r\n']
+        sock.sendall(b''.join(parts))
+        return self._reply(reader)
+
+    def _reply(self, reader):
+        line = reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise ConnectionError("Connection closed by the server")
+        kind, value = line[:1], line[1:-2]
+        if kind == b'+':
+            return value
+        if kind == b'-':
+            raise RedisError(value.decode(errors='replace'))
+        if kind == b':':
+            return int(value)
+        if kind == b'$':
+            length = int(value)
+            if length < 0:
+                return None
+            # Read the payload straight into its final buffer
+            payload = bytearray(length)
+            view = memoryview(payload)
+            while view:
+                read = reader.readinto(view)
+                if not read:
+                    raise ConnectionError("Connection closed by the server")
+                view = view[read:]
+            reader.read(2)
+            return payload
+        if kind == b'*':
+            length = int(value)
+            return None if length < 0 else [self._reply(reader) for _ in range(length)]
+        raise ConnectionError(f"Unexpected reply {line[:20]!r}")
+
+    def _call(self, *args):
+        try:
+            return self._command(*args)
+        except (OSError, ConnectionError, RedisError) as e:
+            # A half-read reply leaves the connection unusable; reconnect next time
+            self._close()
+            print(f"Result cache: Redis {args[0]} failed: {e}")
+            metrics.increment('result_cache_errors_total')
+            return None
+
+    def get(self, key):
+        return self._call('GET', key)
+
+    def put(self, key, payload, ttl):
+        self._call('SET', key, payload, 'PX', str(int(ttl * 1000)))
+
+    def __len__(self):
+        return self._call('DBSIZE') or 0
+
+
+BACKENDS = {
+    'off': NullBackend,
+    'memory': MemoryBackend,
+    'sqlite': SQLiteBackend,
+    'redis': RedisBackend,
+}
+
+
+class ResultCache:
+    """Size- and age-bounded cache of analysis responses and parsed documents.
+
+    Lets a client that already uploaded a file ask for its result by SHA-256
+    alone, skipping both the upload and the analysis, and lets a new analysis of
+    a known file with other options skip parsing it. With a shared backend every
+    worker sees every entry; responses come back as the stored JSON bytes, which
+    can be sent as they are.
+    """
+
+    def __init__(self, backend=None, ttl=CACHE_TTL):
+        self.backend = backend if backend is not None else BACKENDS[BACKEND]()
+        self.ttl = ttl
+
+    def _get(self, kind, key, metric):
+        try:
+            value = self.backend.get(f'{kind}:{cache_version()}:{key}')
+        except sqlite3.Error as e:
+            print(f"Result cache: lookup failed: {e}")
+            value = None
+        metrics.increment(metric, labels={'result': 'miss' if value is None else 'hit'})
+        return value
+
+    def _put(self, kind, key, value):
+        try:
+            self.backend.put(f'{kind}:{cache_version()}:{key}', value, self.ttl)
+        except sqlite3.Error as e:
+            print(f"Result cache: store failed: {e}")
+
+    def get(self, sha256, options):
+        """The stored response: a dict, or its JSON bytes from a shared backend"""
+        return self._get('result', f'{sha256}:{options}', 'result_cache_requests_total')
+
+    def put(self, sha256, options, response):
+        if self.backend.shared:
+            response = serializers.dumps(response, serializers.JSON_MIMETYPE)
+        self._put('result', f'{sha256}:{options}', response)
+
+    def get_document(self, sha256, max_pages=None):
+        document = self._get('document', f'{sha256}:{max_pages}', 'document_cache_requests_total')
+        if document is not None and self.backend.shared:
+            document = load_document(document)
+        return document
+
+    def put_document(self, sha256, max_pages, document):
+        if self.backend.shared:
+            document = serializers.dumps(document.to_dict(), serializers.JSON_MIMETYPE)
+        self._put('document', f'{sha256}:{max_pages}', document)
+
+    def get_counts(self, sha256, options):
+        """{'ats_score', 'counts'} of a stored analysis, so serving it again still counts in cohort analytics"""
+        summary = self._get('counts', f'{sha256}:{options}', 'cohort_counts_requests_total')
+        if summary is not None and self.backend.shared:
+            summary = json.loads(summary)
+        return summary
+
+    def put_counts(self, sha256, options, ats_score, counts):
+        summary = {'ats_score': ats_score, 'counts': counts}
+        if self.backend.shared:
+            summary = serializers.dumps(summary, serializers.JSON_MIMETYPE)
+        self._put('counts', f'{sha256}:{options}', summary)
+
+    def __len__(self):
+        return len(self.backend)
@@ -0,0 +1,161 @@
+# results.py
+from dataclasses import dataclass, field
+
+
+class Record:
+    """Mixin giving slotted result records read-only mapping access.
+
+    Older callers index results like dictionaries (result['metrics']['word_count']),
+    so records keep supporting that while storing their fields in slots.
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def keys(self):
+        return list(self.__slots__)
+
+    def items(self):
+        return [(name, getattr(self, name)) for name in self.__slots__]
+
+    def to_dict(self):
+        """Convert the record, and any records nested inside it, to plain containers"""
+        return {name: to_builtin(getattr(self, name)) for name in self.__slots__}
+
+
+def to_builtin(value):
+    """Recursively convert records to dictionaries, leaving other values untouched"""
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, dict):
+        return {k: to_builtin(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_builtin(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    return value
+
+
+@dataclass(slots=True)
+class LayoutFacts(Record):
+    page_count: int
+    fonts: list
+    image_count: int
+    column_lines: int
+    table_rows: int
+    isolated_blocks: int
+    repeated_header: bool
+    repeated_footer: bool
+    vector_rules: int
+    vector_curves: int
+    # Counted directly by formats that mark them up (DOCX), rather than inferred from drawing
+    text_boxes: int = 0
+    charts: int = 0
+
+
+@dataclass(slots=True)
+class TextFeatures(Record):
+    # kind ('email', 'phone', 'linkedin', 'github', 'year', 'digits', 'degree', 'institution') -> values
+    matches: dict
+    # section -> {kind: values} for features inside that section's lines
+    sections: dict = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class ParsedDocument(Record):
+    raw_text: str
+    processed_text: str
+    sections: dict
+    skill_ids: frozenset = frozenset()
+    layout: LayoutFacts = None
+    features: TextFeatures = None
+
+
+@dataclass(slots=True)
+class ResumeMetrics(Record):
+    word_count: int
+    sections: dict
+    action_verbs: dict
+    weak_phrases: dict
+
+
+@dataclass(slots=True)
+class Recommendation(Record):
+    category: str
+    recommendation: str
+    priority: str = None
+
+
+@dataclass(slots=True)
+class FuzzyMatch(Record):
+    term: str
+    found: str
+    distance: int
+
+
+@dataclass(slots=True)
+class JobMatch(Record):
+    job_id: object
+    keyword_match: float
+    ats_score: int
+    missing_keywords: list
+
+
+@dataclass(slots=True)
+class FactorScores(Record):
+    keyword_match: float = 0.0
+    format_score: float = 0.0
+    word_count: float = 0.0
+    action_verbs: float = 0.0
+    file_format: float = 0.0
+    contact_info: float = 0.0
+    education_format: float = 0.0
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+
+@dataclass(slots=True)
+class FactorUpdate(Record):
+    factor: str
+    score: float
+    weight: float
+    recommendations: list
+    details: dict = None
+
+
+@dataclass(slots=True)
+class ResumeAnalysis(Record):
+    sections_found: list
+    metrics: ResumeMetrics
+    industry_keywords: dict
+    recommendations: dict
+
+
+@dataclass(slots=True)
+class ATSResult(Record):
+    ats_score: int
+    factor_scores: FactorScores
+    recommendations: list
+    formatting_issues: list
+    base_analysis: ResumeAnalysis
+    fuzzy_matches: list = field(default_factory=list)
+    job_matches: list = field(default_factory=list)
+    semantic_similarity: float = None
+    contact_info: dict = None
+    target_industry: str = None
+    missing_keywords: list = field(default_factory=list)
+    # Optional stages skipped because the service was overloaded
+    degraded_stages: list = field(default_factory=list)
@@ -5,6 +5,13 @@ import nltk
 import PyPDF2
 import spacy
 from collections import Counter
+import keyword_taxonomy
+import document_formats
+from memory_profile import profile_stage
+from skill_index import get_skill_index
+from feature_scanner import scan
+from pdf_layout import LayoutCollector
+from results import ParsedDocument, ResumeMetrics, ResumeAnalysis, Recommendation
 
 # Download necessary NLTK resources
 nltk.download('punkt', quiet=True)
@@ -57,34 +64,30 @@ class ResumeAnalyzer:
             'responsible for', 'duties included', 'worked on', 'involved in', 'helped with',
             'assisted with', 'participated in', 'was tasked with', 'was asked to'
         ]
-        
-        # Industry keywords (expand these based on your target industries)
-        self.industry_keywords = {
-            'software_development': ['python', 'java', 'javascript', 'react', 'node', 'aws', 'cloud', 'api', 
-                                    'database', 'frontend', 'backend', 'fullstack', 'devops', 'agile',
-                                    'scrum', 'ci/cd', 'testing', 'git', 'docker', 'kubernetes', 'microservices',
-                                    'express', 'mongodb', 'typescript', 'next.js', 'html5', 'css3', 'redux',
-                                    'websockets', 'jwt', 'rest', 'api', 'mern', 'c++', 'algorithms'],
-            'data_science': ['machine learning', 'artificial intelligence', 'data analysis', 'statistics',
-                            'python', 'r', 'sql', 'pandas', 'numpy', 'tensorflow', 'pytorch', 'scikit-learn',
-                            'data visualization', 'big data', 'nlp', 'computer vision', 'deep learning'],
-            'marketing': ['digital marketing', 'seo', 'sem', 'content strategy', 'social media', 'analytics',
-                         'campaign management', 'google analytics', 'conversion optimization', 'a/b testing',
-                         'customer acquisition', 'funnel optimization', 'brand management'],
-            'finance': ['financial analysis', 'accounting', 'budgeting', 'forecasting', 'risk assessment',
-                       'portfolio management', 'investment', 'banking', 'excel', 'financial modeling'],
-            'project_management': ['project management', 'agile', 'scrum', 'kanban', 'jira', 'stakeholder',
-                                 'timeline', 'resource allocation', 'risk management', 'project planning']
-        }
     
-    def extract_text_from_pdf(self, pdf_path):
-        """Extract text from a PDF file"""
+    @property
+    def industry_keywords(self):
+        """Industry keywords from the shared taxonomy (data/taxonomy.json, compiled to taxonomy.bin)"""
+        return keyword_taxonomy.get_taxonomy().industry_keywords('detect')
+    
+    def extract_text_from_pdf(self, pdf_path, max_pages=None, layout=None):
+        """Extract text from a PDF file, optionally stopping after the first max_pages pages.
+        
+        Pass a LayoutCollector as layout to record layout facts in the same pass.
+        """
         text = ""
         try:
             with open(pdf_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
-                for page_num in range(len(pdf_reader.pages)):
-                    text += pdf_reader.pages[page_num].extract_text()
+                page_count = len(pdf_reader.pages)
+                if max_pages is not None:
+                    page_count = min(page_count, max_pages)
+                for page_num in range(page_count):
+                    page = pdf_reader.pages[page_num]
+                    if layout is None:
+                        text += page.extract_text()
+                    else:
+                        text += page.extract_text(**layout.visit(page))
             return text
         except Exception as e:
             print(f"Error extracting text from PDF: {e}")
@@ -101,14 +104,20 @@ class ResumeAnalyzer:
         
         return text
     
-    def identify_sections(self, text):
-        """Identify different sections in the resume with improved logic"""
+    def identify_sections(self, text, line_spans=None):
+        """Identify different sections in the resume with improved logic
+        
+        line_spans, when given, is filled with section -> (first, end) line numbers of
+        the content each section's text was joined from.
+        """
         sections = {}
+        spans = line_spans if line_spans is not None else {}
         
         # Split text into lines
         lines = text.split('\n')
         current_section = 'header'
         section_content = []
+        section_start = 0
         
         # Improved logic to detect section headers
         for i, line in enumerate(lines):
@@ -130,8 +139,10 @@ class ResumeAnalyzer:
                        line_lower.endswith(' ' + keyword):
                         if current_section:
                             sections[current_section] = ' '.join(section_content)
+                            spans[current_section] = (section_start, i)
                         current_section = section
                         section_content = []
+                        section_start = i + 1
                         section_match = True
                         break
                 
@@ -139,24 +150,30 @@ class ResumeAnalyzer:
                 if not section_match and section == 'experience' and re.search(r'\bwork\s+experience\b', line_lower):
                     if current_section:
                         sections[current_section] = ' '.join(section_content)
+                        spans[current_section] = (section_start, i)
                     current_section = 'experience'
                     section_content = []
+                    section_start = i + 1
                     section_match = True
                 
                 # Special case for projects
                 if not section_match and section == 'projects' and (line_lower == 'projects' or line_lower.startswith('project')):
                     if current_section:
                         sections[current_section] = ' '.join(section_content)
+                        spans[current_section] = (section_start, i)
                     current_section = 'projects'
                     section_content = []
+                    section_start = i + 1
                     section_match = True
                 
                 # Special case for achievements
                 if not section_match and section == 'achievements' and (line_lower == 'achievements' or line_lower.startswith('achievement')):
                     if current_section:
                         sections[current_section] = ' '.join(section_content)
+                        spans[current_section] = (section_start, i)
                     current_section = 'achievements'
                     section_content = []
+                    section_start = i + 1
                     section_match = True
                 
                 if section_match:
@@ -171,8 +188,10 @@ class ResumeAnalyzer:
                             if keyword in line_lower:
                                 if current_section:
                                     sections[current_section] = ' '.join(section_content)
+                                    spans[current_section] = (section_start, i)
                                 current_section = section
                                 section_content = []
+                                section_start = i + 1
                                 section_match = True
                                 break
                         if section_match:
@@ -184,6 +203,7 @@ class ResumeAnalyzer:
         # Add the last section
         if current_section and section_content:
             sections[current_section] = ' '.join(section_content)
+            spans[current_section] = (section_start, len(lines))
         
         # Special case for GitHub detection in projects section
         if 'header' in sections and 'github' in sections['header'].lower():
@@ -239,22 +259,24 @@ class ResumeAnalyzer:
                 
         return found_phrases
     
-    def identify_industry_keywords(self, text, industries=None):
+    def identify_industry_keywords(self, text, industries=None, skill_ids=None):
         """Identify industry-specific keywords in the resume"""
-        text_lower = text.lower()
+        # Match on canonical skill ids so variants like "nodejs" and "node.js" line up
+        index = get_skill_index()
+        taxonomy = index.taxonomy
+        if skill_ids is None:
+            skill_ids = index.match_ids(text)
         found_keywords = {}
         
         # If specific industries are provided, only check those
         if industries:
-            industry_list = [ind for ind in industries if ind in self.industry_keywords]
+            industry_list = [ind for ind in industries if ind in taxonomy.industry_index]
         else:
-            industry_list = list(self.industry_keywords.keys())
+            industry_list = taxonomy.industries
             
         for industry in industry_list:
-            found = []
-            for keyword in self.industry_keywords[industry]:
-                if keyword in text_lower:
-                    found.append(keyword)
+            found = [index.term(skill_id) for skill_id in taxonomy.industry_term_ids(industry, 'detect')
+                     if skill_id in skill_ids]
             if found:
                 found_keywords[industry] = found
                 
@@ -262,11 +284,8 @@ class ResumeAnalyzer:
     
     def calculate_metrics(self, text, sections):
         """Calculate various metrics about the resume"""
-        metrics = {}
-        
         # Word count
         words = nltk.word_tokenize(text)
-        metrics['word_count'] = len(words)
         
         # Section presence and length
         section_metrics = {}
@@ -282,25 +301,21 @@ class ResumeAnalyzer:
                     'present': False,
                     'word_count': 0
                 }
-        metrics['sections'] = section_metrics
         
         # Action verb metrics
         action_verbs = self.count_action_verbs(text)
-        metrics['action_verbs'] = {
-            'count': len(action_verbs),
-            'verbs': action_verbs
-        }
         
         # Weak phrases
         weak_phrases = self.detect_weak_phrases(text)
-        metrics['weak_phrases'] = {
-            'count': len(weak_phrases),
-            'phrases': weak_phrases
-        }
         
-        return metrics
+        return ResumeMetrics(
+            word_count=len(words),
+            sections=section_metrics,
+            action_verbs={'count': len(action_verbs), 'verbs': action_verbs},
+            weak_phrases={'count': len(weak_phrases), 'phrases': weak_phrases}
+        )
     
-    def generate_recommendations(self, metrics, sections, industry_keywords, target_industry=None):
+    def generate_recommendations(self, metrics, sections, industry_keywords, target_industry=None, features=None):
         """Generate recommendations based on resume analysis"""
         recommendations = {
             'overall': [],
@@ -339,7 +354,8 @@ class ResumeAnalyzer:
         # Experience section specific recommendations
         if 'experience' in sections:
             exp_text = sections['experience'].lower()
-            if not re.search(r'\d{4}', exp_text):
+            exp_features = features.sections.get('experience', {}) if features else scan(exp_text).matches
+            if 'digits' not in exp_features:
                 if 'experience' not in recommendations['sections']:
                     recommendations['sections']['experience'] = []
                 recommendations['sections']['experience'].append("Add dates to your work experience entries.")
@@ -373,46 +389,93 @@ class ResumeAnalyzer:
         
         return recommendations
     
-    def analyze_resume(self, pdf_path, target_industry=None):
-        """Main function to analyze a resume and generate recommendations"""
-        # Extract text from PDF
-        raw_text = self.extract_text_from_pdf(pdf_path)
-        if not raw_text:
-            return {"error": "Could not extract text from the PDF"}
+    def extract_document_text(self, path, max_pages=None, collect_layout=True):
+        """Extract (text, layout facts) with the extractor for the file's format.
+        
+        DOCX and plain text skip PDF parsing entirely; DOCX layout facts come from its markup.
+        Without collect_layout, PDFs are extracted faster and come back with no layout facts.
+        """
+        if document_formats.file_type(path) in ('docx', 'txt'):
+            try:
+                return document_formats.extract(path)
+            except Exception as e:
+                print(f"Error extracting text from {path}: {e}")
+                return "", None
+        if not collect_layout:
+            return self.extract_text_from_pdf(path, max_pages=max_pages), None
+        layout = LayoutCollector()
+        text = self.extract_text_from_pdf(path, max_pages=max_pages, layout=layout)
+        return text, layout.facts()
+    
+    def parse_document(self, pdf_path, max_pages=None, profiler=None, shed=frozenset()):
+        """Extract, clean and split a resume into sections once so every analysis can share it.
         
-        # Preprocess text
-        processed_text = self.preprocess_text(raw_text)
+        shed names optional stages to skip under load (see quality.STAGES).
+        """
+        with profile_stage(profiler, 'extract_text'):
+            raw_text, layout = self.extract_document_text(pdf_path, max_pages=max_pages,
+                                                          collect_layout='layout_scan' not in shed)
+        if not raw_text or not raw_text.strip():
+            return None
         
         # Debug raw text extraction
-        print("PDF Text (First 200 chars):", raw_text[:200])
+        print("Resume Text (First 200 chars):", raw_text[:200])
         
-        # Identify sections
-        sections = self.identify_sections(raw_text)
+        with profile_stage(profiler, 'identify_sections'):
+            processed_text = self.preprocess_text(raw_text)
+            line_spans = {}
+            sections = self.identify_sections(raw_text, line_spans)
         
         # Debug sections found
         print("Sections found:", list(sections.keys()))
         
+        with profile_stage(profiler, 'skill_ids'):
+            skill_ids = get_skill_index().match_ids(raw_text)
+        
+        # Contact, date and education signals in one pass, attributed to their sections
+        with profile_stage(profiler, 'scan_features'):
+            features = scan(raw_text, line_spans)
+        
+        return ParsedDocument(raw_text=raw_text, processed_text=processed_text, sections=sections,
+                              skill_ids=skill_ids, layout=layout, features=features)
+    
+    def analyze_resume(self, pdf_path, target_industry=None, max_pages=None, profiler=None):
+        """Main function to analyze a resume and generate recommendations"""
+        document = self.parse_document(pdf_path, max_pages=max_pages, profiler=profiler)
+        if document is None:
+            return {"error": "Could not extract text from the file"}
+        
+        return self.analyze_document(document, target_industry, profiler=profiler)
+    
+    def analyze_document(self, document, target_industry=None, profiler=None, shed=frozenset()):
+        """Analyze an already parsed resume and generate recommendations"""
+        processed_text = document.processed_text
+        sections = document.sections
+        
         # Extract entities
-        entities = self.extract_entities(processed_text)
+        if 'extract_entities' not in shed:
+            with profile_stage(profiler, 'analyze_resume.extract_entities'):
+                entities = self.extract_entities(processed_text)
         
         # Identify industry keywords
-        industry_keywords = self.identify_industry_keywords(processed_text)
+        with profile_stage(profiler, 'analyze_resume.industry_keywords'):
+            industry_keywords = self.identify_industry_keywords(processed_text, skill_ids=document.skill_ids)
         
         # Calculate metrics
-        metrics = self.calculate_metrics(processed_text, sections)
+        with profile_stage(profiler, 'analyze_resume.calculate_metrics'):
+            metrics = self.calculate_metrics(processed_text, sections)
         
         # Generate recommendations
-        recommendations = self.generate_recommendations(metrics, sections, industry_keywords, target_industry)
+        recommendations = self.generate_recommendations(metrics, sections, industry_keywords, target_industry,
+                                                        features=document.features)
         
         # Prepare analysis result
-        analysis = {
-            'sections_found': list(sections.keys()),
-            'metrics': metrics,
-            'industry_keywords': industry_keywords,
-            'recommendations': recommendations
-        }
-        
-        return analysis
+        return ResumeAnalysis(
+            sections_found=list(sections.keys()),
+            metrics=metrics,
+            industry_keywords=industry_keywords,
+            recommendations=recommendations
+        )
 
     def generate_api_response(self, analysis):
         """Format the analysis results for API response"""
@@ -430,37 +493,26 @@ class ResumeAnalyzer:
             }
         }
         
-        # Compile all recommendations into a flat list for easier frontend consumption
+        # Compile all recommendations into a flat list for easier frontend consumption; this
+        # analyzer doesn't rank its advice, so these records keep priority None (null)
         all_recs = []
         
         # Overall recommendations
         for rec in analysis['recommendations']['overall']:
-            all_recs.append({
-                "category": "Overall",
-                "recommendation": rec
-            })
+            all_recs.append(Recommendation("Overall", rec))
         
         # Section recommendations
         for section, recs in analysis['recommendations']['sections'].items():
             for rec in recs:
-                all_recs.append({
-                    "category": section.replace('_', ' ').title(),
-                    "recommendation": rec
-                })
+                all_recs.append(Recommendation(section.replace('_', ' ').title(), rec))
         
         # Language use recommendations
         for rec in analysis['recommendations']['language_use']:
-            all_recs.append({
-                "category": "Language",
-                "recommendation": rec
-            })
+            all_recs.append(Recommendation("Language", rec))
         
         # Industry alignment recommendations
         for rec in analysis['recommendations']['industry_alignment']:
-            all_recs.append({
-                "category": "Industry Alignment",
-                "recommendation": rec
-            })
+            all_recs.append(Recommendation("Industry Alignment", rec))
         
         response["recommendations"] = all_recs
         return response
@@ -0,0 +1,379 @@
+# semantic.py
+import os
+import math
+import json
+import zlib
+import atexit
+import argparse
+import threading
+from collections import Counter
+
+import numpy as np
+
+from skill_index import get_skill_index
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+MODEL_PATH = os.environ.get('SEMANTIC_MODEL', os.path.join(DATA_DIR, 'semantic_model.npz'))
+INDEX_DIR = os.environ.get('SEMANTIC_INDEX_DIR', os.path.join(DATA_DIR, 'semantic_index'))
+# Add every analyzed resume to the similarity index. Each worker keeps and saves its
+# own copy, so enable this on a single worker or build the index offline with `index`
+INDEX_ENABLED = os.environ.get('SEMANTIC_INDEX', '0') == '1'
+# Online additions are written to disk in batches
+SAVE_INTERVAL = 50
+
+# Words, skill terms and adjacent pairs of them are hashed into this many features
+HASH_DIM = 1 << 14
+# Without a fitted model or spaCy vectors the hashed features are folded to this size
+FALLBACK_DIM = 512
+SVD_COMPONENTS = 128
+# Clusters searched per query; more probes trade speed for recall
+NPROBE = int(os.environ.get('SEMANTIC_NPROBE', 8))
+# Below this many vectors an exact scan is faster than clustering
+IVF_MIN_SIZE = 2000
+
+
+def hashed_features(text):
+    """Signed feature hashing of significant words, canonical skills and their bigrams.
+
+    Skills are keyed by their canonical term, so "nodejs" and "node" share features
+    with "node.js"; zlib.crc32 keeps the hashes stable across processes.
+    """
+    index = get_skill_index()
+    counts = Counter()
+    previous = None
+    for skill_id, token in index.keywords(text):
+        key = index.term(skill_id) if skill_id is not None else token
+        counts[key] += 1
+        if previous is not None:
+            counts[previous + '|' + key] += 1
+        previous = key
+
+    features = {}
+    for key, count in counts.items():
+        h = zlib.crc32(key.encode())
+        sign = 1.0 if h & 0x80000000 else -1.0
+        column = h % HASH_DIM
+        features[column] = features.get(column, 0.0) + sign * (1.0 + math.log(count))
+    return features
+
+
+def _normalize(vector):
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class SemanticEncoder:
+    """Turn text into a dense unit vector with the best local representation available.
+
+    'svd'    - hashed features projected onto components fitted on a resume corpus (LSA)
+    'spacy'  - mean of spaCy word vectors, when the loaded model ships vectors
+    'hashed' - the hashed features folded down to FALLBACK_DIM, no training needed
+    """
+
+    def __init__(self, kind, components=None, idf=None, vocab=None):
+        self.kind = kind
+        self.components = components
+        self.idf = idf
+        self.vocab = vocab
+        if kind == 'svd':
+            self.dim = components.shape[1]
+        elif kind == 'spacy':
+            self.dim = vocab.vectors.shape[1]
+        else:
+            self.dim = FALLBACK_DIM
+
+    @classmethod
+    def load(cls, nlp=None, model_path=MODEL_PATH):
+        if os.path.exists(model_path):
+            model = np.load(model_path)
+            return cls('svd', components=model['components'], idf=model['idf'])
+        if nlp is not None and nlp.vocab.vectors.shape[0] > 0:
+            return cls('spacy', vocab=nlp.vocab)
+        return cls('hashed')
+
+    def encode(self, text):
+        if self.kind == 'spacy':
+            words = [token for _, token in get_skill_index().keywords(text) if self.vocab.has_vector(token)]
+            if not words:
+                return np.zeros(self.dim, dtype=np.float32)
+            return _normalize(np.mean([self.vocab.get_vector(w) for w in words], axis=0).astype(np.float32))
+
+        features = hashed_features(text)
+        if not features:
+            return np.zeros(self.dim, dtype=np.float32)
+        columns = np.fromiter(features, dtype=np.int64, count=len(features))
+        values = np.fromiter(features.values(), dtype=np.float32, count=len(features))
+        if self.kind == 'svd':
+            values *= self.idf[columns]
+            return _normalize(values @ self.components[columns]).astype(np.float32)
+        vector = np.zeros(FALLBACK_DIM, dtype=np.float32)
+        np.add.at(vector, columns % FALLBACK_DIM, values)
+        return _normalize(vector)
+
+    def similarity(self, text_a, text_b):
+        """Cosine similarity of two texts, clipped to [0, 1]"""
+        return max(0.0, float(self.encode(text_a) @ self.encode(text_b)))
+
+
+def fit_model(texts, components=SVD_COMPONENTS, seed=0, power_iterations=2):
+    """Fit TF-IDF weights and a truncated SVD of the hashed corpus matrix.
+
+    Randomized SVD over CSR arrays, so only (documents x components) dense blocks
+    are ever materialized.
+    """
+    rows = [hashed_features(text) for text in texts]
+    indptr = np.cumsum([0] + [len(r) for r in rows])
+    indices = np.fromiter((c for r in rows for c in r), dtype=np.int64, count=indptr[-1])
+    data = np.fromiter((v for r in rows for v in r.values()), dtype=np.float64, count=indptr[-1])
+    row_of = np.repeat(np.arange(len(rows)), np.diff(indptr))
+
+    document_frequency = np.bincount(indices, minlength=HASH_DIM)
+    idf = np.log((1 + len(rows)) / (1 + document_frequency)) + 1.0
+    data *= idf[indices]
+
+    def times(dense):
+        # X @ dense for the (documents x HASH_DIM) matrix
+        result = np.zeros((len(rows), dense.shape[1]))
+        np.add.at(result, row_of, data[:, None] * dense[indices])
+        return result
+
+    def transposed_times(dense):
+        # X.T @ dense
+        result = np.zeros((HASH_DIM, dense.shape[1]))
+        np.add.at(result, indices, data[:, None] * dense[row_of])
+        return result
+
+    rank = min(components, len(rows))
+    rng = np.random.default_rng(seed)
+    sample = times(rng.standard_normal((HASH_DIM, rank + 10)))
+    for _ in range(power_iterations):
+        sample = times(transposed_times(np.linalg.qr(sample)[0]))
+    basis = np.linalg.qr(sample)[0]
+    _, _, vt = np.linalg.svd(transposed_times(basis).T, full_matrices=False)
+    return vt[:rank].T.astype(np.float32), idf.astype(np.float32)
+
+
+class VectorIndex:
+    """Inverted-file (IVF) approximate nearest-neighbour index over unit vectors.
+
+    Vectors are clustered with k-means into about sqrt(n) lists; a query scores the
+    centroids, then only the vectors in the NPROBE closest lists. Small indexes and
+    untrained ones fall back to an exact scan.
+    """
+
+    def __init__(self, dim, kind, directory=INDEX_DIR):
+        self.dim = dim
+        self.kind = kind
+        self.directory = directory
+        self.labels = []
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.centroids = None
+        self.assignments = np.zeros(0, dtype=np.int32)
+        self._pending = []
+        self._trained_size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.labels)
+
+    def add(self, label, vector):
+        with self._lock:
+            self.labels.append(label)
+            self._pending.append(np.asarray(vector, dtype=np.float32))
+
+    def _consolidate(self):
+        if self._pending:
+            self.vectors = np.vstack([self.vectors] + [p[None, :] for p in self._pending])
+            self._pending = []
+        if len(self.labels) >= IVF_MIN_SIZE and len(self.labels) >= 2 * self._trained_size:
+            self.train()
+        elif self.centroids is not None and len(self.assignments) < len(self.vectors):
+            new = self.vectors[len(self.assignments):]
+            self.assignments = np.concatenate((self.assignments, np.argmax(new @ self.centroids.T, axis=1)))
+            self._build_lists()
+
+    def train(self, iterations=10, seed=0):
+        """Spherical k-means on (a sample of) the stored vectors"""
+        n = len(self.vectors)
+        nlist = max(1, int(math.sqrt(n)))
+        rng = np.random.default_rng(seed)
+        sample = self.vectors[rng.choice(n, size=min(n, nlist * 64), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            nearest = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, nearest, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+        self.centroids = centroids.astype(np.float32)
+        self.assignments = np.argmax(self.vectors @ self.centroids.T, axis=1).astype(np.int32)
+        self._trained_size = n
+        self._build_lists()
+
+    def _build_lists(self):
+        # Rows grouped by cluster, so each probed list is one contiguous slice
+        self._order = np.argsort(self.assignments, kind='stable')
+        self._offsets = np.searchsorted(self.assignments[self._order], np.arange(len(self.centroids) + 1))
+
+    def search(self, vector, k=10, nprobe=NPROBE):
+        """Labels and cosine similarities of the k nearest stored vectors"""
+        with self._lock:
+            self._consolidate()
+            if not len(self.vectors):
+                return []
+            if self.centroids is None:
+                candidates = np.arange(len(self.vectors))
+            else:
+                probes = np.argsort(-(self.centroids @ vector))[:nprobe]
+                candidates = np.concatenate([self._order[self._offsets[c]:self._offsets[c + 1]] for c in probes])
+            scores = self.vectors[candidates] @ vector
+            top = np.argsort(-scores)[:k] if len(scores) <= k else np.argpartition(-scores, k)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self.labels[candidates[i]], float(scores[i])) for i in top]
+
+    def save(self):
+        with self._lock:
+            self._consolidate()
+            os.makedirs(self.directory, exist_ok=True)
+            np.save(os.path.join(self.directory, 'vectors.npy'), self.vectors)
+            if self.centroids is not None:
+                np.save(os.path.join(self.directory, 'centroids.npy'), self.centroids)
+            with open(os.path.join(self.directory, 'meta.json'), 'w') as f:
+                json.dump({'dim': self.dim, 'kind': self.kind, 'labels': self.labels,
+                           'trained_size': self._trained_size}, f)
+
+    @classmethod
+    def load(cls, encoder, directory=INDEX_DIR):
+        """Open the saved index, or start an empty one if it is missing or built by another encoder"""
+        index = cls(encoder.dim, encoder.kind, directory)
+        meta_path = os.path.join(directory, 'meta.json')
+        if not os.path.exists(meta_path):
+            return index
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta['kind'] != encoder.kind or meta['dim'] != encoder.dim:
+            print(f"Semantic index at {directory} was built with '{meta['kind']}' vectors, starting a new one")
+            return index
+        index.labels = meta['labels']
+        index.vectors = np.load(os.path.join(directory, 'vectors.npy'))
+        centroids_path = os.path.join(directory, 'centroids.npy')
+        if os.path.exists(centroids_path):
+            index.centroids = np.load(centroids_path)
+            index.assignments = np.argmax(index.vectors @ index.centroids.T, axis=1).astype(np.int32)
+            index._trained_size = meta['trained_size']
+            index._build_lists()
+        return index
+
+
+_lock = threading.Lock()
+_encoder = None
+_index = None
+
+
+def get_encoder():
+    """Process-wide encoder, reusing the analyzer's spaCy pipeline for its vectors"""
+    global _encoder
+    if _encoder is None:
+        with _lock:
+            if _encoder is None:
+                from resume_analyzer import nlp
+                _encoder = SemanticEncoder.load(nlp)
+                print(f"Semantic encoder: {_encoder.kind} ({_encoder.dim} dimensions)")
+    return _encoder
+
+
+def get_vector_index():
+    global _index
+    if _index is None:
+        encoder = get_encoder()
+        with _lock:
+            if _index is None:
+                _index = VectorIndex.load(encoder)
+                atexit.register(_index.save)
+    return _index
+
+
+def index_resume(label, text):
+    """Add an analyzed resume to the process index, saving every SAVE_INTERVAL additions"""
+    index = get_vector_index()
+    index.add(label, get_encoder().encode(text))
+    if len(index) % SAVE_INTERVAL == 0:
+        index.save()
+
+
+def _read_texts(directory):
+    """Text of every PDF or .txt file in a directory, keyed by file name"""
+    from resume_analyzer import ResumeAnalyzer
+
+    analyzer = ResumeAnalyzer()
+    texts = {}
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.lower().endswith('.pdf'):
+            text = analyzer.extract_text_from_pdf(path)
+        elif name.lower().endswith('.txt'):
+            with open(path) as f:
+                text = f.read()
+        else:
+            continue
+        if text:
+            texts[name] = text
+    return texts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local semantic vectors and similarity search for resumes")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    fit_parser = subparsers.add_parser('fit', help="Fit the SVD model on a directory of resumes")
+    fit_parser.add_argument('directory')
+    fit_parser.add_argument('--components', type=int, default=SVD_COMPONENTS)
+    index_parser = subparsers.add_parser('index', help="Add a directory of resumes to the similarity index")
+    index_parser.add_argument('directory')
+    search_parser = subparsers.add_parser('search', help="Find resumes similar to a job description file")
+    search_parser.add_argument('job_description')
+    search_parser.add_argument('-k', type=int, default=10)
+    bench_parser = subparsers.add_parser('bench', help="Time searches over a synthetic index")
+    bench_parser.add_argument('--vectors', type=int, default=100000)
+    args = parser.parse_args()
+
+    if args.command == 'fit':
+        texts = list(_read_texts(args.directory).values())
+        components, idf = fit_model(texts, args.components)
+        os.makedirs(os.path.dirname(os.path.abspath(MODEL_PATH)), exist_ok=True)
+        np.savez(MODEL_PATH, components=components, idf=idf)
+        print(f"Fitted {components.shape[1]} components on {len(texts)} document(s) -> {MODEL_PATH}")
+    elif args.command == 'index':
+        encoder = get_encoder()
+        index = get_vector_index()
+        for name, text in _read_texts(args.directory).items():
+            index.add(name, encoder.encode(text))
+        index.save()
+        print(f"Indexed {len(index)} resume(s) in {INDEX_DIR}")
+    elif args.command == 'search':
+        with open(args.job_description) as f:
+            query = get_encoder().encode(f.read())
+        for label, score in get_vector_index().search(query, args.k):
+            print(f"{score:.3f}  {label}")
+    else:
+        import time
+
+        rng = np.random.default_rng(0)
+        # Clustered synthetic vectors, like resumes grouped by role
+        centers = rng.standard_normal((200, 128)).astype(np.float32)
+        vectors = centers[rng.integers(0, 200, args.vectors)] + 0.5 * rng.standard_normal((args.vectors, 128))
+        vectors = (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+        index = VectorIndex(128, 'bench', directory=None)
+        for i, vector in enumerate(vectors):
+            index.add(i, vector)
+        start = time.perf_counter()
+        index.search(vectors[0])
+        print(f"{args.vectors} vectors, {len(index.centroids)} lists, train {time.perf_counter() - start:.2f}s")
+
+        queries = vectors[rng.integers(0, args.vectors, 200)] + 0.1 * rng.standard_normal((200, 128))
+        queries = queries.astype(np.float32)
+        start = time.perf_counter()
+        approximate = [[label for label, _ in index.search(q, 10)] for q in queries]
+        elapsed = (time.perf_counter() - start) / len(queries)
+        exact = [np.argsort(-(vectors @ q))[:10] for q in queries]
+        recall = np.mean([len(set(a) & set(e.tolist())) / 10 for a, e in zip(approximate, exact)])
+        print(f"IVF search {elapsed * 1000:.2f}ms per query, recall@10 {recall:.2f} (nprobe={NPROBE})")
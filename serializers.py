@@ -0,0 +1,121 @@
+# serializers.py
+import json
+
+from results import Record
+
+# Optional fast encoders; plain json is used when they are not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+# Progressive /analyze responses: one JSON object per line, or server-sent events
+NDJSON_MIMETYPE = 'application/x-ndjson'
+SSE_MIMETYPE = 'text/event-stream'
+
+
+def _default(value):
+    """Fallback hook for encoders that don't understand records"""
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def negotiate(accept_header):
+    """Pick the response mimetype for an Accept header"""
+    if accept_header and msgpack is not None:
+        for mimetype in MSGPACK_MIMETYPES:
+            if mimetype in accept_header:
+                return mimetype
+    return JSON_MIMETYPE
+
+
+def negotiate_stream(accept_header):
+    """Streaming mimetype asked for by an Accept header, or None for a single response"""
+    if accept_header:
+        for mimetype in (NDJSON_MIMETYPE, SSE_MIMETYPE):
+            if mimetype in accept_header:
+                return mimetype
+    return None
+
+
+def _camel(name):
+    head, *rest = name.split('_')
+    return head + ''.join(part.title() for part in rest)
+
+
+def dumps(payload, mimetype=JSON_MIMETYPE):
+    """Serialize a payload of dicts, lists and records to bytes in the given format"""
+    if mimetype in MSGPACK_MIMETYPES:
+        return msgpack.packb(payload, default=_default, use_bin_type=True)
+    if orjson is not None:
+        # orjson serializes slotted dataclasses natively without building dicts first
+        return orjson.dumps(payload, default=_default)
+    return json.dumps(payload, default=_default, separators=(',', ':')).encode('utf-8')
+
+
+def build_api_response(ats_result, warnings=None):
+    """Shape an ATS result into the /analyze response, sharing records instead of copying them"""
+    base_analysis = ats_result.base_analysis
+    metrics = base_analysis.metrics
+    response = {
+        "success": True,
+        "ats_score": ats_result.ats_score,
+        "recommendations": ats_result.recommendations,
+        "metrics": {
+            "wordCount": metrics.word_count,
+            "actionVerbCount": metrics.action_verbs['count'],
+            "weakPhraseCount": metrics.weak_phrases['count'],
+            "sectionsFound": base_analysis.sections_found,
+            "formattingIssues": ats_result.formatting_issues
+        },
+        "keywordAnalysis": {
+            "industryKeywords": base_analysis.industry_keywords,
+            "fuzzyMatches": ats_result.fuzzy_matches
+        },
+        "factorScores": ats_result.factor_scores
+    }
+    if ats_result.semantic_similarity is not None:
+        response["keywordAnalysis"]["semanticSimilarity"] = round(ats_result.semantic_similarity, 4)
+    if ats_result.job_matches:
+        response["jobMatches"] = [{
+            "jobId": match.job_id,
+            "keywordMatch": round(match.keyword_match, 4),
+            "atsScore": match.ats_score,
+            "missingKeywords": match.missing_keywords
+        } for match in ats_result.job_matches]
+    if ats_result.degraded_stages:
+        response["degradedStages"] = ats_result.degraded_stages
+    if warnings:
+        response["warnings"] = warnings
+    return response
+
+
+def build_factor_event(update):
+    """Shape a FactorUpdate into a streamed 'factor' event"""
+    event = {
+        "factor": update.factor,
+        "score": update.score,
+        "weight": update.weight,
+        "recommendations": update.recommendations
+    }
+    for name, value in (update.details or {}).items():
+        if value is not None:
+            event[_camel(name)] = value
+    return event
+
+
+def stream_event(event, payload, mimetype=NDJSON_MIMETYPE):
+    """Encode one event of a progressive response as an NDJSON line or an SSE message"""
+    if mimetype == SSE_MIMETYPE:
+        return b'event: ' + event.encode() + b'\ndata: ' + dumps(payload) + b'\n\n'
+    return dumps({"event": event, "data": payload}) + b'\n'
@@ -0,0 +1,193 @@
+# single_flight.py
+import os
+import json
+import time
+import fcntl
+import threading
+
+import metrics
+import serializers
+
+# Concurrent uploads of the same file with the same options share one analysis
+ENABLED = os.environ.get('SINGLE_FLIGHT_ENABLED', '1') == '1'
+# Longest a duplicate waits for the analysis it joined before running its own
+WAIT_TIMEOUT = float(os.environ.get('SINGLE_FLIGHT_TIMEOUT', 60))
+# Directory for per-key lock files, so duplicates in other gunicorn workers wait too (off when unset)
+LOCK_DIR = os.environ.get('SINGLE_FLIGHT_LOCK_DIR', '')
+# Lock and result files untouched for this long are swept
+RESULT_TTL = 60
+SWEEP_INTERVAL = 100
+POLL_INTERVAL = 0.02
+
+
+class Flight:
+    """One in-progress computation that any number of callers can wait on"""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self.result = None
+
+    def resolve(self, result):
+        self.result = result
+        self._done.set()
+
+    def wait(self, timeout):
+        """The leader's result, or None if it failed or took longer than timeout"""
+        self._done.wait(timeout)
+        return self.result
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+
+class _Claim:
+    """The leader's hold on a key: the in-process flight plus, optionally, the cross-worker lock"""
+
+    def __init__(self, group, key, flight, lock_file=None):
+        self._group = group
+        self.key = key
+        self.flight = flight
+        self.lock_file = lock_file
+        self._finished = False
+
+    def finish(self, result=None):
+        """Hand result (None on failure) to every waiter and release the key; later calls are ignored"""
+        if not self._finished:
+            self._finished = True
+            self._group._finish(self, result)
+
+
+class SingleFlight:
+    """Collapse concurrent work on the same key into one computation.
+
+    The first caller for a key becomes its leader and computes; callers arriving
+    while it runs get the leader's result instead of repeating the work. Within a
+    process they wait on a shared Flight. With a lock directory, a leader also holds
+    an exclusive flock on the key's lock file, and leaders in other workers wait for
+    that lock and then read the result it left next to the file.
+    """
+
+    def __init__(self, lock_dir=LOCK_DIR, timeout=WAIT_TIMEOUT):
+        self.lock_dir = lock_dir
+        self.timeout = timeout
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._finished = 0
+        if lock_dir:
+            os.makedirs(lock_dir, exist_ok=True)
+
+    def join(self, key):
+        """(claim, result): a _Claim to finish if this caller must compute, else the shared result.
+
+        When a leader fails its waiters join again, so one of them leads the retry. A
+        caller still waiting after the timeout gets a claim of its own (shared with
+        nobody), so it can always fall back to computing.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                if flight is None:
+                    flight = self._flights[key] = Flight()
+                    break
+            result = flight.wait(max(0.0, deadline - time.monotonic()))
+            if result is not None:
+                metrics.increment('single_flight_requests_total', labels={'role': 'follower'})
+                return None, result
+            if not flight.done or time.monotonic() >= deadline:
+                metrics.increment('single_flight_requests_total', labels={'role': 'fallback'})
+                return _Claim(self, key, None), None
+
+        claim = _Claim(self, key, flight)
+        if self.lock_dir:
+            result = self._claim_lock(claim)
+            if result is not None:
+                metrics.increment('single_flight_requests_total', labels={'role': 'remote_follower'})
+                claim.finish(result)
+                return None, result
+        metrics.increment('single_flight_requests_total', labels={'role': 'leader'})
+        return claim, None
+
+    def _path(self, key, suffix):
+        return os.path.join(self.lock_dir, f'{key}.{suffix}')
+
+    def _claim_lock(self, claim):
+        """Take the key's lock file, returning the result another worker left if it computed meanwhile"""
+        lock_file = open(self._path(claim.key, 'lock'), 'a')
+        started = time.time()
+        deadline = time.monotonic() + self.timeout
+        waited = False
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    # The other worker is stuck; compute without the lock rather than wait forever
+                    lock_file.close()
+                    return None
+                waited = True
+                time.sleep(POLL_INTERVAL)
+        if waited:
+            # Only a result written while this worker waited belongs to the flight it waited on
+            # (with a second of slack, as file times come from a coarser clock)
+            result = self._read_result(claim.key, since=started - 1)
+            if result is not None:
+                lock_file.close()
+                return result
+        claim.lock_file = lock_file
+        # Keep a lock in use from looking stale to sweep()
+        os.utime(lock_file.name)
+        return None
+
+    def _read_result(self, key, since):
+        path = self._path(key, 'json')
+        try:
+            if os.path.getmtime(path) < since:
+                return None
+            with open(path, 'rb') as f:
+                return json.loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def _write_result(self, key, result):
+        # Written to a temporary name and renamed, so readers never see half a result
+        path = self._path(key, 'json')
+        temporary = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(temporary, 'wb') as f:
+                f.write(serializers.dumps(result, serializers.JSON_MIMETYPE))
+            os.replace(temporary, path)
+        except (OSError, TypeError) as e:
+            print(f"Could not share result for {key}: {e}")
+
+    def _finish(self, claim, result):
+        if claim.lock_file is not None:
+            if result is not None:
+                self._write_result(claim.key, result)
+            fcntl.flock(claim.lock_file, fcntl.LOCK_UN)
+            claim.lock_file.close()
+        if claim.flight is not None:
+            with self._lock:
+                if self._flights.get(claim.key) is claim.flight:
+                    del self._flights[claim.key]
+                self._finished += 1
+                sweep = self.lock_dir and self._finished % SWEEP_INTERVAL == 0
+            claim.flight.resolve(result)
+            if sweep:
+                self.sweep()
+
+    def sweep(self):
+        """Delete lock and result files untouched for longer than RESULT_TTL"""
+        cutoff = time.time() - RESULT_TTL
+        for name in os.listdir(self.lock_dir):
+            path = os.path.join(self.lock_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def __len__(self):
+        return len(self._flights)
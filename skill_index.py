@@ -0,0 +1,97 @@
+# skill_index.py
+import threading
+
+import keyword_taxonomy
+from keyword_taxonomy import tokenize
+
+# Generic words that never count as keywords when comparing against a job description
+KEYWORD_STOPWORDS = {'and', 'the', 'to', 'of', 'for', 'in', 'on', 'at', 'with', 'by', 'a', 'an'}
+
+# Words outside the taxonomy get negative ids so they can never collide with skill ids
+_WORD_ID_MASK = (1 << 62) - 1
+
+
+class SkillIndex:
+    """Hashed canonical-form map from every skill variant and phrase to its skill id.
+
+    Built once per loaded taxonomy; text is matched in a single left-to-right pass,
+    taking the longest known phrase at each position.
+    """
+
+    def __init__(self, taxonomy):
+        self.taxonomy = taxonomy
+        self.phrases = {}
+        self.phrase_starts = set()
+        self.max_words = 1
+
+        for form, tid in taxonomy.variants():
+            self.phrases[form] = tid
+            words = form.split(' ')
+            if len(words) > 1:
+                self.phrase_starts.add(words[0])
+                self.max_words = max(self.max_words, len(words))
+
+    def term(self, skill_id):
+        return self.taxonomy.term(skill_id)
+
+    def _scan(self, tokens):
+        """Yield (skill id or None, token) for each match, consuming multiword phrases whole"""
+        phrases = self.phrases
+        i = 0
+        n = len(tokens)
+        while i < n:
+            token = tokens[i]
+            if token in self.phrase_starts:
+                for size in range(min(self.max_words, n - i), 1, -1):
+                    skill_id = phrases.get(' '.join(tokens[i:i + size]))
+                    if skill_id is not None:
+                        yield skill_id, None
+                        i += size
+                        break
+                else:
+                    yield phrases.get(token), token
+                    i += 1
+            else:
+                yield phrases.get(token), token
+                i += 1
+
+    def match_ids(self, text):
+        """Skill ids mentioned anywhere in the text"""
+        return frozenset(skill_id for skill_id, _ in self._scan(tokenize(text)) if skill_id is not None)
+
+    def keyword_ids(self, text):
+        """Skill ids plus ids for the remaining significant words, for free-text comparisons"""
+        return set(self.keyword_terms(text))
+
+    def keyword_terms(self, text):
+        """Like keyword_ids, but mapping each id to the term or word it stands for"""
+        terms = {}
+        for skill_id, token in self.keywords(text):
+            if skill_id is None:
+                terms[-1 - (hash(token) & _WORD_ID_MASK)] = token
+            elif skill_id not in terms:
+                terms[skill_id] = self.term(skill_id)
+        return terms
+
+    def keywords(self, text):
+        """(skill id, token) for each skill and (None, word) for each significant word, in order"""
+        for skill_id, token in self._scan(tokenize(text)):
+            if skill_id is not None or (len(token) > 2 and token not in KEYWORD_STOPWORDS):
+                yield skill_id, token
+
+
+_lock = threading.Lock()
+_index = None
+
+
+def get_skill_index():
+    """Return the index for the current taxonomy, rebuilding it after a taxonomy reload"""
+    global _index
+    taxonomy = keyword_taxonomy.get_taxonomy()
+    index = _index
+    if index is None or index.taxonomy is not taxonomy:
+        with _lock:
+            if _index is None or _index.taxonomy is not taxonomy:
+                _index = SkillIndex(taxonomy)
+            index = _index
+    return index
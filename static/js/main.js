@@ -10,38 +10,179 @@ const backButton = document.getElementById('back-button');
 
 // Event Listeners
 resumeForm.addEventListener('submit', handleFormSubmit);
-backButton.addEventListener('submit', resetForm);
+backButton.addEventListener('click', resetForm);
+
+// Results of recent analyses, kept in the browser so re-checking a resume is instant
+const RESULT_DB = 'resume-insights';
+const RESULT_STORE = 'results';
+const MAX_STORED_RESULTS = 20;
+
+// Hex SHA-256 of an ArrayBuffer or string
+async function sha256Hex(data) {
+    if (typeof data === 'string') {
+        data = new TextEncoder().encode(data);
+    }
+    const digest = await crypto.subtle.digest('SHA-256', data);
+    return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+}
+
+function openResultDb() {
+    return new Promise((resolve, reject) => {
+        const request = indexedDB.open(RESULT_DB, 1);
+        request.onupgradeneeded = () => {
+            const store = request.result.createObjectStore(RESULT_STORE, { keyPath: 'key' });
+            store.createIndex('storedAt', 'storedAt');
+        };
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+async function loadStoredResult(key) {
+    try {
+        const db = await openResultDb();
+        return await new Promise((resolve, reject) => {
+            const request = db.transaction(RESULT_STORE).objectStore(RESULT_STORE).get(key);
+            request.onsuccess = () => resolve(request.result ? request.result.data : null);
+            request.onerror = () => reject(request.error);
+        });
+    } catch (error) {
+        // Private browsing and old browsers have no IndexedDB; just skip the cache
+        return null;
+    }
+}
+
+async function storeResult(key, data) {
+    try {
+        const db = await openResultDb();
+        const tx = db.transaction(RESULT_STORE, 'readwrite');
+        const store = tx.objectStore(RESULT_STORE);
+        store.put({ key: key, data: data, storedAt: Date.now() });
+        // Drop the oldest entries beyond the limit
+        const countRequest = store.count();
+        countRequest.onsuccess = () => {
+            let excess = countRequest.result - MAX_STORED_RESULTS;
+            if (excess <= 0) return;
+            store.index('storedAt').openCursor().onsuccess = event => {
+                const cursor = event.target.result;
+                if (cursor && excess-- > 0) {
+                    cursor.delete();
+                    cursor.continue();
+                }
+            };
+        };
+    } catch (error) {
+        console.warn('Could not store result:', error);
+    }
+}
+
+// Yield the events of an NDJSON response as each line arrives
+async function* readEvents(response) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffered += decoder.decode(value, { stream: true });
+        const lines = buffered.split('\n');
+        buffered = lines.pop();
+        for (const line of lines) {
+            if (line.trim()) yield JSON.parse(line);
+        }
+    }
+    if (buffered.trim()) yield JSON.parse(buffered);
+}
+
+// POST the form and stream the analysis, rendering each factor as the server scores it.
+// Without the file the server answers from its cache or with 404 cache_miss (returns null).
+async function postAnalysis(formData) {
+    const response = await fetch(`${API_URL}/analyze`, {
+        method: 'POST',
+        body: formData,
+        headers: { 'Accept': 'application/x-ndjson' },
+    });
+    if (response.status === 404) {
+        const body = await response.json().catch(() => ({}));
+        if (body.code === 'cache_miss') {
+            return null;
+        }
+    }
+    if (!response.ok) {
+        throw new Error('Failed to analyze resume');
+    }
+    for await (const event of readEvents(response)) {
+        if (event.event === 'factor') {
+            displayFactor(event.data);
+        } else if (event.event === 'result') {
+            return event.data;
+        } else if (event.event === 'error') {
+            throw new Error(event.data.error);
+        }
+    }
+    throw new Error('Analysis stream ended without a result');
+}
+
+// Analyze the form's resume, skipping the upload whenever a result is already known
+async function analyzeResume(formData) {
+    const file = formData.get('resume');
+    const fileHash = await sha256Hex(await file.arrayBuffer());
+    const options = [];
+    for (const [name, value] of formData.entries()) {
+        if (name !== 'resume') {
+            options.push([name, value]);
+        }
+    }
+    const key = `${fileHash}:${await sha256Hex(JSON.stringify(options))}`;
+    
+    let data = await loadStoredResult(key);
+    if (data) {
+        return data;
+    }
+    
+    // Ask for the result by hash first, uploading only if the server has not seen the file
+    const hashOnly = new FormData();
+    options.forEach(([name, value]) => hashOnly.append(name, value));
+    hashOnly.append('resume_sha256', fileHash);
+    data = await postAnalysis(hashOnly);
+    if (!data) {
+        formData.append('resume_sha256', fileHash);
+        data = await postAnalysis(formData);
+    }
+    
+    // The server never reuses a degraded result, so neither does the browser: a later
+    // re-check gets the full analysis once the service has capacity again
+    if (!(data && data.degradedStages && data.degradedStages.length)) {
+        storeResult(key, data);
+    }
+    return data;
+}
+
+// Set while an analysis is running, so a double-clicked submit sends one upload
+let analysisInFlight = false;
 
 // Handle form submission
 async function handleFormSubmit(event) {
     event.preventDefault();
+    if (analysisInFlight) {
+        return;
+    }
+    analysisInFlight = true;
     
     // Show loading screen
     uploadSection.classList.add('d-none');
     loadingSection.classList.remove('d-none');
+    resetResults();
     
     // Get form data
     const formData = new FormData(resumeForm);
     
     try {
-        // Send data to API
-        const response = await fetch(`${API_URL}/analyze`, {
-            method: 'POST',
-            body: formData,
-        });
-        
-        if (!response.ok) {
-            throw new Error('Failed to analyze resume');
-        }
-        
-        const data = await response.json();
+        const data = await analyzeResume(formData);
         
         // Display results
         displayResults(data);
-        
-        // Hide loading, show results
-        loadingSection.classList.add('d-none');
-        resultsSection.classList.remove('d-none');
+        showResults();
         
     } catch (error) {
         console.error('Error:', error);
@@ -49,120 +190,164 @@ async function handleFormSubmit(event) {
         
         // Return to upload screen
         loadingSection.classList.add('d-none');
+        resultsSection.classList.add('d-none');
         uploadSection.classList.remove('d-none');
+    } finally {
+        analysisInFlight = false;
     }
 }
 
-// Display analysis results
-function displayResults(data) {
-    // Update ATS score
-    document.getElementById('ats-score').textContent = `${data.ats_score}%`;
-    
-    // Update metrics
-    document.getElementById('word-count').textContent = data.word_count;
-    document.getElementById('action-verb-count').textContent = data.action_verb_count;
-    document.getElementById('weak-phrase-count').textContent = data.weak_phrase_count;
+// Hide loading, show results
+function showResults() {
+    loadingSection.classList.add('d-none');
+    resultsSection.classList.remove('d-none');
+}
+
+// Factors scored so far in a streamed analysis
+let partialFactors = {};
+
+function resetResults() {
+    partialFactors = {};
+    ['sections-found', 'formatting-issues', 'recommendations', 'keyword-analysis'].forEach(id => {
+        document.getElementById(id).innerHTML = '';
+    });
+    ['word-count', 'action-verb-count', 'weak-phrase-count'].forEach(id => {
+        document.getElementById(id).textContent = '…';
+    });
+    document.getElementById('ats-score').textContent = '…';
+}
+
+// Render one streamed factor: its score, recommendations and any details it carries
+function displayFactor(update) {
+    partialFactors[update.factor] = update;
+    showResults();
     
-    // Update sections found
-    const sectionsFoundEl = document.getElementById('sections-found');
-    sectionsFoundEl.innerHTML = '';
+    // Provisional score over the factors settled so far
+    const settled = Object.values(partialFactors);
+    const weight = settled.reduce((sum, f) => sum + f.weight, 0);
+    const score = settled.reduce((sum, f) => sum + f.score * f.weight, 0) / weight;
+    document.getElementById('ats-score').textContent = `~${Math.round(score * 100)}%`;
     
-    data.sections_found.forEach(section => {
-        const badge = document.createElement('span');
-        badge.className = 'badge bg-success me-1 mb-1';
-        badge.textContent = section;
-        sectionsFoundEl.appendChild(badge);
-    });
+    if (update.formattingIssues) {
+        renderFormattingIssues(update.formattingIssues);
+    }
+    if (update.wordCount !== undefined) {
+        document.getElementById('word-count').textContent = update.wordCount;
+    }
+    if (update.actionVerbCount !== undefined) {
+        document.getElementById('action-verb-count').textContent = update.actionVerbCount;
+    }
+    const recommendationsEl = document.getElementById('recommendations');
+    update.recommendations.forEach(rec => recommendationsEl.appendChild(recommendationItem(rec)));
     
-    // Update formatting issues
+    const factorScores = {};
+    settled.forEach(f => { factorScores[f.factor] = Math.round(f.score * 100); });
+    createFactorScoresChart(factorScores);
+}
+
+function recommendationItem(rec) {
+    const recItem = document.createElement('div');
+    recItem.className = `alert ${rec.priority === 'High' ? 'alert-danger' : 'alert-warning'} mb-2`;
+    recItem.textContent = `${rec.category}: ${rec.recommendation}`;
+    return recItem;
+}
+
+function renderFormattingIssues(issues) {
     const formattingIssuesEl = document.getElementById('formatting-issues');
     formattingIssuesEl.innerHTML = '';
     
-    if (data.formatting_issues.length === 0) {
+    if (issues.length === 0) {
         const noIssues = document.createElement('p');
         noIssues.className = 'text-success mb-0';
         noIssues.textContent = 'No formatting issues detected';
         formattingIssuesEl.appendChild(noIssues);
     } else {
-        data.formatting_issues.forEach(issue => {
+        issues.forEach(issue => {
             const issueItem = document.createElement('div');
             issueItem.className = 'alert alert-warning py-1 px-2 mb-1';
             issueItem.textContent = issue;
             formattingIssuesEl.appendChild(issueItem);
         });
     }
+}
+
+function badgeList(values, className) {
+    const container = document.createElement('div');
+    container.className = 'd-flex flex-wrap';
+    values.forEach(value => {
+        const badge = document.createElement('span');
+        badge.className = `badge ${className} me-1 mb-1`;
+        badge.textContent = value;
+        container.appendChild(badge);
+    });
+    return container;
+}
+
+// Display the complete analysis, replacing anything rendered while streaming
+function displayResults(data) {
+    const metrics = data.metrics;
+    
+    // Update ATS score
+    document.getElementById('ats-score').textContent = `${data.ats_score}%`;
+    
+    // Update metrics
+    document.getElementById('word-count').textContent = metrics.wordCount;
+    document.getElementById('action-verb-count').textContent = metrics.actionVerbCount;
+    document.getElementById('weak-phrase-count').textContent = metrics.weakPhraseCount;
     
-    // Update recommendations
+    // Update sections found
+    const sectionsFoundEl = document.getElementById('sections-found');
+    sectionsFoundEl.innerHTML = '';
+    sectionsFoundEl.appendChild(badgeList(metrics.sectionsFound, 'bg-success'));
+    
+    // Update formatting issues
+    renderFormattingIssues(metrics.formattingIssues);
+    
+    // Update recommendations, now in priority order
     const recommendationsEl = document.getElementById('recommendations');
     recommendationsEl.innerHTML = '';
-    
-    data.recommendations.forEach(rec => {
-        const recItem = document.createElement('div');
-        recItem.className = 'alert alert-warning mb-2';
-        recItem.textContent = rec;
-        recommendationsEl.appendChild(recItem);
-    });
+    data.recommendations.forEach(rec => recommendationsEl.appendChild(recommendationItem(rec)));
     
     // Update keyword analysis
     const keywordAnalysisEl = document.getElementById('keyword-analysis');
     keywordAnalysisEl.innerHTML = '';
+    const keywordAnalysis = data.keywordAnalysis;
     
-    if (data.job_description_match) {
-        // Create matched keywords section
-        const matchedKeywords = document.createElement('div');
-        matchedKeywords.className = 'mb-3';
-        
-        const matchedTitle = document.createElement('h5');
-        matchedTitle.textContent = 'Matched Keywords';
-        matchedKeywords.appendChild(matchedTitle);
-        
-        const matchedContainer = document.createElement('div');
-        matchedContainer.className = 'd-flex flex-wrap';
-        
-        data.job_description_match.matched_keywords.forEach(keyword => {
-            const badge = document.createElement('span');
-            badge.className = 'badge bg-success me-1 mb-1';
-            badge.textContent = keyword;
-            matchedContainer.appendChild(badge);
-        });
-        
-        matchedKeywords.appendChild(matchedContainer);
-        keywordAnalysisEl.appendChild(matchedKeywords);
-        
-        // Create missing keywords section
-        const missingKeywords = document.createElement('div');
-        missingKeywords.className = 'mb-3';
-        
-        const missingTitle = document.createElement('h5');
-        missingTitle.textContent = 'Missing Keywords';
-        missingKeywords.appendChild(missingTitle);
-        
-        const missingContainer = document.createElement('div');
-        missingContainer.className = 'd-flex flex-wrap';
-        
-        data.job_description_match.missing_keywords.forEach(keyword => {
-            const badge = document.createElement('span');
-            badge.className = 'badge bg-danger me-1 mb-1';
-            badge.textContent = keyword;
-            missingContainer.appendChild(badge);
-        });
-        
-        missingKeywords.appendChild(missingContainer);
-        keywordAnalysisEl.appendChild(missingKeywords);
-        
-        // Add match percentage
-        const matchPercentage = document.createElement('p');
-        matchPercentage.className = 'mt-2';
-        matchPercentage.innerHTML = `<strong>Match Rate:</strong> ${data.job_description_match.match_percentage}%`;
-        keywordAnalysisEl.appendChild(matchPercentage);
-    } else {
-        const noJobDesc = document.createElement('p');
-        noJobDesc.textContent = 'No job description provided for keyword matching.';
-        keywordAnalysisEl.appendChild(noJobDesc);
+    Object.entries(keywordAnalysis.industryKeywords).forEach(([industry, keywords]) => {
+        if (keywords.length === 0) return;
+        const title = document.createElement('h5');
+        title.textContent = industry.replace(/_/g, ' ').replace(/\b\w/g, c => c.toUpperCase());
+        keywordAnalysisEl.appendChild(title);
+        keywordAnalysisEl.appendChild(badgeList(keywords, 'bg-success'));
+    });
+    
+    if (keywordAnalysis.fuzzyMatches && keywordAnalysis.fuzzyMatches.length) {
+        const title = document.createElement('h5');
+        title.textContent = 'Misspelled Skills';
+        keywordAnalysisEl.appendChild(title);
+        keywordAnalysisEl.appendChild(badgeList(
+            keywordAnalysis.fuzzyMatches.map(m => `${m.found} → ${m.term}`), 'bg-danger'));
+    }
+    
+    if (keywordAnalysis.semanticSimilarity !== undefined) {
+        const similarity = document.createElement('p');
+        similarity.className = 'mt-2';
+        similarity.innerHTML = `<strong>Similarity to job description:</strong> ${Math.round(keywordAnalysis.semanticSimilarity * 100)}%`;
+        keywordAnalysisEl.appendChild(similarity);
+    }
+    
+    if (!keywordAnalysisEl.children.length) {
+        const noKeywords = document.createElement('p');
+        noKeywords.textContent = 'No industry keywords found.';
+        keywordAnalysisEl.appendChild(noKeywords);
     }
     
     // Create factor scores chart
-    createFactorScoresChart(data.factor_scores);
+    const factorScores = {};
+    Object.entries(data.factorScores).forEach(([factor, score]) => {
+        factorScores[factor] = Math.round(score * 100);
+    });
+    createFactorScoresChart(factorScores);
 }
 
 // Create radar chart for factor scores
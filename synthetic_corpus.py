@@ -0,0 +1,206 @@
+# synthetic_corpus.py
+import os
+import random
+import zipfile
+import argparse
+from xml.sax.saxutils import escape
+
+FIRST_NAMES = ['Aarav', 'Diya', 'Rohan', 'Isha', 'Kabir', 'Meera', 'Arjun', 'Priya', 'Vikram', 'Ananya']
+LAST_NAMES = ['Sharma', 'Verma', 'Gupta', 'Iyer', 'Khan', 'Reddy', 'Mehta', 'Nair', 'Singh', 'Das']
+
+DEGREES = ['B.Tech in Computer Science', 'Bachelor of Science in Statistics', 'MBA in Marketing',
+           'Master of Science in Data Science', 'BBA in Finance']
+INSTITUTIONS = ['K.R. Mangalam University', 'Delhi University', 'Indian Institute of Technology',
+                'Amity Institute of Technology', 'St. Xavier College']
+COMPANIES = ['Infosys', 'Zomato', 'Flipkart', 'TCS', 'Razorpay', 'Freshworks', 'Wipro', 'Swiggy']
+ROLES = ['Software Engineer Intern', 'Data Analyst', 'Marketing Associate', 'Backend Developer',
+         'Project Coordinator', 'Financial Analyst Intern']
+
+ACTION_VERBS = ['Developed', 'Implemented', 'Designed', 'Led', 'Optimized', 'Built', 'Analyzed',
+                'Deployed', 'Coordinated', 'Streamlined', 'Delivered', 'Engineered']
+WEAK_OPENERS = ['Responsible for', 'Worked on', 'Helped with', 'Involved in']
+OBJECTS = ['a REST API for order tracking', 'dashboards in Excel and SQL', 'a React frontend',
+           'CI/CD pipelines with Docker', 'machine learning models with pandas and numpy',
+           'social media campaigns with Google Analytics', 'budget forecasting reports',
+           'microservices on AWS', 'an agile sprint process using Jira']
+OUTCOMES = ['reducing latency by 30%', 'serving 10,000 daily users', 'cutting costs by 12%',
+            'improving conversion rate optimization', 'ahead of the project timeline',
+            'with full test coverage']
+
+SKILLS = ['Python', 'Java', 'JavaScript', 'React', 'Node.js', 'SQL', 'Git', 'Docker', 'Kubernetes',
+          'AWS', 'pandas', 'numpy', 'TensorFlow', 'Excel', 'SEO', 'Jira', 'Agile', 'Scrum']
+
+# A 2x2 grayscale image used for image-only pages
+IMAGE_BYTES = b'\x00\x80\x80\xff'
+
+
+def generate_resume_lines(seed=0, pages=1, lines_per_page=55):
+    """Generate the lines of a plausible resume spanning roughly the given number of pages"""
+    rng = random.Random(seed)
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    handle = name.lower().replace(' ', '.')
+
+    lines = [
+        name,
+        f"{handle}@example.com | +91 98{rng.randint(10000000, 99999999)} | linkedin.com/in/{handle.replace('.', '-')}",
+        f"github.com/{handle.replace('.', '')}",
+        '',
+        'EDUCATION',
+        rng.choice(DEGREES),
+        f"{rng.choice(INSTITUTIONS)}, {rng.randint(2016, 2024)}",
+        '',
+        'SKILLS',
+        ', '.join(rng.sample(SKILLS, 8)),
+        '',
+        'EXPERIENCE',
+    ]
+
+    # Leave room for the longest job entry plus the closing sections
+    target_lines = pages * lines_per_page
+    while len(lines) + 12 <= target_lines:
+        start = rng.randint(2015, 2023)
+        lines.append(f"{rng.choice(ROLES)}, {rng.choice(COMPANIES)} ({start} - {start + rng.randint(1, 3)})")
+        for _ in range(rng.randint(3, 5)):
+            opener = rng.choice(WEAK_OPENERS) if rng.random() < 0.15 else rng.choice(ACTION_VERBS)
+            lines.append(f"- {opener} {rng.choice(OBJECTS)}, {rng.choice(OUTCOMES)}.")
+        lines.append('')
+
+    lines.extend([
+        'PROJECTS',
+        f"- {rng.choice(ACTION_VERBS)} {rng.choice(OBJECTS)}.",
+        '',
+        'ACHIEVEMENTS',
+        f"- Ranked {rng.randint(1, 50)} in a national coding contest.",
+    ])
+    return lines
+
+
+def _escape_pdf_text(line):
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def _text_block(lines, x, y):
+    ops = ["BT", "/F1 10 Tf", "12 TL", f"{x} {y} Td"]
+    ops.extend(f"({_escape_pdf_text(line)}) Tj T*" for line in lines)
+    ops.append("ET")
+    return ops
+
+
+def write_pdf(lines, pdf_path, lines_per_page=55, image_only=False, columns=1, header=None, photo=False):
+    """Write lines to a minimal PDF file using the standard Helvetica font.
+
+    columns=2 flows each page's lines into two columns, header repeats a line at the
+    top of every page and photo places a small image beside the text.
+    """
+    pages = [lines[i:i + lines_per_page] for i in range(0, max(len(lines), 1), lines_per_page)] or [[]]
+
+    # Object numbers: 1 catalog, 2 page tree, 3 font, 4 image, then (page, content) pairs
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        4: (b"<< /Type /XObject /Subtype /Image /Width 2 /Height 2 /ColorSpace /DeviceGray "
+            b"/BitsPerComponent 8 /Length %d >>\nstream\n" % len(IMAGE_BYTES)) + IMAGE_BYTES + b"\nendstream",
+    }
+    kids = []
+    for index, page_lines in enumerate(pages):
+        page_num = 5 + index * 2
+        content_num = page_num + 1
+        kids.append(f"{page_num} 0 R")
+
+        if image_only:
+            resources = "<< /XObject << /Im1 4 0 R >> >>"
+            content = b"q 500 0 0 700 50 50 cm /Im1 Do Q"
+        else:
+            resources = "<< /Font << /F1 3 0 R >> /XObject << /Im1 4 0 R >> >>" if photo else \
+                "<< /Font << /F1 3 0 R >> >>"
+            text_ops = _text_block([header], 50, 805) if header else []
+            if columns == 2:
+                half = (len(page_lines) + 1) // 2
+                text_ops += _text_block(page_lines[:half], 50, 780) + _text_block(page_lines[half:], 320, 780)
+            else:
+                text_ops += _text_block(page_lines, 50, 780)
+            if photo:
+                text_ops.append("q 80 0 0 80 480 690 cm /Im1 Do Q")
+            content = '\n'.join(text_ops).encode('latin-1', errors='replace')
+
+        objects[page_num] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                             f"/Resources {resources} /Contents {content_num} 0 R >>").encode('latin-1')
+        objects[content_num] = (b"<< /Length %d >>\nstream\n" % len(content)) + content + b"\nendstream"
+
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode('latin-1')
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for num in sorted(objects):
+        offsets[num] = len(output)
+        output += b"%d 0 obj\n" % num + objects[num] + b"\nendobj\n"
+
+    xref_offset = len(output)
+    size = max(objects) + 1
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % size
+    for num in range(1, size):
+        output += b"%010d 00000 n \n" % offsets[num]
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref_offset)
+
+    with open(pdf_path, 'wb') as f:
+        f.write(output)
+    return pdf_path
+
+
+DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+DOCX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="word/document.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+    '</Relationships>'
+)
+
+
+def write_docx(lines, docx_path, font='Calibri'):
+    """Write lines as the paragraphs of a minimal DOCX (one run each, in a single font)"""
+    run_props = f'<w:rPr><w:rFonts w:ascii="{font}" w:hAnsi="{font}"/></w:rPr>'
+    body = ''.join(f'<w:p><w:r>{run_props}<w:t xml:space="preserve">{escape(line)}</w:t></w:r></w:p>'
+                   for line in lines)
+    document = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                f'<w:body>{body}<w:sectPr/></w:body></w:document>')
+    with zipfile.ZipFile(docx_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', DOCX_CONTENT_TYPES)
+        archive.writestr('_rels/.rels', DOCX_RELS)
+        archive.writestr('word/document.xml', document)
+    return docx_path
+
+
+def build_corpus(directory, page_counts=(1, 2, 4), per_size=3, seed=0):
+    """Write a corpus of synthetic resume PDFs and return their paths grouped by page count"""
+    os.makedirs(directory, exist_ok=True)
+    corpus = {}
+    for pages in page_counts:
+        corpus[pages] = []
+        for i in range(per_size):
+            path = os.path.join(directory, f"resume_{pages}p_{i}.pdf")
+            write_pdf(generate_resume_lines(seed=seed + pages * 1000 + i, pages=pages), path)
+            corpus[pages].append(path)
+    return corpus
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic resume PDF corpus")
+    parser.add_argument('directory', help="Output directory")
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 2, 4], help="Page counts to generate")
+    parser.add_argument('--count', type=int, default=3, help="Resumes per page count")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.directory, args.pages, args.count, args.seed)
+    for pages, paths in corpus.items():
+        print(f"{pages} page(s): {len(paths)} files")
@@ -0,0 +1,110 @@
+# tests/test_admission.py
+import time
+import threading
+
+import pytest
+
+from admission import AdmissionController, Overloaded, TokenBucket, identify, parse_weights
+
+
+def test_identify_by_origin_and_address():
+    assert identify({'Origin': 'https://app.example'}, '10.0.0.1', api_keys=frozenset()) == \
+        ('https://app.example|10.0.0.1', 'interactive')
+    assert identify({}, None, api_keys=frozenset()) == ('|unknown', 'interactive')
+
+
+def test_identify_listed_api_keys_only():
+    keys = frozenset({'bulk-key'})
+    assert identify({'X-API-Key': 'bulk-key'}, '10.0.0.1', api_keys=keys) == ('bulk-key', 'batch')
+    # An unlisted key can't pick its own identity
+    assert identify({'X-API-Key': 'made-up'}, '10.0.0.1', api_keys=keys) == ('|10.0.0.1', 'interactive')
+
+
+def test_priority_header_only_lowers_the_lane():
+    keys = frozenset({'bulk-key'})
+    assert identify({'X-Request-Priority': 'batch'}, '10.0.0.1', api_keys=keys)[1] == 'batch'
+    assert identify({'X-API-Key': 'bulk-key', 'X-Request-Priority': 'interactive'}, '10.0.0.1',
+                    api_keys=keys)[1] == 'batch'
+
+
+def test_parse_weights():
+    assert parse_weights('alpha=4, https://college.example=0.5,') == {'alpha': 4.0, 'https://college.example': 0.5}
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=1.0, burst=2)
+    assert bucket.take() == 0.0
+    assert bucket.take() == 0.0
+    assert 0 < bucket.take() <= 1.0
+
+
+def test_check_rate_per_client():
+    controller = AdmissionController(rate=0.001, burst=1, weights={})
+    controller.check_rate('a|1')
+    with pytest.raises(Overloaded) as error:
+        controller.check_rate('a|1')
+    assert error.value.code == 'rate_limited'
+    assert error.value.retry_after >= 1
+    controller.check_rate('b|1')
+
+
+def wait_for_queue(controller, depth):
+    deadline = time.monotonic() + 5
+    while controller.queue_depth() < depth:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_acquire_and_release():
+    controller = AdmissionController(slots=1, weights={})
+    ticket = controller.acquire('a|1')
+    granted = []
+    waiter = threading.Thread(target=lambda: granted.append(controller.acquire('b|1')))
+    waiter.start()
+    wait_for_queue(controller, 1)
+    assert not granted
+    ticket.release()
+    # A second release must not free a second slot
+    ticket.release()
+    waiter.join(5)
+    assert len(granted) == 1
+    assert controller._active == 1
+    granted[0].release()
+    assert controller._active == 0
+
+
+def test_interactive_lane_goes_first():
+    controller = AdmissionController(slots=1, weights={})
+    ticket = controller.acquire('a|1')
+    order = []
+
+    def request(client, lane):
+        with controller.acquire(client, lane):
+            order.append(lane)
+
+    threads = [threading.Thread(target=request, args=('bulk', 'batch'))]
+    threads[0].start()
+    wait_for_queue(controller, 1)
+    threads.append(threading.Thread(target=request, args=('b|1', 'interactive')))
+    threads[1].start()
+    wait_for_queue(controller, 2)
+    ticket.release()
+    for thread in threads:
+        thread.join(5)
+    assert order == ['interactive', 'batch']
+
+
+def test_full_queue_and_timeout_are_refused():
+    controller = AdmissionController(slots=1, max_queue=0, weights={})
+    with controller.acquire('a|1'):
+        with pytest.raises(Overloaded) as error:
+            controller.acquire('b|1')
+        assert error.value.code == 'overloaded'
+
+    controller = AdmissionController(slots=1, timeout=0.01, weights={})
+    with controller.acquire('a|1'):
+        with pytest.raises(Overloaded):
+            controller.acquire('b|1')
+        assert controller.queue_depth() == 0
+    # The cancelled waiter is skipped: the slot is free again
+    controller.acquire('c|1').release()
@@ -0,0 +1,99 @@
+# tests/test_feature_scanner.py
+import re
+import random
+
+import pytest
+
+from feature_scanner import scan
+
+# Fragments glued together at random: words the scanner looks for, the punctuation that
+# joins emails and phone numbers, and non-ASCII letters, digits and case oddities
+PIECES = [
+    'linkedin', 'LinkedIn', 'github', 'bachelor', 'Master', 'phd', 'doctor', 'bs', 'BA', 'ms', 'ma', 'mba',
+    'btech', 'mtech', 'university', 'College', 'institute', 'SCHOOL', 'john', 'me', 'gmail', 'com', 'org',
+    'edu', 'x', 'Z', '2020', '1999', '20', '19', '555', '123', '4567', '12345', '+1', '+44', '(555)', '0', '7',
+    '@', '.', '-', '_', '%', '+', '(', ')', ' ', ' ', ' ', '\t', '/', ',', ':',
+    'é', 'ß', 'Σ', 'ǅ', 'ﬁ', '²', '١', '٢٠٢٠', 'İ', 'K', 'linKedin', 'İbs',
+]
+SEEDS = range(4)
+CASES = 5000
+
+
+def fuzzed(rng, pieces=12):
+    return ''.join(rng.choice(PIECES) for _ in range(rng.randint(1, pieces)))
+
+
+def baseline(text, education, experience):
+    """The per-check regex searches the scanner replaced"""
+    return {
+        'email': bool(re.search(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', text)),
+        'phone': bool(re.search(r'(\+\d{1,3}\s?)?(\()?\d{3}(\))?[\s.-]?\d{3}[\s.-]?\d{4}', text)),
+        'linkedin': bool(re.search(r'linkedin\.com|linkedin', text.lower())),
+        'degree': bool(re.search(r'\b(bachelor|master|phd|doctor|mba|bs|ba|ms|ma|btech|mtech)\b',
+                                 education.lower())),
+        'year': bool(re.search(r'\b20\d{2}\b', education)),
+        'institution': bool(re.search(r'\b(university|college|institute|school)\b', education.lower())),
+        'digits': bool(re.search(r'\d{4}', experience.lower())),
+    }
+
+
+def scanned(found, education, experience):
+    return {
+        'email': 'email' in found,
+        'phone': 'phone' in found,
+        'linkedin': 'linkedin' in found,
+        'degree': 'degree' in education,
+        'year': any(year.startswith('20') for year in education.get('year', ())),
+        'institution': 'institution' in education,
+        'digits': 'digits' in experience,
+    }
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_scan_matches_baseline(seed):
+    rng = random.Random(seed)
+    for _ in range(CASES):
+        text = fuzzed(rng)
+        found = scan(text).matches
+        assert scanned(found, found, found) == baseline(text, text, text), repr(text)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_sections_match_baseline(seed):
+    rng = random.Random(seed)
+    for _ in range(CASES // 5):
+        lines = [fuzzed(rng, 4) for _ in range(rng.randint(3, 9))]
+        # Contiguous line ranges, as ResumeAnalyzer.identify_sections records them
+        first, second = sorted(rng.sample(range(len(lines) + 1), 2))
+        spans = {'education': (0, first), 'experience': (first, second)}
+        sections = {name: ' '.join(line.strip() for line in lines[start:end] if line.strip())
+                    for name, (start, end) in spans.items()}
+        text = '\n'.join(lines)
+        features = scan(text, spans)
+        assert (scanned(features.matches, features.sections.get('education', {}),
+                        features.sections.get('experience', {}))
+                == baseline(text, sections['education'], sections['experience'])), repr(text)
+
+
+def test_values_are_lowercased():
+    found = scan("Jane.Doe@Example.COM  BS, Stanford University, 2019\nLinkedIn: linkedin.com/in/jane").matches
+    assert found['email'] == ['jane.doe@example.com']
+    assert found['degree'] == ['bs']
+    assert found['institution'] == ['university']
+    assert found['year'] == ['2019']
+    assert found['linkedin'] == ['linkedin', 'linkedin']
+
+
+def test_profiles_count_anywhere():
+    assert 'linkedin' in scan('john@x.comlinkedin').matches
+    assert 'github' in scan('see mygithubpage').matches
+
+
+def test_characters_lowercasing_to_ascii():
+    # 'İ' is a letter where it is written, so no year starts after it, but it lowercases
+    # to 'i' and a combining dot, which leaves 'bs' a word of its own
+    assert 'year' not in scan('İ2020').matches
+    assert 'degree' in scan('İbs').matches
+    # The Kelvin sign lowercases to 'k'
+    assert 'linkedin' in scan('linKedin').matches
+    assert 'email' not in scan('K@x.com').matches
@@ -0,0 +1,144 @@
+# tests/test_result_cache.py
+import json
+import socket
+import threading
+
+import pytest
+
+from result_cache import ResultCache, MemoryBackend, NullBackend, SQLiteBackend, RedisBackend
+from results import ParsedDocument, LayoutFacts, TextFeatures
+
+SHA = 'ab' * 32
+OPTIONS = 'options-key'
+
+
+class RedisStandIn:
+    """Just enough of a Redis server for the backend: GET, SET ... PX and DBSIZE, no expiry"""
+
+    def __init__(self):
+        self.values = {}
+        self.server = socket.create_server(('127.0.0.1', 0))
+        self.url = f'redis://127.0.0.1:{self.server.getsockname()[1]}/0'
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                connection, _ = self.server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(connection,), daemon=True).start()
+
+    def _handle(self, connection):
+        reader = connection.makefile('rb')
+        while True:
+            line = reader.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:-2])):
+                length = int(reader.readline()[1:-2])
+                args.append(reader.read(length + 2)[:-2])
+            command = args[0].upper()
+            if command == b'GET':
+                value = self.values.get(args[1])
+                reply = b'$-1\r\n' if value is None else b'$%d\r\n%s\r\n' % (len(value), value)
+            elif command == b'SET':
+                self.values[args[1]] = args[2]
+                reply = b'+OK\r\n'
+            elif command == b'DBSIZE':
+                reply = b':%d\r\n' % len(self.values)
+            else:
+                reply = b'-ERR unknown command\r\n'
+            connection.sendall(reply)
+
+    def close(self):
+        self.server.close()
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'redis'])
+def cache(request, tmp_path):
+    if request.param == 'memory':
+        yield ResultCache(MemoryBackend(size=8))
+    elif request.param == 'sqlite':
+        yield ResultCache(SQLiteBackend(str(tmp_path / 'cache.sqlite3')))
+    else:
+        server = RedisStandIn()
+        yield ResultCache(RedisBackend(server.url))
+        server.close()
+
+
+def as_dict(response):
+    """Shared backends hand back the stored JSON bytes"""
+    return json.loads(bytes(response)) if isinstance(response, (bytes, bytearray)) else response
+
+
+def test_result_round_trip(cache):
+    response = {'success': True, 'ats_score': 72, 'recommendations': ['Add a summary']}
+    assert cache.get(SHA, OPTIONS) is None
+    cache.put(SHA, OPTIONS, response)
+    assert as_dict(cache.get(SHA, OPTIONS)) == response
+    # Results of the same file under other options are separate entries
+    assert cache.get(SHA, 'other-options') is None
+    assert len(cache) == 1
+
+
+def test_document_round_trip(cache):
+    document = ParsedDocument(
+        raw_text='Jane Doe\njane@example.com',
+        processed_text='jane doe jane example com',
+        sections={'header': 'Jane Doe jane@example.com'},
+        skill_ids=frozenset({3, 1}),
+        layout=LayoutFacts(page_count=1, fonts=['helvetica'], image_count=0, column_lines=0, table_rows=0,
+                           isolated_blocks=0, repeated_header=False, repeated_footer=False, vector_rules=0,
+                           vector_curves=0),
+        features=TextFeatures(matches={'email': ['jane@example.com']}, sections={'header': {'email': ['x']}})
+    )
+    assert cache.get_document(SHA, 2) is None
+    cache.put_document(SHA, 2, document)
+    assert cache.get_document(SHA, 2) == document
+    assert cache.get_document(SHA, None) is None
+
+
+def test_counts_round_trip(cache):
+    counts = [('ats_score', '70'), ('section', 'education')]
+    cache.put_counts(SHA, OPTIONS, 72, counts)
+    summary = cache.get_counts(SHA, OPTIONS)
+    assert summary['ats_score'] == 72
+    assert [tuple(pair) for pair in summary['counts']] == counts
+
+
+def test_expired_entries_miss(tmp_path):
+    for backend in (MemoryBackend(), SQLiteBackend(str(tmp_path / 'cache.sqlite3'))):
+        cache = ResultCache(backend, ttl=-1)
+        cache.put(SHA, OPTIONS, {'ats_score': 1})
+        assert cache.get(SHA, OPTIONS) is None
+
+
+def test_null_backend_stores_nothing():
+    cache = ResultCache(NullBackend())
+    cache.put(SHA, OPTIONS, {'ats_score': 1})
+    assert cache.get(SHA, OPTIONS) is None
+    assert len(cache) == 0
+
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(size=2)
+    backend.put('a', 1, 60)
+    backend.put('b', 2, 60)
+    assert backend.get('a') == 1
+    backend.put('c', 3, 60)
+    assert backend.get('b') is None
+    assert (backend.get('a'), backend.get('c')) == (1, 3)
+
+
+def test_sqlite_backend_stays_under_its_byte_limit(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / 'cache.sqlite3'), max_bytes=1000)
+    for i in range(10):
+        backend.put(f'key-{i}', b'x' * 300, 60)
+    connection = backend._connect()
+    assert backend._bytes(connection) <= 1000
+    assert backend._bytes(connection) == connection.execute('SELECT SUM(size) FROM entries').fetchone()[0]
+    # The newest entry survives eviction, the oldest does not
+    assert backend.get('key-9') == b'x' * 300
+    assert backend.get('key-0') is None